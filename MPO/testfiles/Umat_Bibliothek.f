@@ -0,0 +1,369 @@
+! Loading paths of Umat_Oedo and Umat_Triax as shared library for MPO.
+! The results are written directly into arrays passed by the caller instead of an output file.
+! Compile together with a user routine having a UMAT interface, e.g.
+!    gfortran -shared -fPIC -o libumat.so Umat_Bibliothek.f <umat-file>
+!
+! status is 0 on success and 1 if the given input is invalid
+
+subroutine MPO_Oedometer(c_materialname, num_pressures, oedo_pressures, num_params, materialparameters, &
+   voidratio, max_rows, results, num_rows, status) bind(C, name='mpo_oedometer')
+   use iso_c_binding, only: c_char, c_double, c_int
+   implicit none
+
+   integer, parameter :: dp = c_double
+   character(kind=c_char), dimension(80), intent(in) :: c_materialname
+   integer(c_int), intent(in) :: num_pressures, num_params, max_rows
+   real(dp), dimension(num_pressures), intent(in) :: oedo_pressures
+   real(dp), dimension(num_params), intent(in) :: materialparameters
+   real(dp), intent(in) :: voidratio
+   real(dp), dimension(2, max_rows), intent(out) :: results
+   integer(c_int), intent(out) :: num_rows, status
+   !
+   integer, parameter :: ndi = 3
+   integer, parameter :: nshr = 3
+   integer, parameter :: ntens = 6
+   integer, parameter :: nstatv = 20
+   real(dp), dimension(ntens) :: ddsddt, drplde, stran
+   real(dp), dimension(ntens, ntens) :: ddsdde
+   real(dp), dimension(3, 3) :: drot, dfgrd0, dfgrd1
+   real(dp), dimension(3) :: coords
+   real(dp), dimension(2) :: time
+   real(dp), dimension(1) :: predef, dpred
+   real(dp) :: sse, spd, scd, rpl, drpldt, temp, dtemp, celent, pnewdt
+   integer, dimension(4) :: jstep
+   integer :: noel, npt, layer, kspt, kinc
+   !
+   character(len=80) :: materialname
+   real(dp), dimension(nstatv) :: statevariables, inoutstate
+   real(dp), dimension(ntens) :: stress, inoutstress
+   real(dp), dimension(ntens) :: strain, inpstrain
+   real(dp) :: dt, sigma1, numbersign, K0
+   integer :: istep, idx, ixx, jxx
+
+   num_rows = 0
+   status = 1
+   if ((num_pressures < 1) .or. (num_params > 16) .or. (max_rows < 1)) then
+      return
+   end if
+
+   do idx = 1, 80
+      materialname(idx:idx) = c_materialname(idx)
+   end do
+
+   ddsddt = 0.0_dp
+   drplde = 0.0_dp
+   stran = 0.0_dp
+   ddsdde = 0.0_dp
+   drot = reshape([(1.0_dp, (0.0_dp, ixx = 1, 3), jxx = 1, 2), 1.0_dp], [3, 3])
+   dfgrd0 = drot
+   dfgrd1 = drot
+   coords = 0.0_dp
+   !
+   time = [0.001_dp, 0.001_dp]
+   predef = 0.0_dp
+   dpred = 0.0_dp
+   celent = 0.0_dp
+   pnewdt = 0.0_dp
+   sse = 0.0_dp
+   spd = 0.0_dp
+   scd = 0.0_dp
+   rpl = 0.0_dp
+   drpldt = 0.0_dp
+   temp = 0.0_dp
+   dtemp = 0.0_dp
+   !
+   jstep = 0
+   noel = 0
+   npt = 0
+   layer = 0
+   kspt = 0
+   kinc = 0
+
+   ! Time increment to be used
+   dt = 0.00001_dp
+
+   ! Give initial stress and strain matrices (in vector form)
+   sigma1 = oedo_pressures(1)
+   K0 = 0.5_dp
+   stress = [K0*sigma1, sigma1, K0*sigma1, 0.0_dp, 0.0_dp, 0.0_dp]
+   strain = [0.0_dp, -1.0_dp, 0.0_dp, 0.0_dp, 0.0_dp, 0.0_dp]*dt
+   statevariables = 0.0_dp
+   statevariables(1) = voidratio
+   statevariables(3) = -0.0001
+
+   ! Output for start point as well
+   num_rows = 1
+   results(:, num_rows) = [-stress(2), voidratio]
+
+   inoutstress = stress
+   inoutstate = statevariables
+   idx = 1
+
+   loading_cycle: &
+   do istep = 2, num_pressures
+      numbersign = (-1.0_dp)**istep
+      inpstrain = numbersign*strain
+      loading_loop: &
+      do
+         if (numbersign*inoutstress(2) < numbersign*oedo_pressures(istep)) then
+            exit loading_loop
+         end if
+         call UMAT(inoutstress, inoutstate, ddsdde, sse, spd, scd, rpl, ddsddt, drplde, drpldt, &
+                   stran, inpstrain, time, dt, temp, dtemp, predef, dpred, materialname, ndi, nshr, &
+                   ntens, nstatv, materialparameters, num_params, coords, drot, &
+                   pnewdt, celent, dfgrd0, dfgrd1, noel, npt, layer, kspt, jstep, kinc)
+
+         if (num_rows >= max_rows) then
+            exit loading_cycle
+         end if
+         num_rows = num_rows + 1
+         results(:, num_rows) = [-inoutstress(2), inoutstate(1)]
+
+         idx = idx + 1
+         if (idx > max_rows - 1) then
+            exit loading_cycle
+         end if
+      end do loading_loop
+   end do loading_cycle
+
+   status = 0
+end subroutine MPO_Oedometer
+
+
+subroutine MPO_Triaxial(c_materialname, triax_pressure, num_target_strains, target_strains, num_params, &
+   materialparameters, voidratio, max_rows, results, num_rows, status) bind(C, name='mpo_triaxial')
+   use iso_c_binding, only: c_char, c_double, c_int
+   implicit none
+
+   integer, parameter :: dp = c_double
+   character(kind=c_char), dimension(80), intent(in) :: c_materialname
+   real(dp), intent(in) :: triax_pressure
+   integer(c_int), intent(in) :: num_target_strains, num_params, max_rows
+   real(dp), dimension(num_target_strains), intent(in) :: target_strains
+   real(dp), dimension(num_params), intent(in) :: materialparameters
+   real(dp), intent(in) :: voidratio
+   real(dp), dimension(3, max_rows), intent(out) :: results
+   integer(c_int), intent(out) :: num_rows, status
+   !
+   integer, parameter :: ndi = 3
+   integer, parameter :: nshr = 3
+   integer, parameter :: ntens = 6
+   integer, parameter :: nstatv = 20
+   real(dp), dimension(ntens) :: ddsddt, drplde, stran
+   real(dp), dimension(ntens, ntens) :: ddsdde
+   real(dp), dimension(3, 3) :: drot, dfgrd0, dfgrd1
+   real(dp), dimension(3) :: coords
+   real(dp), dimension(2) :: time
+   real(dp), dimension(1) :: predef, dpred
+   real(dp) :: sse, spd, scd, rpl, drpldt, temp, dtemp, celent, pnewdt
+   integer, dimension(4) :: jstep
+   integer :: noel, npt, layer, kspt, kinc
+   !
+   character(len=80) :: materialname
+   real(dp), dimension(nstatv) :: statevariables
+   real(dp), dimension(ntens) :: stress
+   real(dp), dimension(ntens) :: strain, refstrain
+   real(dp) :: dt, fak2, pressure_deviation, compared_strain, numbersign
+   real(dp), parameter :: tolerable_pressure_deviation = 0.000001_dp
+   integer, parameter :: maxiter = 50000
+   real(dp), dimension(6) :: sim_strains
+   integer :: ixx, jxx, istep, idx
+   logical :: breakall
+
+   num_rows = 0
+   status = 1
+   if ((num_target_strains < 1) .or. (num_params > 16) .or. (max_rows < 1)) then
+      return
+   end if
+
+   do idx = 1, 80
+      materialname(idx:idx) = c_materialname(idx)
+   end do
+
+   ddsddt = 0.0_dp
+   drplde = 0.0_dp
+   stran = 0.0_dp
+   ddsdde = 0.0_dp
+   drot = reshape([(1.0_dp, (0.0_dp, ixx = 1, 3), jxx = 1, 2), 1.0_dp], [3, 3])
+   dfgrd0 = drot
+   dfgrd1 = drot
+   coords = 0.0_dp
+   !
+   time = [0.001_dp, 0.001_dp]
+   predef = 0.0_dp
+   dpred = 0.0_dp
+   celent = 0.0_dp
+   pnewdt = 0.0_dp
+   sse = 0.0_dp
+   spd = 0.0_dp
+   scd = 0.0_dp
+   rpl = 0.0_dp
+   drpldt = 0.0_dp
+   temp = 0.0_dp
+   dtemp = 0.0_dp
+   !
+   jstep = 0
+   noel = 0
+   npt = 0
+   layer = 0
+   kspt = 0
+   kinc = 0
+
+   ! Time increment to be used
+   dt = 0.0001_dp
+
+   ! Give initial stress and strain matrices (in vector form)
+   stress = [triax_pressure, triax_pressure, triax_pressure, 0.0_dp, 0.0_dp, 0.0_dp]
+   strain = [-1.0_dp, 0.0_dp, 0.0_dp, 0.0_dp, 0.0_dp, 0.0_dp]*dt
+   statevariables = 0.0_dp
+   statevariables(1) = voidratio
+
+   pressure_deviation = abs(tolerable_pressure_deviation*triax_pressure)
+   fak2 = 0.0001_dp
+   compared_strain = 0.0_dp
+
+   ! Output for start point as well
+   num_rows = 1
+   results(:, num_rows) = 0.0_dp
+
+   idx = 1
+   sim_strains = 0.0_dp
+
+   triax_cycle : &
+   do istep = 1, num_target_strains
+      numbersign = (-1.0_dp)**(istep+1)
+      triax_compression : &
+      do
+         if (numbersign*compared_strain > numbersign*target_strains(istep)) then
+            exit triax_compression
+         end if
+
+         refstrain = numbersign*strain
+
+         call Triax_Step(stress, statevariables, refstrain, breakall)
+
+         if (breakall) then
+            exit triax_compression
+         end if
+
+         sim_strains = sim_strains + refstrain
+         compared_strain = abs(sim_strains(1))
+
+         if (num_rows >= max_rows) then
+            exit triax_cycle
+         end if
+         ! eps1 in %, eps_v in %, q in kPa
+         num_rows = num_rows + 1
+         results(:, num_rows) = [-100.0_dp*sim_strains(1), -100.0_dp*sum(sim_strains(1:3)), &
+            -(stress(1) - stress(2))]
+
+         idx = idx + 1
+         if (idx > maxiter) then
+            exit triax_compression
+         end if
+      end do triax_compression
+   end do triax_cycle
+
+   status = 0
+
+
+   contains
+
+
+   subroutine Triax_Step(stress, state, refstrain, breakall)
+      real(dp), dimension(ntens), intent(inout) :: stress, refstrain
+      real(dp), dimension(nstatv), intent(inout) :: state
+      logical, intent(out) :: breakall
+      ! ---
+      real(dp), dimension(ntens) :: inoutstress1, inoutstress2, inpstrain1, inpstrain2
+      real(dp), dimension(nstatv) :: inoutstate
+      real(dp) :: diff1, diff2, modstrain
+      integer :: strainidx, innercounter
+
+      breakall = .False.
+      strainidx = 0
+
+      inoutstress1 = stress
+      inoutstress2 = stress
+      inpstrain1 = [refstrain(1), 0.0_dp, 0.0_dp, refstrain(4), refstrain(5), refstrain(6)]
+      inoutstate = state                                             ! Reset state before call
+      call UMAT(inoutstress1, inoutstate, ddsdde, sse, spd, scd, rpl, ddsddt, drplde, drpldt, &
+                stran, inpstrain1, time, dt, temp, dtemp, predef, dpred, materialname, ndi, nshr, &
+                ntens, nstatv, materialparameters, num_params, coords, drot, pnewdt, celent, dfgrd0, &
+                dfgrd1, noel, npt, layer, kspt, jstep, kinc)
+      diff1 = inoutstress1(2) - stress(2)
+
+      inpstrain2 = [refstrain(1), fak2*refstrain(1), fak2*refstrain(1), &
+                     refstrain(4), refstrain(5), refstrain(6)]
+      inoutstate = state                                             ! Reset state before call
+      call UMAT(inoutstress2, inoutstate, ddsdde, sse, spd, scd, rpl, ddsddt, drplde, drpldt, &
+                stran, inpstrain2, time, dt, temp, dtemp, predef, dpred, materialname, ndi, nshr, &
+                ntens, nstatv, materialparameters, num_params, coords, drot, pnewdt, celent, dfgrd0, &
+                dfgrd1, noel, npt, layer, kspt, jstep, kinc)
+      inoutstate = state                                             ! Reset state
+      diff2 = inoutstress2(2) - stress(2)
+
+      innercounter = 0
+      minimize_difference : &
+      do
+         if (abs(diff2) < pressure_deviation) then
+            exit minimize_difference
+         end if
+
+         if (innercounter > 10) then
+            refstrain = refstrain/2.0_dp
+
+            inoutstress1 = stress
+            inoutstress2 = stress
+
+            inpstrain1 = [refstrain(1), 0.0_dp, 0.0_dp, refstrain(4), refstrain(5), refstrain(6)]
+            inoutstate = state                                       ! Reset state before call
+            call UMAT(inoutstress1, inoutstate, ddsdde, sse, spd, scd, rpl, ddsddt, drplde, drpldt, &
+                      stran, inpstrain1, time, dt, temp, dtemp, predef, dpred, materialname, ndi, nshr, &
+                      ntens, nstatv, materialparameters, num_params, coords, drot, pnewdt, celent, dfgrd0, &
+                      dfgrd1, noel, npt, layer, kspt, jstep, kinc)
+            diff1 = inoutstress1(2) - stress(2)
+
+            inpstrain2 = [refstrain(1), fak2*refstrain(1), fak2*refstrain(1), &
+                           refstrain(4), refstrain(5), refstrain(6)]
+            inoutstate = state                                       ! Reset state before call
+            call UMAT(inoutstress2, inoutstate, ddsdde, sse, spd, scd, rpl, ddsddt, drplde, drpldt, &
+                      stran, inpstrain2, time, dt, temp, dtemp, predef, dpred, materialname, ndi, nshr, &
+                      ntens, nstatv, materialparameters, num_params, coords, drot, pnewdt, celent, dfgrd0, &
+                      dfgrd1, noel, npt, layer, kspt, jstep, kinc)
+            diff2 = inoutstress2(2) - stress(2)
+            innercounter = 0
+         end if
+
+         modstrain = (diff2*inpstrain1(2) - diff1*inpstrain2(2))/(diff2 - diff1)
+         inpstrain1 = inpstrain2
+         diff1 = diff2
+         inpstrain2(2:3) = modstrain
+
+         inoutstress1 = stress
+         inoutstate = state                                          ! Reset state before call
+         call UMAT(inoutstress1, inoutstate, ddsdde, sse, spd, scd, rpl, ddsddt, drplde, drpldt, &
+                   stran, inpstrain2, time, dt, temp, dtemp, predef, dpred, materialname, ndi, nshr, &
+                   ntens, nstatv, materialparameters, num_params, coords, drot, pnewdt, celent, dfgrd0, &
+                   dfgrd1, noel, npt, layer, kspt, jstep, kinc)
+         diff2 = inoutstress1(2) - stress(2)
+
+         refstrain = inpstrain2
+         innercounter = innercounter + 1
+         strainidx = strainidx + 1
+
+         ! Check for NaN entries
+         if (diff2 /= diff2) then
+            breakall = .True.
+            exit minimize_difference
+         end if
+         if (strainidx > maxiter) then
+            breakall = .True.
+            exit minimize_difference
+         end if
+      end do minimize_difference
+
+      stress = inoutstress1
+      state = inoutstate
+   end subroutine Triax_Step
+end subroutine MPO_Triaxial
@@ -1,144 +1,228 @@
 program Umat_Triax
+   use iso_fortran_env, only: output_unit, error_unit
    implicit none
    
    ! IMPORTANT: UMAT allows single AND double precision, but some implementations require double precision
    integer, parameter :: dp = selected_real_kind(15)
    !
-   integer, parameter :: ndi = 3
-   integer, parameter :: nshr = 3
-   integer, parameter :: ntens = 6
-   integer, parameter :: nstatv = 20
-   integer, parameter :: nprops = 16
-   real(dp), dimension(ntens) :: ddsddt, drplde, stran
-   real(dp), dimension(ntens, ntens) :: ddsdde
-   real(dp), dimension(3, 3) :: drot, dfgrd0, dfgrd1
-   real(dp), dimension(3) :: coords
-   real(dp), dimension(2) :: time
-   real(dp), dimension(1) :: predef, dpred
-   real(dp) :: sse, spd, scd, rpl, drpldt, temp, dtemp, celent, pnewdt
-   integer, dimension(4) :: jstep
-   integer :: noel, npt, layer, kspt, kinc
+   ! Batch mode: Instead of a single set of arguments, a file with one set of arguments per line can be
+   ! passed with "--stapel <filename>". For each line a status line "MPO-Stapel <line number> <status>"
+   ! is written to stdout (status 0 on success). "--stapel-info" reports if batch mode is supported.
+   ! If the output filename is "-", the results are written to stdout and all messages to stderr
+   integer :: msgnr
+   integer, parameter :: max_batch_args = 64
+   character(len=80), dimension(max_batch_args) :: batch_args
+   integer :: num_batch_args
+   logical :: use_batch_args
    !
-   character(len=80) :: materialname, outfilename
-   real(dp), dimension(nprops) :: materialparameters
-   real(dp), dimension(nstatv) :: statevariables
-   real(dp), dimension(ntens) :: stress
-   real(dp), dimension(ntens) :: strain, refstrain
-   real(dp), dimension(6) :: intergranular_strain
-   real(dp) :: dt, voidratio, triax_pressure
-   real(dp) :: fak2, pressure_deviation, compared_strain, numbersign
-   real(dp), dimension(5) :: target_strains
-   real(dp), parameter :: tolerable_pressure_deviation = 0.000001_dp
-   integer, parameter :: maxiter = 50000
-   real(dp), dimension(6) :: sim_strains
-   integer :: ixx, jxx, istep, num_params
-   integer :: idx, filenr, stat, num_target_strains
-   logical :: breakall, is_success
-   real(dp) :: starttime, endtime
-
-   call Processed_Arguments(materialname=materialname, triax_pressure=triax_pressure, &
-      num_target_strains=num_target_strains, target_strains=target_strains, num_params=num_params, &
-      materialparameters=materialparameters, voidratio=voidratio, outfilename=outfilename)
-
-   ddsddt = 0.0_dp
-   drplde = 0.0_dp
-   stran = 0.0_dp
-   ddsdde = 0.0_dp
-   drot = reshape([(1.0_dp, (0.0_dp, ixx = 1, 3), jxx = 1, 2), 1.0_dp], [3, 3])
-   dfgrd0 = drot
-   dfgrd1 = drot
-   coords = 0.0_dp
-   !
-   time = [0.001_dp, 0.001_dp]
-   predef = 0.0_dp
-   dpred = 0.0_dp
-   celent = 0.0_dp
-   pnewdt = 0.0_dp
-   sse = 0.0_dp
-   spd = 0.0_dp
-   scd = 0.0_dp
-   rpl = 0.0_dp
-   drpldt = 0.0_dp
-   temp = 0.0_dp
-   dtemp = 0.0_dp
-   !
-   jstep = 0
-   noel = 0
-   npt = 0
-   layer = 0
-   kspt = 0
-   kinc = 0
-
-   ! Time increment to be used
-   dt = 0.0001_dp
-
-   ! Give initial stress and strain matrices (in vector form)
-   stress = [triax_pressure, triax_pressure, triax_pressure, 0.0_dp, 0.0_dp, 0.0_dp]
-   strain = [-1.0_dp, 0.0_dp, 0.0_dp, 0.0_dp, 0.0_dp, 0.0_dp]*dt
-   statevariables = 0.0_dp
-   statevariables(1) = voidratio
-
-   pressure_deviation = abs(tolerable_pressure_deviation*triax_pressure)
-   fak2 = 0.0001_dp
-   compared_strain = 0.0_dp
-
-
-   filenr = 20
-   open (filenr, file=trim(outfilename), iostat=stat)
-   if(stat /= 0) then
-      write(*, *) "Access problem during write attempt"
-      close(filenr)
-      stop
+   character(len=80) :: first_argument, batchfilename
+   character(len=4096) :: batchline
+   integer :: batchnr, batchstat, line_nr
+   logical :: is_success
+
+   msgnr = output_unit
+   use_batch_args = .False.
+   num_batch_args = 0
+   first_argument = ''
+   if (Command_Argument_Count() > 0) then
+      call get_command_argument(1, first_argument)
    end if
 
-   ! Write output for start point as well
-   write(filenr, '(f12.5, a, f12.5, a, f12.5)') 0.0, '   ', 0.0, '   ', 0.0
-
-   idx = 1
-   sim_strains = 0.0_dp
-   breakall = .False.
+   if ((Command_Argument_Count() == 1) .and. (trim(first_argument) == '--stapel-info')) then
+      write(*, '(a)') 'MPO-Stapel 1'
+   else if ((Command_Argument_Count() == 2) .and. (trim(first_argument) == '--stapel')) then
+      call get_command_argument(2, batchfilename)
+      batchnr = 21
+      open(batchnr, file=trim(batchfilename), status='old', action='read', iostat=batchstat)
+      if (batchstat /= 0) then
+         error stop 'Could not open batch file'
+      end if
 
-   call cpu_time(starttime)
-   triax_cycle : &
-   do istep = 1, num_target_strains
-      numbersign = (-1.0_dp)**(istep+1)
-      triax_compression : &
+      use_batch_args = .True.
+      line_nr = 0
+      batch_loop: &
       do
-         if (numbersign*compared_strain > numbersign*target_strains(istep)) then
-            exit triax_compression
+         read(batchnr, '(a)', iostat=batchstat) batchline
+         if (batchstat /= 0) then
+            exit batch_loop
+         end if
+         if (len_trim(batchline) == 0) then
+            cycle batch_loop
          end if
 
-         refstrain = numbersign*strain
+         line_nr = line_nr + 1
+         call Split_Arguments(line=batchline, arguments=batch_args, num_arguments=num_batch_args)
+         call Run_Simulation(is_success=is_success)
+         if (is_success) then
+            write(*, '(a, i0, a)') 'MPO-Stapel ', line_nr, ' 0'
+         else
+            write(*, '(a, i0, a)') 'MPO-Stapel ', line_nr, ' 1'
+         end if
+         flush(6)
+      end do batch_loop
+      close(batchnr)
+   else
+      call Run_Simulation(is_success=is_success)
+      if (.not. is_success) then
+         error stop 'Simulation could not be started'
+      end if
+   end if
 
-         call Triax_Step(stress, statevariables, ddsdde, sse, spd, scd, rpl, ddsddt, drplde, drpldt, &
-            stran, refstrain, time, dt, temp, dtemp, predef, dpred, materialname, ndi, nshr, &
-            ntens, nstatv, materialparameters(1:num_params), num_params, coords, drot, pnewdt, celent, dfgrd0, &
-            dfgrd1, noel, npt, layer, kspt, jstep, kinc, fak2, pressure_deviation, maxiter, breakall)
 
-         if (breakall) then
-            exit triax_compression
-         end if
+   contains
 
-         sim_strains = sim_strains + refstrain
-         compared_strain = abs(sim_strains(1))
 
-         ! Writing: eps1 in %, eps_v in %, q in kPa
-         write(filenr, '(f12.5, a, f12.5, a, f12.5)') -100.0_dp*sim_strains(1), '   ', &
-               -100.0_dp*sum(sim_strains(1:3)), '   ', -(stress(1) - stress(2))
+   subroutine Run_Simulation(is_success)
+      logical, intent(out) :: is_success
+      !
+      integer, parameter :: ndi = 3
+      integer, parameter :: nshr = 3
+      integer, parameter :: ntens = 6
+      integer, parameter :: nstatv = 20
+      integer, parameter :: nprops = 16
+      real(dp), dimension(ntens) :: ddsddt, drplde, stran
+      real(dp), dimension(ntens, ntens) :: ddsdde
+      real(dp), dimension(3, 3) :: drot, dfgrd0, dfgrd1
+      real(dp), dimension(3) :: coords
+      real(dp), dimension(2) :: time
+      real(dp), dimension(1) :: predef, dpred
+      real(dp) :: sse, spd, scd, rpl, drpldt, temp, dtemp, celent, pnewdt
+      integer, dimension(4) :: jstep
+      integer :: noel, npt, layer, kspt, kinc
+      !
+      character(len=80) :: materialname, outfilename
+      real(dp), dimension(nprops) :: materialparameters
+      real(dp), dimension(nstatv) :: statevariables
+      real(dp), dimension(ntens) :: stress
+      real(dp), dimension(ntens) :: strain, refstrain
+      real(dp), dimension(6) :: intergranular_strain
+      real(dp) :: dt, voidratio, triax_pressure
+      real(dp) :: fak2, pressure_deviation, compared_strain, numbersign
+      real(dp), dimension(5) :: target_strains
+      real(dp), parameter :: tolerable_pressure_deviation = 0.000001_dp
+      integer, parameter :: maxiter = 50000
+      real(dp), dimension(6) :: sim_strains
+      integer :: ixx, jxx, istep, num_params
+      integer :: idx, filenr, stat, num_target_strains
+      logical :: breakall
+      real(dp) :: starttime, endtime
+
+      call Processed_Arguments(materialname=materialname, triax_pressure=triax_pressure, &
+         num_target_strains=num_target_strains, target_strains=target_strains, num_params=num_params, &
+         materialparameters=materialparameters, voidratio=voidratio, outfilename=outfilename, &
+         is_success=is_success)
+      if (.not. is_success) then
+         return
+      end if
 
-         idx = idx + 1
-         if (idx > maxiter) then
-            write(*, *) 'Error: Maximum number of specified iterations reached'
-            exit triax_compression
+      ddsddt = 0.0_dp
+      drplde = 0.0_dp
+      stran = 0.0_dp
+      ddsdde = 0.0_dp
+      drot = reshape([(1.0_dp, (0.0_dp, ixx = 1, 3), jxx = 1, 2), 1.0_dp], [3, 3])
+      dfgrd0 = drot
+      dfgrd1 = drot
+      coords = 0.0_dp
+      !
+      time = [0.001_dp, 0.001_dp]
+      predef = 0.0_dp
+      dpred = 0.0_dp
+      celent = 0.0_dp
+      pnewdt = 0.0_dp
+      sse = 0.0_dp
+      spd = 0.0_dp
+      scd = 0.0_dp
+      rpl = 0.0_dp
+      drpldt = 0.0_dp
+      temp = 0.0_dp
+      dtemp = 0.0_dp
+      !
+      jstep = 0
+      noel = 0
+      npt = 0
+      layer = 0
+      kspt = 0
+      kinc = 0
+
+      ! Time increment to be used
+      dt = 0.0001_dp
+
+      ! Give initial stress and strain matrices (in vector form)
+      stress = [triax_pressure, triax_pressure, triax_pressure, 0.0_dp, 0.0_dp, 0.0_dp]
+      strain = [-1.0_dp, 0.0_dp, 0.0_dp, 0.0_dp, 0.0_dp, 0.0_dp]*dt
+      statevariables = 0.0_dp
+      statevariables(1) = voidratio
+
+      pressure_deviation = abs(tolerable_pressure_deviation*triax_pressure)
+      fak2 = 0.0001_dp
+      compared_strain = 0.0_dp
+
+
+      if (trim(outfilename) == '-') then
+         filenr = output_unit
+         msgnr = error_unit
+      else
+         msgnr = output_unit
+         filenr = 20
+         open (filenr, file=trim(outfilename), iostat=stat)
+         if(stat /= 0) then
+            write(error_unit, *) "Access problem during write attempt"
+            close(filenr)
+            is_success = .False.
+            return
          end if
-      end do triax_compression
-   end do triax_cycle
-   call cpu_time(endtime)
-   print '("Elapsed: ",f6.3,"s")', endtime - starttime
-   close(filenr)
+      end if
 
+      ! Write output for start point as well
+      write(filenr, '(f12.5, a, f12.5, a, f12.5)') 0.0, '   ', 0.0, '   ', 0.0
 
-   contains
+      idx = 1
+      sim_strains = 0.0_dp
+      breakall = .False.
+
+      call cpu_time(starttime)
+      triax_cycle : &
+      do istep = 1, num_target_strains
+         numbersign = (-1.0_dp)**(istep+1)
+         triax_compression : &
+         do
+            if (numbersign*compared_strain > numbersign*target_strains(istep)) then
+               exit triax_compression
+            end if
+
+            refstrain = numbersign*strain
+
+            call Triax_Step(stress, statevariables, ddsdde, sse, spd, scd, rpl, ddsddt, drplde, drpldt, &
+               stran, refstrain, time, dt, temp, dtemp, predef, dpred, materialname, ndi, nshr, &
+               ntens, nstatv, materialparameters(1:num_params), num_params, coords, drot, pnewdt, celent, dfgrd0, &
+               dfgrd1, noel, npt, layer, kspt, jstep, kinc, fak2, pressure_deviation, maxiter, breakall)
+
+            if (breakall) then
+               exit triax_compression
+            end if
+
+            sim_strains = sim_strains + refstrain
+            compared_strain = abs(sim_strains(1))
+
+            ! Writing: eps1 in %, eps_v in %, q in kPa
+            write(filenr, '(f12.5, a, f12.5, a, f12.5)') -100.0_dp*sim_strains(1), '   ', &
+                  -100.0_dp*sum(sim_strains(1:3)), '   ', -(stress(1) - stress(2))
+
+            idx = idx + 1
+            if (idx > maxiter) then
+               write(msgnr, *) 'Error: Maximum number of specified iterations reached'
+               exit triax_compression
+            end if
+         end do triax_compression
+      end do triax_cycle
+      call cpu_time(endtime)
+      write(msgnr, '("Elapsed: ",f6.3,"s")') endtime - starttime
+      if (filenr == output_unit) then
+         flush(output_unit)
+      else
+         close(filenr)
+      end if
+   end subroutine Run_Simulation
 
 
    subroutine Triax_Step(stress, state, ddsdde, sse, spd, scd, rpl, ddsddt, drplde, drpldt, &
@@ -204,7 +288,7 @@ program Umat_Triax
          end if
 
          if (innercounter > 10) then
-            write(*, *) 'Strain increment halved'
+            write(msgnr, *) 'Strain increment halved'
             refstrain = refstrain/2.0_dp
 
             inoutstress1 = stress
@@ -248,12 +332,12 @@ program Umat_Triax
 
          ! Check for NaN entries
          if (diff2 /= diff2) then
-            write(*, *) 'Error: NaN entries found'
+            write(error_unit, *) 'Error: NaN entries found'
             breakall = .True.
             exit minimize_difference
          end if
          if (strainidx > maxiter) then
-            write(*, *) 'Error: Problem in triax loop'
+            write(error_unit, *) 'Error: Problem in triax loop'
             breakall = .True.
             exit minimize_difference
          end if
@@ -264,8 +348,58 @@ program Umat_Triax
    end subroutine Triax_Step
 
 
+   subroutine Split_Arguments(line, arguments, num_arguments)
+      character(len=*), intent(in) :: line
+      character(len=80), dimension(max_batch_args), intent(out) :: arguments
+      integer, intent(out) :: num_arguments
+      !
+      integer :: idx, idx_start
+      logical :: in_argument
+
+      arguments = ''
+      num_arguments = 0
+      in_argument = .False.
+      idx_start = 1
+      do idx = 1, len_trim(line) + 1
+         if ((idx > len_trim(line)) .or. (line(idx:idx) == ' ') .or. (line(idx:idx) == char(9))) then
+            if (in_argument) then
+               if (num_arguments < max_batch_args) then
+                  num_arguments = num_arguments + 1
+                  arguments(num_arguments) = line(idx_start:idx-1)
+               end if
+               in_argument = .False.
+            end if
+         else if (.not. in_argument) then
+            in_argument = .True.
+            idx_start = idx
+         end if
+      end do
+   end subroutine Split_Arguments
+
+
+   integer function Argument_Count()
+      if (use_batch_args) then
+         Argument_Count = num_batch_args
+      else
+         Argument_Count = Command_Argument_Count()
+      end if
+   end function Argument_Count
+
+
+   subroutine Get_Argument(idx, value)
+      integer, intent(in) :: idx
+      character(len=80), intent(out) :: value
+
+      if (use_batch_args) then
+         value = batch_args(idx)
+      else
+         call get_command_argument(idx, value)
+      end if
+   end subroutine Get_Argument
+
+
    subroutine Processed_Arguments(materialname, triax_pressure, num_target_strains, target_strains, &
-      num_params, materialparameters, voidratio, outfilename)
+      num_params, materialparameters, voidratio, outfilename, is_success)
       real(dp), intent(out) :: triax_pressure
       integer, intent(out) :: num_target_strains
       real(dp), dimension(5), intent(out) :: target_strains
@@ -273,74 +407,88 @@ program Umat_Triax
       real(dp), dimension(16), intent(out) :: materialparameters
       real(dp), intent(out) :: voidratio
       character(len=80), intent(out) :: materialname, outfilename
+      logical, intent(out) :: is_success
       !
       character(len=80) :: temp
-      integer :: status, num_arguments, idx, temp_num
- 
-      num_arguments = Command_Argument_Count()
+      integer :: status, num_arguments, idx
+
+      is_success = .False.
+      num_arguments = Argument_Count()
       if (num_arguments < 8) then
-         stop 'Expecting material name, triax pressure, number of and respective target strains, number of and ' &
+         write(error_unit, *) 'Expecting material name, triax pressure, number of and respective target strains, number of and ' &
             // 'respective material parameters, void ratio and log filename as argument'
+         return
       end if
 
-      call get_command_argument(1, temp)
+      call Get_Argument(1, temp)
       materialname = trim(temp)
 
-      call get_command_argument(2, temp)
+      call Get_Argument(2, temp)
       read(temp, *, iostat=status) triax_pressure
       if (status /= 0) then
-         stop 'Error reading triax pressure (not float/integer?)'
+         write(error_unit, *) 'Error reading triax pressure (not float/integer?)'
+         return
       end if
 
-      call get_command_argument(3, temp)
+      call Get_Argument(3, temp)
       read(temp, *, iostat=status) num_target_strains
       if (status /= 0) then
-         stop 'Error reading number of target strains (not integer?)'
+         write(error_unit, *) 'Error reading number of target strains (not integer?)'
+         return
       end if
       if ((num_target_strains < 1) .or. (num_target_strains > 5)) then
-         stop 'Number of target strains should be from one to five'
+         write(error_unit, *) 'Number of target strains should be from one to five'
+         return
       end if
       if (num_arguments < 7 + num_target_strains) then
-         stop 'Not enough arguments given'
+         write(error_unit, *) 'Not enough arguments given'
+         return
       end if
 
       target_strains = 0.0_dp
       do idx = 1, num_target_strains
-         call get_command_argument(3+idx, temp)
+         call Get_Argument(3+idx, temp)
          read(temp, *, iostat=status) target_strains(idx)
          if (status /= 0) then
-            stop 'Error reading element of target_strains (not float/integer?)'
+            write(error_unit, *) 'Error reading element of target_strains (not float/integer?)'
+            return
          end if
       end do
 
-      call get_command_argument(num_target_strains+4, temp)
+      call Get_Argument(num_target_strains+4, temp)
       read(temp, *, iostat=status) num_params
       if (status /= 0) then
-         stop 'Error reading number of parameters (not integer?)'
+         write(error_unit, *) 'Error reading number of parameters (not integer?)'
+         return
       end if
       if (num_params > 16) then
-         stop 'More parameters given than expected (16)'
+         write(error_unit, *) 'More parameters given than expected (16)'
+         return
       end if
       if (num_arguments < 6 + num_target_strains + num_params) then
-         stop 'Not enough arguments given'
+         write(error_unit, *) 'Not enough arguments given'
+         return
       end if
 
       materialparameters = 0.0_dp
       do idx = 1, num_params
-         call get_command_argument(num_target_strains+4+idx, temp)
+         call Get_Argument(num_target_strains+4+idx, temp)
          read(temp, *, iostat=status) materialparameters(idx)
          if (status /= 0) then
-            stop 'Error reading element of materialparameters (not float/integer?)'
+            write(error_unit, *) 'Error reading element of materialparameters (not float/integer?)'
+            return
          end if
       end do
 
-      call get_command_argument(num_arguments-1, temp)
+      call Get_Argument(num_arguments-1, temp)
       read(temp, *, iostat=status) voidratio
       if (status /= 0) then
-         stop 'Error reading void ratio (not float/integer?)'
+         write(error_unit, *) 'Error reading void ratio (not float/integer?)'
+         return
       end if
 
-      call get_command_argument(num_arguments, temp)
+      call Get_Argument(num_arguments, temp)
       outfilename = trim(temp)
+      is_success = .True.
    end subroutine Processed_Arguments
 end program Umat_Triax
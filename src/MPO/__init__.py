@@ -37,6 +37,10 @@ from .optionsverarbeitung import *
 from .versuchsliste import *
 from .abweichung import *
 from .plotausgabe import *
+from .arbeitsverteilung import *
+from .umatbibliothek import *
+from .ergebnisspeicher import *
+from .optimierung import *
 from .programmsteuerung import *
 
 __author__ = 'Dominik Zobel'
@@ -22,13 +22,55 @@ abweichung.py   v0.3
 # along with MPO. If not, see <http://www.gnu.org/licenses/>.
 
 
+# -------------------------------------------------------------------------------------------------
+def _Unterschied_Vektoren_Numpy(daten, refdaten, methode, skalierung=1.0):
+    """Bestimme wie _Unterschied_Gleichartiger_Vektoren den Unterschied der daten zu refdaten mit
+    numpy fuer alle Punkte gleichzeitig. daten kann ein Vektor oder ein Array mit einer Zeile je
+    Simulation sein, die alle mit demselben Vektor refdaten verglichen werden. Die Rechenschritte
+    entsprechen denen der Einzelberechnung (Quadrieren wie bei ** mit numpy.float_power), sodass die
+    Ergebnisse identisch sind. Gibt ein numpy-Array mit der gleichen Form wie daten zurueck.
+    """
+    import numpy
+
+    abstand = numpy.asarray(daten, dtype=float) - numpy.asarray(refdaten, dtype=float)
+    if (methode == 'fehlerquadrate'):
+        return numpy.float_power(abstand/skalierung, 2)
+    elif (methode == 'differenzflaeche'):
+        # Siehe _Unterschied_Gleichartiger_Vektoren fuer die Faelle normaler/ueberschlagener Trapeze
+        davor = abstand[..., :-1]
+        danach = abstand[..., 1:]
+        refkleiner = (davor > 0.0).astype(int) + (danach > 0.0).astype(int)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            ueberschlagen = (numpy.float_power(davor, 2) + numpy.float_power(danach, 2)) \
+                /(2.0*skalierung*(numpy.abs(davor) + numpy.abs(danach)))
+
+        normal = numpy.abs(davor + danach)/(2.0*skalierung)
+        unterschied = numpy.zeros(abstand.shape)
+        unterschied[..., 1:] = numpy.where(refkleiner == 1, ueberschlagen, normal)
+        return unterschied
+    else:
+        # Betrags-Methode, wenn 'betrag' oder ungueltige Eingabe
+        return numpy.abs(abstand)/skalierung
+
+
+
 # -------------------------------------------------------------------------------------------------
 def _Unterschied_Gleichartiger_Vektoren(daten, refdaten, methode, skalierung=1.0):
     """Diese Funktion erwartet zwei gleichlange Vektoren, die deren Werte jeweils miteinander
     vergleichbar sind (bspw. an gleichen Punkten ausgewertet, am besten auch in konstanten
     Abstaenden). Daraufhin kann fuer die gewaehlte methode ein Wert fuer den Unterschied der beiden
-    Vektoren ermittelt werden.
+    Vektoren ermittelt werden. Falls verfuegbar wird mit numpy gerechnet (siehe
+    _Unterschied_Vektoren_Numpy).
     """
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    if (numpy is not None):
+        return _Unterschied_Vektoren_Numpy(daten=daten, refdaten=refdaten, methode=methode,
+            skalierung=skalierung).tolist()
+
     if (methode == 'fehlerquadrate'):
         unterschied = [((daten[idx] - refdaten[idx])/skalierung)**2 for idx in range(len(daten))]
     elif (methode == 'differenzflaeche'):
@@ -67,42 +109,94 @@ def _Unterschied_Gleichartiger_Vektoren(daten, refdaten, methode, skalierung=1.0
 
 
 
+# -------------------------------------------------------------------------------------------------
+def Stuetzstellenbereich(einstellungen, str_versuch):
+    """Gib den kleinsten und groessten Wert der Stuetzstellen ('Relevante x-Werte') von str_versuch
+    zurueck. Darueber hinaus werden keine Simulationsergebnisse benoetigt.
+    """
+    xrefwerte = einstellungen['Versuchsablauf'][str_versuch]['Referenzdaten']['Relevante x-Werte']
+    return [min(xrefwerte), max(xrefwerte)]
+
+
+
 # -------------------------------------------------------------------------------------------------
 def Berechnung_Differenzen(einstellungen, vergleichsdaten, str_versuch, datei):
-    """Lese die Ergebnisse aus datei ein und extrahiere die Daten an den ausgewaehlten Stuetzstellen,
-    wie sie in einstellungen definiert sind. Bestimme den Unterschied zu den vergleichsdaten, die
-    an den gleichen Stuetzstellen ausgewertet sind bzw. sein sollten.
+    """Lese die Ergebnisse aus datei ein und bestimme den Unterschied zu den vergleichsdaten
+    (siehe Berechnung_Differenzen_Daten). Es werden nur so viele Spalten und Zeilen eingelesen, wie
+    fuer die vergleichsdaten benoetigt werden.
+    """
+    from .dateneinlesen import CSV_Spalten_Einlesen
+
+    simulationsergebnisse = CSV_Spalten_Einlesen(dateiname=datei, anzahl_spalten=len(vergleichsdaten),
+        x_bereich=Stuetzstellenbereich(einstellungen=einstellungen, str_versuch=str_versuch))
+    return Berechnung_Differenzen_Daten(einstellungen=einstellungen, vergleichsdaten=vergleichsdaten,
+        str_versuch=str_versuch, simulationsergebnisse=simulationsergebnisse)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Simulationswerte_An_Stuetzstellen(einstellungen, str_versuch, simulationsergebnisse):
+    """Extrahiere aus simulationsergebnisse (zeilenweise Liste wie aus einer Ergebnisdatei oder
+    numpy-Array aus CSV_Spalten_Einlesen) die Daten an den ausgewaehlten Stuetzstellen, wie sie in
+    einstellungen fuer str_versuch definiert sind. Gibt eine Liste mit den interpolierten Werten je
+    Ergebnisspalte zurueck (leere Listen, falls die Simulationsdaten die Stuetzstellen nicht abdecken).
     """
-    from .dateneinlesen import CSV_Ergebnisse_Einlesen
     from .hilfen import Daten_An_Stuetzstellen
 
-    simulationsergebnisse = CSV_Ergebnisse_Einlesen(dateiname=datei)
     xrefwerte = einstellungen['Versuchsablauf'][str_versuch]['Referenzdaten']['Relevante x-Werte']
-    num_werte = len(xrefwerte)
-    xsim = [x[0] for x in simulationsergebnisse]
-    simdaten = []
-    for idx_sim in range(len(simulationsergebnisse[0])-1):
-        simdaten += [[x[idx_sim+1] for x in simulationsergebnisse]]
+    if (hasattr(simulationsergebnisse, 'shape')):
+        xsim = simulationsergebnisse[:, 0]
+        simdaten = [simulationsergebnisse[:, idx_sim] for idx_sim in range(1, simulationsergebnisse.shape[1])]
+    else:
+        xsim = [x[0] for x in simulationsergebnisse]
+        simdaten = []
+        for idx_sim in range(len(simulationsergebnisse[0])-1):
+            simdaten += [[x[idx_sim+1] for x in simulationsergebnisse]]
+
+    return Daten_An_Stuetzstellen(xrefwerte=xrefwerte, xdaten=xsim, extradaten=simdaten)
+
 
-    simwerte = Daten_An_Stuetzstellen(xrefwerte=xrefwerte, xdaten=xsim, extradaten=simdaten)
-    if (simwerte[0] == []):
-        print('# Warnung: Ungueltige/nicht ausreichend Werte in den Simulationsdaten')
-        if (xwerte != []):
-            return [-1.0, xsim[0], xsim[-1]]
-        else:
-            return [-1.0]
 
+# -------------------------------------------------------------------------------------------------
+def Skalierungen(vergleichsdaten):
+    """Bestimme fuer jede Groesse der vergleichsdaten die Skalierung (Differenz aus Maximum und
+    Minimum der Referenzwerte), mit der die Unterschiede bewertet werden. Gibt eine Liste mit der
+    Skalierung je Groesse zurueck.
+    """
+    return [max(refwerte) - min(refwerte) for refwerte in vergleichsdaten[1:]]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Differenzen_An_Stuetzstellen(einstellungen, vergleichsdaten, simwerte, skalierungen=None):
+    """Bestimme den Unterschied der simwerte (siehe Simulationswerte_An_Stuetzstellen) zu den
+    vergleichsdaten, die an den gleichen Stuetzstellen ausgewertet sind. Optional koennen die
+    vorab bestimmten skalierungen (siehe Skalierungen) uebergeben werden. Gibt eine Liste mit den
+    Differenzen an jeder Stuetzstelle zurueck.
+    """
     # Mit der ausgewaehlten Skalierung wird sozusagen die optische Uebereinstimmung bewertet.
     # In einem Plot der Referenzdaten entsprechen die Grenzen der vertikalen Achse dem Minimum/Maximum
     # der Referenzdaten und sind auf 1 skaliert. Dann wird bewertet, wie weit die restlichen Daten
     # mit dieser Skalierung von den Referenzdaten entfernt sind.
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    if (numpy is not None):
+        return Differenzen_An_Stuetzstellen_Stapel(einstellungen=einstellungen, vergleichsdaten=vergleichsdaten,
+            simwerte_stapel=[simwerte], skalierungen=skalierungen)[0]
+
+    if (skalierungen is None):
+        skalierungen = Skalierungen(vergleichsdaten=vergleichsdaten)
+
     methode = einstellungen['Fehlerbestimmungsmethode']
     refwerte = vergleichsdaten[1:]
+    num_werte = len(vergleichsdaten[0])
     differenzen = [0 for x in range(num_werte)]
     for idx_wert in range(len(simwerte)):
-        skalierung = max(refwerte[idx_wert]) - min(refwerte[idx_wert])
         temp_differenzen = _Unterschied_Gleichartiger_Vektoren(daten=simwerte[idx_wert],
-            skalierung=skalierung, refdaten=refwerte[idx_wert], methode=methode)
+            skalierung=skalierungen[idx_wert], refdaten=refwerte[idx_wert], methode=methode)
         differenzen = [differenzen[idx] + temp_differenzen[idx] for idx in range(num_werte)]
 
     return differenzen
@@ -110,16 +204,109 @@ def Berechnung_Differenzen(einstellungen, vergleichsdaten, str_versuch, datei):
 
 
 # -------------------------------------------------------------------------------------------------
-def Bodendaten_Und_Vergleichsdaten(einstellungen, str_versuch):
+def Differenzen_An_Stuetzstellen_Stapel(einstellungen, vergleichsdaten, simwerte_stapel, skalierungen=None):
+    """Bestimme wie Differenzen_An_Stuetzstellen den Unterschied mehrerer Simulationen zu denselben
+    vergleichsdaten. simwerte_stapel enthaelt die simwerte (siehe Simulationswerte_An_Stuetzstellen)
+    jeder Simulation. Falls verfuegbar werden alle Simulationen mit numpy in einem Schritt je
+    Ergebnisspalte bewertet. Gibt eine Liste mit den Differenzen je Simulation zurueck.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return [Differenzen_An_Stuetzstellen(einstellungen=einstellungen, vergleichsdaten=vergleichsdaten,
+            simwerte=simwerte, skalierungen=skalierungen) for simwerte in simwerte_stapel]
+
+    if (simwerte_stapel == []):
+        return []
+
+    if (skalierungen is None):
+        skalierungen = Skalierungen(vergleichsdaten=vergleichsdaten)
+
+    methode = einstellungen['Fehlerbestimmungsmethode']
+    refwerte = vergleichsdaten[1:]
+    num_werte = len(vergleichsdaten[0])
+    differenzen = numpy.zeros((len(simwerte_stapel), num_werte))
+    # Die Spalten werden nacheinander addiert, damit die Summe der Einzelberechnung entspricht
+    for idx_wert in range(len(simwerte_stapel[0])):
+        differenzen = differenzen + _Unterschied_Vektoren_Numpy(daten=[simwerte[idx_wert]
+            for simwerte in simwerte_stapel], refdaten=refwerte[idx_wert], methode=methode,
+            skalierung=skalierungen[idx_wert])
+
+    return differenzen.tolist()
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Berechnung_Differenzen_Daten(einstellungen, vergleichsdaten, str_versuch, simulationsergebnisse):
+    """Extrahiere aus simulationsergebnisse (zeilenweise Liste wie aus einer Ergebnisdatei) die Daten
+    an den ausgewaehlten Stuetzstellen, wie sie in einstellungen definiert sind. Bestimme den
+    Unterschied zu den vergleichsdaten, die an den gleichen Stuetzstellen ausgewertet sind bzw. sein
+    sollten.
+    """
+    simwerte = Simulationswerte_An_Stuetzstellen(einstellungen=einstellungen, str_versuch=str_versuch,
+        simulationsergebnisse=simulationsergebnisse)
+    if (simwerte[0] == []):
+        xsim = [x[0] for x in simulationsergebnisse]
+        print('# Warnung: Ungueltige/nicht ausreichend Werte in den Simulationsdaten')
+        if (len(xsim) > 0):
+            return [-1.0, xsim[0], xsim[-1]]
+        else:
+            return [-1.0]
+
+    return Differenzen_An_Stuetzstellen(einstellungen=einstellungen, vergleichsdaten=vergleichsdaten,
+        simwerte=simwerte)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Referenzkennung(einstellungen, str_versuch, referenzcache):
+    """Bestimme die Kennung der aufbereiteten Referenzdaten von str_versuch im referenzcache aus dem
+    Hashwert der Referenzdatei (einmal je Datei), den ausgewaehlten Daten und den Stuetzstellen.
+    Gibt die Kennung als Text zurueck oder None, falls die Referenzdatei nicht gelesen werden kann.
+    """
+    import hashlib
+    import json
+    from .ergebnisspeicher import Programmkennung
+
+    refeintrag = einstellungen['Versuchsablauf'][str_versuch]['Referenzdaten']
+    dateikennungen = referenzcache['dateikennungen']
+    if (refeintrag['Datei'] not in dateikennungen):
+        dateikennungen[refeintrag['Datei']] = Programmkennung(dateiname=refeintrag['Datei'])
+
+    dateikennung = dateikennungen[refeintrag['Datei']]
+    if (dateikennung is None):
+        return None
+
+    inhalt = json.dumps([dateikennung, refeintrag['Daten'], refeintrag['Relevante x-Werte']])
+    return hashlib.sha256(inhalt.encode('utf-8')).hexdigest()
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Bodendaten_Und_Vergleichsdaten(einstellungen, str_versuch, referenzcache=None):
     """Extrahiere aus den uebergebenen bodendaten die relevanten Versuchsdaten fuer str_versuch
     des Versuchsablaufs und unterteile die Daten in die angegebene Anzahl an (gleichverteilten)
-    Werten. Sofern erfolgreich werden die Versuchsdaten und Informationen ueber einzelnen Werte
-    als dict zurueckgegeben, ansonsten None.
+    Werten. Mit einem referenzcache (siehe Referenzcache_Oeffnen) wird jede Referenzdatei nur
+    einmal eingelesen und bereits aufbereitete Daten werden direkt uebernommen, solange sich weder
+    die Referenzdatei noch die ausgewaehlten Daten oder Stuetzstellen geaendert haben. Sofern
+    erfolgreich werden die Versuchsdaten und Informationen ueber einzelnen Werte als dict
+    zurueckgegeben, ansonsten None.
     """
     from .hilfen import ZugriffEintrag, Daten_An_Stuetzstellen
     from .dateneinlesen import Referenzdaten_Laden
 
-    bodendaten = Referenzdaten_Laden(einstellungen=einstellungen, str_versuch=str_versuch)
+    referenzdateien = None
+    kennung = None
+    if (referenzcache is not None):
+        referenzdateien = referenzcache['referenzdateien']
+        kennung = _Referenzkennung(einstellungen=einstellungen, str_versuch=str_versuch,
+            referenzcache=referenzcache)
+        if (kennung in referenzcache['eintraege']):
+            referenzcache['genutzt'].add(kennung)
+            return referenzcache['eintraege'][kennung]
+
+    bodendaten = Referenzdaten_Laden(einstellungen=einstellungen, str_versuch=str_versuch,
+        referenzdateien=referenzdateien)
     if (bodendaten is None):
         return [None, None]
 
@@ -150,61 +337,98 @@ def Bodendaten_Und_Vergleichsdaten(einstellungen, str_versuch):
     refdaten = Daten_An_Stuetzstellen(xrefwerte=xrefwerte, xdaten=xdaten[idx_start:idx_end+1],
         extradaten=[x[idx_start:idx_end+1] for x in extradaten])
 
+    if (kennung is not None):
+        referenzcache['eintraege'][kennung] = [bodendaten, [xrefwerte] + refdaten]
+        referenzcache['genutzt'].add(kennung)
+        referenzcache['geaendert'] = True
+
     return [bodendaten, [xrefwerte] + refdaten]
 
 
 
 # -------------------------------------------------------------------------------------------------
-def Bewerte_Ergebnisse(einstellungen):
+def Differenzzeile_Bewerten(zeile):
+    """Bewerte eine zeile aus einer Ausgabedatei der Differenzen. Gibt den Mittelwert aller
+    Differenzen zurueck oder None, falls die Berechnung fehlgeschlagen ist und keine Daten
+    verfuegbar sind.
+    """
+    eintraege = zeile.split(',')
+    if (len(eintraege) <= 3):
+        return None
+
+    return sum([float(x) for x in eintraege])/len(eintraege)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Bewerte_Ergebnisse(einstellungen, mit_bewertung=False):
     """Bewerte alle Ergebnisse, die im Rahmen des Versuchsablaufs in die entsprechenden
     Ausgabedateien der Differenzen geschrieben wurden. Gibt eine nach der Bewertung der Ergebnisse
     (absteigend) sortierte Liste mit den Indizes der jeweiligen Variation zurueck oder eine leere
-    Liste, falls kein (brauchbares) Ergebnis vorhanden ist.
+    Liste, falls kein (brauchbares) Ergebnis vorhanden ist. Mit mit_bewertung=True wird
+    [indizes, bewertungen] zurueckgegeben, wobei bewertungen die zugehoerige Gesamtbewertung
+    enthaelt (None fuer Variationen ohne brauchbares Ergebnis). Die Bewertungen werden (falls
+    verfuegbar) in numpy-Arrays gesammelt und sortiert.
     """
     import os
-    from .dateneinlesen import Variationsdatei_Laden
-    from .versuchsliste import Ermittle_Max_Variationen
+    from .versuchsliste import Variationsquelle_Erstellen, Variation_Ermitteln
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
 
     aktueller_ordner = os.path.abspath(os.curdir)
     os.chdir(einstellungen['Arbeitsverzeichnis'])
 
-    variationswerte = Variationsdatei_Laden(dateiname=einstellungen['Ausgabedatei_Variationen'])
-    anzahl_untersuchungen = len(variationswerte)
+    quelle = Variationsquelle_Erstellen(einstellungen=einstellungen,
+        dateiname=einstellungen['Ausgabedatei_Variationen'])
+    anzahl_untersuchungen = quelle['anzahl']
 
-    gesamtwerte = [[0.0, x] for x in range(anzahl_untersuchungen)]
-    disqualifiziert = [False for x in range(anzahl_untersuchungen)]
+    if (numpy is None):
+        gesamtwerte = [0.0 for x in range(anzahl_untersuchungen)]
+        disqualifiziert = [False for x in range(anzahl_untersuchungen)]
+    else:
+        gesamtwerte = numpy.zeros(anzahl_untersuchungen)
+        disqualifiziert = numpy.zeros(anzahl_untersuchungen, dtype=bool)
 
     num_zeilen = 0
     # Kann in beliebiger Reihenfolge durchgefuehrt werden
     for idx_schluessel, schluessel in enumerate(einstellungen['Versuchsablauf'].keys()):
         diff_datei = schluessel + '_' + einstellungen['Ausgabedatei_Differenzen']
-        gewichtung = einstellungen['Versuchsablauf'][schluessel]['Gewichtungsfaktor']
         with open(diff_datei, 'r', encoding='utf-8') as eingabe:
             for idx_zeile, zeile in enumerate(eingabe):
                 if (idx_schluessel == 0):
                     num_zeilen += 1
 
-                eintraege = zeile.split(',')
-                if (len(eintraege) <= 3):
+                bewertung = Differenzzeile_Bewerten(zeile=zeile)
+                if (bewertung is None):
                     # Irgendetwas ist schief gelaufen bei der Berechnung und es sind keine Daten verfuegbar
                     # Zaehle einen grossen Offset dazu, damit diese Daten auf jeden Fall ignoriert werden
                     disqualifiziert[idx_zeile] = True
-                    gesamtwerte[idx_zeile][0] += 10000.0
+                    gesamtwerte[idx_zeile] += 10000.0
                     continue
 
-                gesamtwerte[idx_zeile][0] += sum([float(x) for x in eintraege])/len(eintraege)
+                gesamtwerte[idx_zeile] += bewertung
 
-    gesamtwerte = gesamtwerte[:num_zeilen]
-    disqualifiziert = disqualifiziert[:num_zeilen]
-    gesamtwerte.sort(key=lambda z: z[0])
+    if (numpy is None):
+        reihenfolge = sorted(range(num_zeilen), key=lambda idx: gesamtwerte[idx])
+    else:
+        reihenfolge = numpy.argsort(gesamtwerte[:num_zeilen], kind='stable').tolist()
 
     indizes_beste_ergebnisse = []
+    bewertungen = []
     print('# Die besten Bewertungen\n')
     with open(einstellungen['Ausgabedatei_Bewertung'], 'w', encoding='utf-8') as ausgabe:
-        for idx in range(num_zeilen):
-            idx_daten = gesamtwerte[idx][1]
-            textzeile = '{:12.5f} ({:08d}): {}'.format(gesamtwerte[idx][0], idx_daten, ', '.join(variationswerte[idx_daten]))
+        for idx, idx_daten in enumerate(reihenfolge):
+            gesamtwert = float(gesamtwerte[idx_daten])
+            variation = Variation_Ermitteln(quelle=quelle, idx_variation=idx_daten)
+            textzeile = '{:12.5f} ({:08d}): {}'.format(gesamtwert, idx_daten, ', '.join(variation))
             indizes_beste_ergebnisse += [idx_daten]
+            if (disqualifiziert[idx_daten]):
+                bewertungen += [None]
+            else:
+                bewertungen += [gesamtwert]
+
             ausgabe.write(textzeile + '\n')
 
             if (idx < 10):
@@ -212,6 +436,9 @@ def Bewerte_Ergebnisse(einstellungen):
 
     print('')
     os.chdir(aktueller_ordner)
+    if (mit_bewertung):
+        return [indizes_beste_ergebnisse, bewertungen]
+
     return indizes_beste_ergebnisse
 
 
@@ -0,0 +1,853 @@
+# -*- coding: utf-8 -*-
+"""
+arbeitsverteilung.py   v0.1
+2023-09 Dominik Zobel
+"""
+
+# Copyright 2020-2023 Dominik Zobel.
+# All rights reserved.
+#
+# This file is part of the MPO package.
+# MPO is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# MPO is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with MPO. If not, see <http://www.gnu.org/licenses/>.
+
+
+# -------------------------------------------------------------------------------------------------
+def _Cgroup_CPU_Grenze():
+    """Lies die CPU-Quote der cgroup des aktuellen Prozesses (cgroup v2 oder v1) aus, wie sie bspw.
+    in Containern gesetzt wird. Gibt die (aufgerundete) Anzahl an nutzbaren CPUs zurueck oder None,
+    falls keine Quote gesetzt ist oder sie nicht ermittelt werden kann.
+    """
+    try:
+        with open('/sys/fs/cgroup/cpu.max', 'r', encoding='utf-8') as eingabe:
+            quote, periode = eingabe.read().split()[:2]
+
+        if (quote == 'max'):
+            return None
+
+        return max(1, -(-int(quote) // int(periode)))
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', 'r', encoding='utf-8') as eingabe:
+            quote = int(eingabe.read())
+
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us', 'r', encoding='utf-8') as eingabe:
+            periode = int(eingabe.read())
+    except (OSError, ValueError):
+        return None
+
+    if ((quote <= 0) or (periode <= 0)):
+        return None
+
+    return max(1, -(-quote // periode))
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Verfuegbare_CPUs():
+    """Bestimme die CPUs, auf denen der aktuelle Prozess laufen darf (CPU-Affinitaet), und deren
+    nutzbare Anzahl unter Beruecksichtigung einer CPU-Quote der cgroup. Im Gegensatz zu
+    multiprocessing.cpu_count() werden so die Grenzen eines Containers beachtet. Gibt eine sortierte
+    Liste der CPUs und die nutzbare Anzahl zurueck.
+    """
+    import multiprocessing as mp
+    import os
+
+    try:
+        cpus = sorted(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = list(range(mp.cpu_count()))
+
+    anzahl = len(cpus)
+    quote = _Cgroup_CPU_Grenze()
+    if (quote is not None):
+        anzahl = min(anzahl, quote)
+
+    return [cpus, anzahl]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Anzahl_Prozesse(simulationen_je_prozess=1, anzahl_gleichzeitig=None):
+    """Bestimme die Anzahl an Arbeiterprozessen, damit insgesamt anzahl_gleichzeitig Aufgaben
+    gleichzeitig bearbeitet werden, wenn jeder Prozess simulationen_je_prozess Aufgaben bearbeitet.
+    Ohne Vorgabe wird eine CPU weniger genutzt, als verfuegbar sind (siehe Verfuegbare_CPUs).
+    """
+    if (anzahl_gleichzeitig is None):
+        anzahl_gleichzeitig = max(Verfuegbare_CPUs()[1]-1, 1)
+
+    return max(1, -(-anzahl_gleichzeitig // max(1, simulationen_je_prozess)))
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _CPU_Zuordnung(anzahl_prozesse, simulationen_je_prozess=1):
+    """Ordne jedem der anzahl_prozesse Arbeiter eigene CPUs zu (simulationen_je_prozess je
+    Arbeiter). Die erste verfuegbare CPU bleibt fuer den steuernden Prozess frei, sofern es mehr
+    als eine gibt. Reichen die CPUs nicht aus, werden sie mehrfach vergeben. Gibt eine Liste mit
+    einer Menge an CPUs je Arbeiter zurueck.
+    """
+    cpus = Verfuegbare_CPUs()[0]
+    if (len(cpus) > 1):
+        cpus = cpus[1:]
+
+    return [set([cpus[(idx_prozess*simulationen_je_prozess + idx) % len(cpus)]
+        for idx in range(simulationen_je_prozess)]) for idx_prozess in range(anzahl_prozesse)]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Freier_Speicher():
+    """Gibt den verfuegbaren Arbeitsspeicher in MB zurueck (MemAvailable aus /proc/meminfo) oder
+    None, falls er nicht ermittelt werden kann.
+    """
+    try:
+        with open('/proc/meminfo', 'r', encoding='utf-8') as eingabe:
+            for zeile in eingabe:
+                if (zeile.startswith('MemAvailable:')):
+                    return int(zeile.split()[1])/1024.0
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return None
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Ressourcen_Ueberschritten(max_last=None, min_speicher=None):
+    """Pruefe, ob die Systemlast (Mittelwert der letzten Minute) max_last ueberschreitet oder der
+    freie Arbeitsspeicher (in MB) min_speicher unterschreitet. Nicht ermittelbare Werte werden
+    ignoriert. Gibt eine Beschreibung der ueberschrittenen Grenze zurueck oder None.
+    """
+    import os
+
+    if (max_last is not None):
+        try:
+            last = os.getloadavg()[0]
+        except (AttributeError, OSError):
+            last = None
+
+        if ((last is not None) and (last > max_last)):
+            return 'Systemlast ' + '{:.2f}'.format(last) + ' > ' + str(max_last)
+
+    if (min_speicher is not None):
+        speicher = _Freier_Speicher()
+        if ((speicher is not None) and (speicher < min_speicher)):
+            return 'freier Speicher ' + '{:.0f}'.format(speicher) + ' MB < ' + str(min_speicher) + ' MB'
+
+    return None
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Aufgabe_Bearbeiten(verbindung, sendesperre, kontexte, aufgabe):
+    """Bearbeite eine einzelne aufgabe (kennung, idx_aufgabe, eintrag) mit der Funktion aus den
+    hinterlegten kontexten und schicke das Ergebnis ueber verbindung zurueck. Vor dem Start wird
+    die Aufgabe gemeldet, damit bei einem Absturz bekannt ist, welche Aufgaben gerade liefen.
+    """
+    kennung, idx_aufgabe, eintrag = aufgabe
+    with sendesperre:
+        verbindung.send(('start', kennung, idx_aufgabe))
+
+    funktion, daten = kontexte[kennung][:2]
+    try:
+        ergebnis = funktion(daten, idx_aufgabe, eintrag)
+    except Exception as e:
+        print('# Fehler: Aufgabe ' + str(idx_aufgabe) + ' fehlgeschlagen (' + str(e) + ')')
+        ergebnis = None
+
+    with sendesperre:
+        verbindung.send(('ergebnis', kennung, idx_aufgabe, ergebnis))
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Stapel_Bearbeiten(verbindung, sendesperre, kontexte, aufgaben):
+    """Bearbeite mehrere aufgaben mit gleicher Kennung gemeinsam mit der Stapelfunktion aus den
+    hinterlegten kontexten, die als stapelfunktion(daten, [(idx_aufgabe, eintrag), ...]) aufgerufen
+    wird und eine Liste mit einem Ergebnis je Aufgabe zurueckgibt. Alle Aufgaben werden vorab als
+    gestartet gemeldet, die Ergebnisse einzeln zurueckgeschickt.
+    """
+    kennung = aufgaben[0][0]
+    with sendesperre:
+        for aufgabe in aufgaben:
+            verbindung.send(('start', kennung, aufgabe[1]))
+
+    daten, stapelfunktion = kontexte[kennung][1:3]
+    try:
+        ergebnisse = stapelfunktion(daten, [tuple(aufgabe[1:]) for aufgabe in aufgaben])
+    except Exception as e:
+        print('# Fehler: Stapel ab Aufgabe ' + str(aufgaben[0][1]) + ' fehlgeschlagen (' + str(e) + ')')
+        ergebnisse = [None for aufgabe in aufgaben]
+
+    with sendesperre:
+        for aufgabe, ergebnis in zip(aufgaben, ergebnisse):
+            verbindung.send(('ergebnis', kennung, aufgabe[1], ergebnis))
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Arbeitseinheiten(kontexte, paket, simulationen_je_prozess=1):
+    """Teile die Aufgaben aus paket in Arbeitseinheiten auf. Fuer Kennungen mit Stapelfunktion
+    werden aufeinanderfolgende Aufgaben zu Stapeln zusammengefasst, die hoechstens die hinterlegte
+    Stapelgroesse erreichen und so gross sind, dass alle simulationen_je_prozess Threads beschaeftigt
+    bleiben. Alle anderen Aufgaben bilden eine eigene Arbeitseinheit. Gibt eine Liste mit Listen
+    von Aufgaben zurueck.
+    """
+    gruppen = dict()
+    for aufgabe in paket:
+        gruppen.setdefault(aufgabe[0], []).append(aufgabe)
+
+    arbeitseinheiten = []
+    for kennung, aufgaben in gruppen.items():
+        funktion, daten, stapelfunktion, stapelgroesse = kontexte[kennung]
+        if ((stapelfunktion is None) or (stapelgroesse < 2)):
+            arbeitseinheiten += [[aufgabe] for aufgabe in aufgaben]
+            continue
+
+        num_stapel = min(stapelgroesse, -(-len(aufgaben) // simulationen_je_prozess))
+        arbeitseinheiten += [aufgaben[idx:idx+num_stapel] for idx in range(0, len(aufgaben), num_stapel)]
+
+    return arbeitseinheiten
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Arbeitseinheit_Bearbeiten(verbindung, sendesperre, kontexte, arbeitseinheit):
+    """Bearbeite eine arbeitseinheit (Liste von Aufgaben) entweder als Stapel oder als einzelne Aufgabe.
+    """
+    if (len(arbeitseinheit) > 1):
+        _Stapel_Bearbeiten(verbindung=verbindung, sendesperre=sendesperre, kontexte=kontexte,
+            aufgaben=arbeitseinheit)
+    else:
+        _Aufgabe_Bearbeiten(verbindung=verbindung, sendesperre=sendesperre, kontexte=kontexte,
+            aufgabe=arbeitseinheit[0])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Arbeiterprozess(verbindung, simulationen_je_prozess=1, kontext_anpassen=None, cpus=None):
+    """Schleife eines Arbeiterprozesses. Ueber verbindung werden Kontexte (Funktion und zugehoerige
+    Daten je Kennung) und Pakete mit Aufgaben empfangen. Fuer jede Aufgabe wird das Ergebnis
+    einzeln zurueckgeschickt, damit bei einem Absturz nur die aktuelle Aufgabe verloren geht.
+    Mit simulationen_je_prozess > 1 werden die Aufgaben (oder Stapel) eines Pakets von entsprechend
+    vielen Threads gleichzeitig bearbeitet. Das lohnt sich, da die Arbeiter die meiste Zeit auf die
+    gestarteten Berechnungsprogramme warten. Optional werden die Daten jedes Kontexts nach dem
+    Empfang mit kontext_anpassen(daten) angepasst (bspw. lokale Pfade bei entfernten Arbeitern).
+    Mit cpus (Menge an CPUs) wird der Prozess an diese CPUs gebunden. Die Bindung wird an die
+    gestarteten Berechnungsprogramme vererbt. Wird der Arbeiter unterbrochen (Strg+C oder SIGTERM),
+    werden alle noch laufenden Berechnungsprogramme beendet (siehe Laufende_Programme_Beenden) und
+    nicht begonnene Aufgaben verworfen.
+    """
+    import os
+    import signal
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from .programmsteuerung import Laufende_Programme_Beenden
+
+    if (cpus is not None):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except (AttributeError, OSError) as e:
+            print('# Warnung: Bindung an CPU(s) ' + str(sorted(cpus)) + ' nicht moeglich (' + str(e) + ')')
+
+    # Ohne eigene Behandlung beendet SIGTERM (bspw. von Arbeiterpool_Beenden oder einem
+    # Batch-System) den Prozess sofort und die Berechnungsprogramme wuerden weiterlaufen
+    def _Beenden_Signal(signalnummer, rahmen):
+        raise KeyboardInterrupt
+
+    try:
+        signal.signal(signal.SIGTERM, _Beenden_Signal)
+    except ValueError:
+        # Nur im Haupt-Thread moeglich
+        pass
+
+    kontexte = dict()
+    sendesperre = threading.Lock()
+    threadpool = None
+    if (simulationen_je_prozess > 1):
+        threadpool = ThreadPoolExecutor(max_workers=simulationen_je_prozess)
+
+    try:
+        while True:
+            try:
+                nachricht = verbindung.recv()
+            except (EOFError, OSError):
+                break
+
+            if (nachricht[0] == 'kontext'):
+                kennung = nachricht[1]
+                kontext = list(nachricht[2:])
+                if (kontext_anpassen is not None):
+                    kontext[1] = kontext_anpassen(kontext[1])
+
+                kontexte.update([(kennung, kontext)])
+            elif (nachricht[0] == 'pakete'):
+                arbeitseinheiten = _Arbeitseinheiten(kontexte=kontexte, paket=nachricht[1],
+                    simulationen_je_prozess=simulationen_je_prozess)
+                if (threadpool is None):
+                    for arbeitseinheit in arbeitseinheiten:
+                        _Arbeitseinheit_Bearbeiten(verbindung=verbindung, sendesperre=sendesperre,
+                            kontexte=kontexte, arbeitseinheit=arbeitseinheit)
+                else:
+                    bearbeitungen = [threadpool.submit(_Arbeitseinheit_Bearbeiten, verbindung, sendesperre,
+                        kontexte, arbeitseinheit) for arbeitseinheit in arbeitseinheiten]
+                    for bearbeitung in bearbeitungen:
+                        bearbeitung.result()
+
+                with sendesperre:
+                    verbindung.send(('fertig', ))
+            else:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Die Berechnungsprogramme laufen in einer eigenen Sitzung und werden daher nicht automatisch
+        # mit dem Arbeiter beendet
+        Laufende_Programme_Beenden()
+        if (threadpool is not None):
+            threadpool.shutdown(cancel_futures=True)
+
+    verbindung.close()
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Arbeiter_Hinzufuegen(pool, idx_arbeiter=None):
+    """Starte einen neuen Arbeiterprozess und uebertrage alle bisher im pool hinterlegten Kontexte.
+    Falls idx_arbeiter uebergeben wird, ersetzt der neue Prozess den Arbeiter an dieser Stelle (und
+    wird ggfs. an die gleichen CPUs gebunden).
+    """
+    import multiprocessing as mp
+
+    cpus = None
+    if (pool['cpu_zuordnung'] is not None):
+        if (idx_arbeiter is None):
+            cpus = pool['cpu_zuordnung'][len(pool['prozesse']) % len(pool['cpu_zuordnung'])]
+        else:
+            cpus = pool['cpu_zuordnung'][idx_arbeiter % len(pool['cpu_zuordnung'])]
+
+    verbindung, verbindung_arbeiter = mp.Pipe()
+    prozess = mp.Process(target=_Arbeiterprozess, args=(verbindung_arbeiter,
+        pool['simulationen_je_prozess'], None, cpus), daemon=True)
+    prozess.start()
+    verbindung_arbeiter.close()
+
+    for kennung, kontext in pool['kontexte'].items():
+        verbindung.send(('kontext', kennung, *kontext))
+
+    if (idx_arbeiter is None):
+        pool['prozesse'] += [prozess]
+        pool['verbindungen'] += [verbindung]
+        pool['offen'] += [[]]
+        pool['laufend'] += [[]]
+    else:
+        pool['prozesse'][idx_arbeiter] = prozess
+        pool['verbindungen'][idx_arbeiter] = verbindung
+        pool['offen'][idx_arbeiter] = []
+        pool['laufend'][idx_arbeiter] = []
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Adresse_Einlesen(adresse):
+    """Wandle adresse im Format host:port in ein Tupel fuer multiprocessing.connection um. Gibt das
+    Tupel zurueck oder None, falls adresse ungueltig ist.
+    """
+    host, trenner, port = adresse.rpartition(':')
+    if (trenner == ''):
+        return None
+
+    try:
+        return (host, int(port))
+    except ValueError:
+        return None
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Verbindungen_Annehmen(listener, neue_verbindungen, signal):
+    """Nimm in einem eigenen Thread Verbindungen entfernter Arbeiter am listener an. Jede
+    (authentifizierte) Verbindung wird in die Warteschlange neue_verbindungen gelegt und ueber signal
+    gemeldet, damit Arbeiterpool_Abarbeiten sie auch waehrend eines Durchlaufs aufnehmen kann.
+    """
+    import multiprocessing as mp
+
+    while True:
+        try:
+            verbindung = listener.accept()
+        except (mp.AuthenticationError, EOFError, ConnectionError) as e:
+            print('# Warnung: Verbindung eines entfernten Arbeiters abgelehnt (' + str(e) + ')')
+            continue
+        except OSError:
+            # Listener wurde geschlossen
+            break
+
+        neue_verbindungen.put((verbindung, listener.last_accepted))
+        try:
+            signal.send(None)
+        except OSError:
+            break
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Neue_Arbeiter_Aufnehmen(pool):
+    """Nimm alle seit dem letzten Aufruf verbundenen entfernten Arbeiter in den pool auf und
+    uebertrage ihnen alle hinterlegten Kontexte. Entfernte Arbeiter haben keinen lokalen Prozess
+    (Eintrag None in pool['prozesse']).
+    """
+    import queue
+
+    if (pool['listener'] is None):
+        return
+
+    while (pool['signal'].poll()):
+        pool['signal'].recv()
+
+    while True:
+        try:
+            verbindung, adresse = pool['neue_verbindungen'].get_nowait()
+        except queue.Empty:
+            break
+
+        try:
+            for kennung, kontext in pool['kontexte'].items():
+                verbindung.send(('kontext', kennung, *kontext))
+        except (EOFError, OSError):
+            verbindung.close()
+            continue
+
+        print('# Entfernter Arbeiter verbunden: ' + str(adresse))
+        pool['prozesse'] += [None]
+        pool['verbindungen'] += [verbindung]
+        pool['offen'] += [[]]
+        pool['laufend'] += [[]]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Entfernter_Arbeiterprozess(adresse, authkey, simulationen_je_prozess=1, kontext_anpassen=None,
+    cpus=None, max_wartezeit=300):
+    """Verbinde einen Arbeiterprozess mit dem Pool unter adresse (host, port) und bearbeite die
+    empfangenen Aufgaben wie ein lokaler Arbeiter (siehe _Arbeiterprozess). Ist der Pool noch nicht
+    erreichbar, wird bis zu max_wartezeit Sekunden lang erneut versucht, sich zu verbinden.
+    """
+    import multiprocessing as mp
+    import time
+    from multiprocessing.connection import Client
+
+    startzeit = time.time()
+    while True:
+        try:
+            verbindung = Client(adresse, authkey=authkey)
+            break
+        except mp.AuthenticationError:
+            print('# Abbruch: Authentifizierung bei ' + str(adresse) + ' fehlgeschlagen')
+            return
+        except OSError:
+            if (time.time()-startzeit > max_wartezeit):
+                print('# Abbruch: Keine Verbindung zu ' + str(adresse) + ' moeglich')
+                return
+
+            time.sleep(2.0)
+
+    _Arbeiterprozess(verbindung=verbindung, simulationen_je_prozess=simulationen_je_prozess,
+        kontext_anpassen=kontext_anpassen, cpus=cpus)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Entfernte_Arbeiter_Starten(adresse, authkey, anzahl_prozesse=None, simulationen_je_prozess=1,
+    kontext_anpassen=None, cpu_bindung=False):
+    """Starte anzahl_prozesse Arbeiterprozesse, die sich jeweils einzeln mit dem Pool unter adresse
+    (host, port) verbinden, der mit Arbeiterpool_Starten und gleichem authkey gestartet wurde. Ohne
+    Vorgabe wird die Anzahl an Prozessen wie bei Arbeiterpool_Starten gewaehlt, ebenso die Bindung
+    an CPUs mit cpu_bindung=True. Die Funktion kehrt zurueck, sobald alle Arbeiter beendet sind
+    (d.h. der Pool beendet wurde).
+    """
+    import multiprocessing as mp
+
+    simulationen_je_prozess = max(1, simulationen_je_prozess)
+    if (anzahl_prozesse is None):
+        anzahl_prozesse = Anzahl_Prozesse(simulationen_je_prozess=simulationen_je_prozess)
+
+    cpu_zuordnung = [None for idx_prozess in range(anzahl_prozesse)]
+    if (cpu_bindung):
+        cpu_zuordnung = _CPU_Zuordnung(anzahl_prozesse=anzahl_prozesse,
+            simulationen_je_prozess=simulationen_je_prozess)
+
+    prozesse = [mp.Process(target=_Entfernter_Arbeiterprozess, args=(adresse, authkey,
+        simulationen_je_prozess, kontext_anpassen, cpu_zuordnung[idx_prozess]))
+        for idx_prozess in range(anzahl_prozesse)]
+    for prozess in prozesse:
+        prozess.start()
+
+    print('# ' + str(anzahl_prozesse) + ' Arbeiterprozess(e) fuer ' + str(adresse) + ' gestartet')
+    try:
+        for prozess in prozesse:
+            prozess.join()
+    except KeyboardInterrupt:
+        for prozess in prozesse:
+            prozess.terminate()
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Arbeiterpool_Starten(anzahl_prozesse=None, simulationen_je_prozess=1, adresse=None, authkey=None,
+    cpu_bindung=False, max_last=None, min_speicher=None):
+    """Starte einen Pool aus anzahl_prozesse Arbeiterprozessen, der fuer beliebig viele Aufrufe von
+    Arbeiterpool_Abarbeiten genutzt werden kann. Jeder Arbeiter bearbeitet bis zu
+    simulationen_je_prozess Aufgaben gleichzeitig. Ohne Vorgabe wird die Anzahl an Prozessen so
+    gewaehlt, dass insgesamt so viele Aufgaben gleichzeitig bearbeitet werden koennen, wie CPUs
+    nutzbar sind (siehe Verfuegbare_CPUs). Mit cpu_bindung=True wird jeder Arbeiter an eigene CPUs
+    gebunden. Ueberschreitet die Systemlast max_last oder unterschreitet der freie Speicher
+    min_speicher (in MB), werden keine neuen Pakete verteilt (siehe Arbeiterpool_Abarbeiten).
+    Mit adresse (host, port) werden zusaetzlich Verbindungen entfernter Arbeiter angenommen (siehe
+    Entfernte_Arbeiter_Starten), die sich mit authkey authentifizieren muessen.
+    Gibt ein dict mit den Informationen des Pools zurueck.
+    """
+    import multiprocessing as mp
+
+    simulationen_je_prozess = max(1, simulationen_je_prozess)
+    if (anzahl_prozesse is None):
+        anzahl_prozesse = Anzahl_Prozesse(simulationen_je_prozess=simulationen_je_prozess)
+
+    cpu_zuordnung = None
+    if (cpu_bindung):
+        cpu_zuordnung = _CPU_Zuordnung(anzahl_prozesse=anzahl_prozesse,
+            simulationen_je_prozess=simulationen_je_prozess)
+
+    pool = dict([('prozesse', []), ('verbindungen', []), ('offen', []), ('laufend', []),
+        ('kontexte', dict()), ('simulationen_je_prozess', simulationen_je_prozess), ('listener', None),
+        ('cpu_zuordnung', cpu_zuordnung), ('max_last', max_last), ('min_speicher', min_speicher)])
+    for idx_prozess in range(anzahl_prozesse):
+        _Arbeiter_Hinzufuegen(pool=pool)
+
+    if (adresse is not None):
+        import queue
+        import threading
+        from multiprocessing.connection import Listener
+
+        signal, signal_thread = mp.Pipe(duplex=False)
+        pool.update([('listener', Listener(adresse, authkey=authkey)), ('signal', signal),
+            ('signal_thread', signal_thread), ('neue_verbindungen', queue.Queue())])
+        threading.Thread(target=_Verbindungen_Annehmen, args=(pool['listener'], pool['neue_verbindungen'],
+            signal_thread), daemon=True).start()
+        print('# Warte auf entfernte Arbeiter unter ' + str(adresse))
+
+    return pool
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Arbeiterpool_Kontext_Setzen(pool, kennung, funktion, daten, stapelfunktion=None, stapelgroesse=1):
+    """Hinterlege fuer alle Arbeiter im pool unter kennung die funktion, die fuer jede Aufgabe mit
+    dieser Kennung als funktion(daten, idx_aufgabe, eintrag) aufgerufen wird. Die (ggfs. grossen)
+    daten werden dadurch nur einmal je Arbeiter uebertragen und nicht mit jeder Aufgabe.
+    Optional kann eine stapelfunktion hinterlegt werden, der bis zu stapelgroesse Aufgaben
+    gemeinsam uebergeben werden (siehe _Stapel_Bearbeiten).
+    """
+    kontext = [funktion, daten, stapelfunktion, stapelgroesse]
+    pool['kontexte'].update([(kennung, kontext)])
+    for verbindung in pool['verbindungen']:
+        if (verbindung is None):
+            continue
+
+        # Ein getrennter entfernter Arbeiter wird erst beim Abarbeiten entfernt
+        try:
+            verbindung.send(('kontext', kennung, *kontext))
+        except (EOFError, OSError):
+            pass
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Arbeiterpool_Groesse(pool):
+    """Gib zurueck, wie viele Aufgaben die (lokalen und bereits verbundenen entfernten) Arbeiter im
+    pool gleichzeitig bearbeiten koennen.
+    """
+    _Neue_Arbeiter_Aufnehmen(pool=pool)
+    anzahl_arbeiter = len([verbindung for verbindung in pool['verbindungen'] if (verbindung is not None)])
+    return max(1, anzahl_arbeiter*pool['simulationen_je_prozess'])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Paketgroesse(num_verbleibend, num_arbeiter, paketgroesse=0, simulationen_je_prozess=1,
+    stapelgroesse=1):
+    """Bestimme die Anzahl an Aufgaben fuer das naechste Paket. Bei einer paketgroesse von Null
+    werden die Pakete mit abnehmender Anzahl verbleibender Aufgaben kleiner (guided scheduling),
+    sodass sich gegen Ende eines Durchlaufs langsame Aufgaben nicht auf einzelne Arbeiter haeufen.
+    Ein Paket umfasst dabei mindestens so viele Aufgaben, wie ein Arbeiter gleichzeitig bearbeitet
+    (bei Stapeln jeweils mit stapelgroesse Aufgaben).
+    """
+    if (paketgroesse > 0):
+        return paketgroesse
+
+    gleichzeitig = simulationen_je_prozess*max(1, stapelgroesse)
+    return max(gleichzeitig, min(32*gleichzeitig, num_verbleibend // (4*num_arbeiter)))
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Warteschlange_Erstellen(aufgaben, anzahl_aufgaben=None):
+    """Erstelle eine Warteschlange fuer die aufgaben, die als Liste oder (bei sehr vielen Aufgaben)
+    als Iterator uebergeben werden koennen. Aus einem Iterator werden die Aufgaben erst bei Bedarf
+    entnommen, anzahl_aufgaben ist dann die (geschaetzte) Anzahl fuer die Bestimmung der
+    Paketgroesse. Zurueckgelegte Aufgaben werden vor allen anderen erneut verteilt.
+    """
+    from collections import deque
+
+    if (isinstance(aufgaben, list)):
+        return dict([('zurueckgelegt', deque(aufgaben)), ('quelle', None), ('verbleibend', 0)])
+
+    if (anzahl_aufgaben is None):
+        anzahl_aufgaben = 0
+
+    return dict([('zurueckgelegt', deque()), ('quelle', iter(aufgaben)), ('verbleibend', anzahl_aufgaben)])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Warteschlange_Leer(warteschlange):
+    """Gib zurueck, ob die warteschlange keine Aufgaben mehr enthaelt. Bei einem Iterator wird dazu
+    ggfs. die naechste Aufgabe vorab entnommen.
+    """
+    if (len(warteschlange['zurueckgelegt']) > 0):
+        return False
+
+    if (warteschlange['quelle'] is None):
+        return True
+
+    try:
+        warteschlange['zurueckgelegt'].append(next(warteschlange['quelle']))
+    except StopIteration:
+        warteschlange['quelle'] = None
+        warteschlange['verbleibend'] = 0
+        return True
+
+    warteschlange['verbleibend'] = max(0, warteschlange['verbleibend']-1)
+    return False
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Warteschlange_Laenge(warteschlange):
+    """Gib die (bei einem Iterator geschaetzte) Anzahl verbleibender Aufgaben der warteschlange zurueck.
+    """
+    if (_Warteschlange_Leer(warteschlange=warteschlange)):
+        return 0
+
+    return len(warteschlange['zurueckgelegt']) + warteschlange['verbleibend']
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Warteschlange_Entnehmen(warteschlange, anzahl):
+    """Entnimm bis zu anzahl Aufgaben aus der warteschlange und gib sie als Liste zurueck.
+    """
+    paket = []
+    while ((len(paket) < anzahl) and (not _Warteschlange_Leer(warteschlange=warteschlange))):
+        paket += [warteschlange['zurueckgelegt'].popleft()]
+
+    return paket
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Arbeiterpool_Abarbeiten(pool, aufgaben, ergebnisfunktion, paketgroesse=0, anzahl_aufgaben=None):
+    """Verteile die aufgaben (Liste aus Tupeln mit kennung, idx_aufgabe und eintrag oder ein Iterator
+    mit ungefaehr anzahl_aufgaben solcher Tupel, siehe _Warteschlange_Erstellen) aus einer
+    gemeinsamen Warteschlange in kleinen Paketen an alle freien Arbeiter im pool. Fuer jedes
+    Ergebnis wird ergebnisfunktion(kennung, idx_aufgabe, ergebnis) aufgerufen. Stirbt ein Arbeiter,
+    wird fuer seine gerade laufenden Aufgaben None als ergebnis gemeldet, die restlichen Aufgaben
+    seines Pakets werden neu verteilt und der Arbeiter wird ersetzt. Trennt sich ein entfernter
+    Arbeiter, werden auch seine laufenden Aufgaben (einmalig) neu verteilt. Neu verbundene entfernte
+    Arbeiter werden auch waehrend des Durchlaufs aufgenommen. Solange die Grenzen fuer Systemlast
+    oder freien Speicher des pool ueberschritten sind, werden keine neuen Pakete verteilt (ausser an
+    einen Arbeiter, falls gerade keiner beschaeftigt ist).
+    """
+    import time
+    from multiprocessing.connection import wait
+
+    warteschlange = _Warteschlange_Erstellen(aufgaben=aufgaben, anzahl_aufgaben=anzahl_aufgaben)
+    stapelgroesse = max([1] + [kontext[3] for kontext in pool['kontexte'].values()
+        if (kontext[2] is not None)])
+    frei = []
+    neu_verteilt = set()
+    pruefen = (pool['max_last'] is not None) or (pool['min_speicher'] is not None)
+    gedrosselt = None
+    letzte_pruefung = 0.0
+
+    while True:
+        _Neue_Arbeiter_Aufnehmen(pool=pool)
+        verbindungen = pool['verbindungen']
+        frei += [True for x in range(len(verbindungen)-len(frei))]
+        aktiv = [idx for idx in range(len(verbindungen)) if (verbindungen[idx] is not None)]
+        num_beschaeftigt = len([idx for idx in aktiv if (not frei[idx])])
+
+        # Die Ressourcen werden hoechstens einmal je Sekunde geprueft
+        if (pruefen and (not _Warteschlange_Leer(warteschlange=warteschlange)) and (time.time()-letzte_pruefung >= 1.0)):
+            letzte_pruefung = time.time()
+            grund = Ressourcen_Ueberschritten(max_last=pool['max_last'], min_speicher=pool['min_speicher'])
+            if ((grund is not None) and (gedrosselt is None)):
+                print('# Warnung: Verteilung neuer Aufgaben pausiert (' + grund + ')')
+            elif ((grund is None) and (gedrosselt is not None)):
+                print('# Verteilung neuer Aufgaben wird fortgesetzt')
+
+            gedrosselt = grund
+
+        for idx_arbeiter in aktiv:
+            if ((not frei[idx_arbeiter]) or _Warteschlange_Leer(warteschlange=warteschlange)):
+                continue
+
+            if ((gedrosselt is not None) and (num_beschaeftigt > 0)):
+                break
+
+            num_beschaeftigt += 1
+
+            num_paket = _Paketgroesse(num_verbleibend=_Warteschlange_Laenge(warteschlange=warteschlange),
+                num_arbeiter=len(aktiv), paketgroesse=paketgroesse,
+                simulationen_je_prozess=pool['simulationen_je_prozess'], stapelgroesse=stapelgroesse)
+            paket = _Warteschlange_Entnehmen(warteschlange=warteschlange, anzahl=num_paket)
+            pool['offen'][idx_arbeiter] = paket
+            pool['laufend'][idx_arbeiter] = []
+            try:
+                verbindungen[idx_arbeiter].send(('pakete', paket))
+            except (EOFError, OSError):
+                # Wird beim Empfangen als abgestuerzt erkannt
+                pass
+
+            frei[idx_arbeiter] = False
+
+        beschaeftigt = [idx for idx in aktiv if (not frei[idx])]
+        if (len(beschaeftigt) == 0):
+            if (_Warteschlange_Leer(warteschlange=warteschlange) or (pool['listener'] is None)):
+                break
+
+            if (len(aktiv) == 0):
+                print('# Warte auf entfernte Arbeiter fuer ' + str(_Warteschlange_Laenge(warteschlange=warteschlange)) \
+                    + ' Aufgabe(n)')
+
+        prozesse = pool['prozesse']
+        sentinels = [prozesse[idx].sentinel for idx in beschaeftigt if (prozesse[idx] is not None)]
+        signal = []
+        if (pool['listener'] is not None):
+            signal = [pool['signal']]
+
+        wartezeit = None
+        if ((gedrosselt is not None) and (not _Warteschlange_Leer(warteschlange=warteschlange))):
+            wartezeit = 1.0
+
+        bereit = wait([verbindungen[idx] for idx in beschaeftigt] + sentinels + signal, timeout=wartezeit)
+
+        for idx_arbeiter in beschaeftigt:
+            verbindung = verbindungen[idx_arbeiter]
+            prozess = prozesse[idx_arbeiter]
+            if ((verbindung not in bereit) and ((prozess is None) or (prozess.sentinel not in bereit))):
+                continue
+
+            abgestuerzt = False
+            try:
+                while (verbindung.poll()):
+                    nachricht = verbindung.recv()
+                    if (nachricht[0] == 'start'):
+                        pool['laufend'][idx_arbeiter] += [tuple(nachricht[1:])]
+                    elif (nachricht[0] == 'ergebnis'):
+                        kennung, idx_aufgabe, ergebnis = nachricht[1:]
+                        pool['offen'][idx_arbeiter] = [aufgabe for aufgabe in pool['offen'][idx_arbeiter]
+                            if ((aufgabe[0] != kennung) or (aufgabe[1] != idx_aufgabe))]
+                        pool['laufend'][idx_arbeiter].remove((kennung, idx_aufgabe))
+                        ergebnisfunktion(kennung, idx_aufgabe, ergebnis)
+                    elif (nachricht[0] == 'fertig'):
+                        frei[idx_arbeiter] = True
+                        break
+            except (EOFError, OSError):
+                abgestuerzt = True
+
+            if (frei[idx_arbeiter] or ((not abgestuerzt) and ((prozess is None) or prozess.is_alive()))):
+                continue
+
+            laufend = pool['laufend'][idx_arbeiter]
+            if (prozess is None):
+                # Bei entfernten Arbeitern ist meist die Verbindung die Ursache, daher werden auch die
+                # laufenden Aufgaben neu verteilt. Nur bei wiederholtem Abbruch gelten sie als verloren
+                verloren = [aufgabe for aufgabe in laufend if (aufgabe in neu_verteilt)]
+                neu_verteilt.update(laufend)
+                offen = [aufgabe for aufgabe in pool['offen'][idx_arbeiter] if (tuple(aufgabe[:2]) not in verloren)]
+                print('# Warnung: Entfernter Arbeiter ' + str(idx_arbeiter) + ' getrennt, ' \
+                    + str(len(offen)) + ' Aufgabe(n) werden neu verteilt')
+            else:
+                # Nur die gerade laufenden Aufgaben gehen verloren, der Rest wird neu verteilt
+                verloren = laufend
+                offen = [aufgabe for aufgabe in pool['offen'][idx_arbeiter] if (tuple(aufgabe[:2]) not in laufend)]
+                print('# Warnung: Arbeiterprozess ' + str(idx_arbeiter) + ' beendet, ' \
+                    + str(len(offen)) + ' Aufgabe(n) werden neu verteilt')
+
+            for kennung, idx_aufgabe in verloren:
+                ergebnisfunktion(kennung, idx_aufgabe, None)
+
+            warteschlange['zurueckgelegt'].extendleft(reversed(offen))
+            verbindung.close()
+            frei[idx_arbeiter] = True
+            if (prozess is None):
+                pool['verbindungen'][idx_arbeiter] = None
+                pool['offen'][idx_arbeiter] = []
+                pool['laufend'][idx_arbeiter] = []
+            else:
+                prozess.join(timeout=1)
+                _Arbeiter_Hinzufuegen(pool=pool, idx_arbeiter=idx_arbeiter)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Arbeiterpool_Beenden(pool):
+    """Beende alle Arbeiterprozesse im pool. Verbundene entfernte Arbeiter werden ebenfalls beendet.
+    Arbeiter, die sich nicht innerhalb von 5 Sekunden beenden, erhalten SIGTERM und beenden dabei
+    ihre laufenden Berechnungsprogramme (siehe _Arbeiterprozess).
+    """
+    if (pool['listener'] is not None):
+        pool['listener'].close()
+        pool['signal'].close()
+        pool['listener'] = None
+
+    verbindungen = [verbindung for verbindung in pool['verbindungen'] if (verbindung is not None)]
+    for verbindung in verbindungen:
+        try:
+            verbindung.send(('ende', ))
+        except (EOFError, OSError):
+            pass
+
+    for prozess in pool['prozesse']:
+        if (prozess is None):
+            continue
+
+        prozess.join(timeout=5)
+        if (prozess.is_alive()):
+            # Der Arbeiter beendet bei SIGTERM noch seine laufenden Berechnungsprogramme
+            prozess.terminate()
+            prozess.join(timeout=5)
+            if (prozess.is_alive()):
+                prozess.kill()
+                prozess.join()
+
+    for verbindung in verbindungen:
+        verbindung.close()
+
+    pool['prozesse'] = []
+    pool['verbindungen'] = []
+    pool['offen'] = []
+    pool['laufend'] = []
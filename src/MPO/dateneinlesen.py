@@ -59,11 +59,19 @@ def Datei_Schreiben(dateiname, inhalt):
 
 
 # -------------------------------------------------------------------------------------------------
-def Referenzdaten_Laden(einstellungen, str_versuch):
+def Referenzdaten_Laden(einstellungen, str_versuch, referenzdateien=None):
     from .hilfen import ZugriffEintrag
 
     refeintrag = einstellungen['Versuchsablauf'][str_versuch]['Referenzdaten']
-    daten = JSONDateiEinlesen(dateiname=refeintrag['Datei'])
+    # Mit referenzdateien (dict) wird jede Referenzdatei nur einmal eingelesen
+    if (referenzdateien is None):
+        daten = JSONDateiEinlesen(dateiname=refeintrag['Datei'])
+    else:
+        if (refeintrag['Datei'] not in referenzdateien):
+            referenzdateien[refeintrag['Datei']] = JSONDateiEinlesen(dateiname=refeintrag['Datei'])
+
+        daten = referenzdateien[refeintrag['Datei']]
+
     inhalt = []
     for datenfeld in refeintrag['Daten']:
         temp_inhalt = ZugriffEintrag(daten=daten, zieleintrag=datenfeld)
@@ -77,6 +85,60 @@ def Referenzdaten_Laden(einstellungen, str_versuch):
 
 
 
+# -------------------------------------------------------------------------------------------------
+def Referenzcache_Oeffnen(dateiname=None):
+    """Oeffne den Zwischenspeicher fuer aufbereitete Referenzdaten. Ist dateiname angegeben, werden
+    die darin (binaer mit pickle) gespeicherten Eintraege geladen. Ein ungueltiger oder fehlender
+    Zwischenspeicher wird ignoriert. Gibt ein dict mit allen Informationen des Zwischenspeichers
+    zurueck, das auch ohne Datei zum einmaligen Einlesen jeder Referenzdatei genutzt wird.
+    """
+    import pickle
+
+    eintraege = dict()
+    if ((dateiname is not None) and Existenz_Datei(dateiname=dateiname)):
+        try:
+            with open(dateiname, 'rb') as eingabe:
+                eintraege = pickle.load(eingabe)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            print('# Warnung: Referenzcache ' + dateiname + ' konnte nicht gelesen werden und wird neu erstellt')
+            eintraege = dict()
+
+        if (not isinstance(eintraege, dict)):
+            eintraege = dict()
+
+    return dict([('dateiname', dateiname), ('eintraege', eintraege), ('genutzt', set()),
+        ('geaendert', False), ('referenzdateien', dict()), ('dateikennungen', dict())])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Referenzcache_Schliessen(referenzcache):
+    """Speichere den referenzcache (siehe Referenzcache_Oeffnen), falls eine Datei angegeben ist und
+    sich die Eintraege geaendert haben. Dabei werden nur die in diesem Durchlauf genutzten Eintraege
+    behalten.
+    """
+    import os
+    import pickle
+
+    dateiname = referenzcache['dateiname']
+    if (dateiname is None):
+        return
+
+    eintraege = referenzcache['eintraege']
+    if ((not referenzcache['geaendert']) and (set(eintraege.keys()) == referenzcache['genutzt'])):
+        return
+
+    eintraege = dict([(kennung, eintraege[kennung]) for kennung in referenzcache['genutzt']])
+    try:
+        with open(dateiname + '.tmp', 'wb') as ausgabe:
+            pickle.dump(eintraege, ausgabe, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(dateiname + '.tmp', dateiname)
+    except OSError:
+        print('# Warnung: Referenzcache ' + dateiname + ' konnte nicht gespeichert werden')
+
+
+
 # -------------------------------------------------------------------------------------------------
 def Variationsdatei_Laden(dateiname):
     datenzeilen = []
@@ -170,6 +232,202 @@ def CSV_Ergebnisse_Einlesen(dateiname):
 
 
 
+# -------------------------------------------------------------------------------------------------
+def _Textbloecke(dateiname=None, text=None, zeichen_je_block=65536):
+    """Gib den Inhalt der Datei dateiname (oder den uebergebenen text) in Bloecken von etwa
+    zeichen_je_block Zeichen zurueck, die jeweils nur vollstaendige Zeilen enthalten. Nur der letzte
+    Block kann ohne Zeilenumbruch enden. Die Datei wird dabei nur so weit gelesen, wie Bloecke
+    abgefragt werden.
+    """
+    if (text is not None):
+        idx_start = 0
+        while (idx_start < len(text)):
+            idx_ende = text.find('\n', idx_start + zeichen_je_block)
+            if (idx_ende == -1):
+                idx_ende = len(text)
+
+            yield text[idx_start:idx_ende+1]
+            idx_start = idx_ende+1
+
+        return
+
+    rest = ''
+    with open(dateiname, 'r', encoding='utf-8') as eingabe:
+        while True:
+            inhalt = eingabe.read(zeichen_je_block)
+            if (inhalt == ''):
+                break
+
+            inhalt = rest + inhalt
+            idx_ende = inhalt.rfind('\n')
+            if (idx_ende == -1):
+                rest = inhalt
+                continue
+
+            rest = inhalt[idx_ende+1:]
+            yield inhalt[:idx_ende+1]
+
+    if (rest != ''):
+        yield rest
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Zeilen_Einlesen(block, spaltenzahl):
+    """Lese die Zeilen aus block einzeln ein. Leere Zeilen und Zeilen, die nicht nur aus Zahlen
+    bestehen, werden uebersprungen. Ist spaltenzahl None, wird sie aus der ersten gueltigen Zeile
+    bestimmt. Zeilen mit einer anderen Anzahl an Werten (bspw. eine abgeschnittene letzte Zeile)
+    werden ebenfalls uebersprungen. Gibt die zeilenweisen Zahleneintraege, die spaltenzahl sowie die
+    Anzahl an ungueltigen und unvollstaendigen Zeilen zurueck.
+    """
+    werte = []
+    num_ungueltig = 0
+    num_unvollstaendig = 0
+    for zeile in block.splitlines():
+        eintraege = zeile.split()
+        if (len(eintraege) == 0):
+            continue
+
+        try:
+            zeilenwerte = [float(x) for x in eintraege]
+        except ValueError:
+            num_ungueltig += 1
+            continue
+
+        if (spaltenzahl is None):
+            spaltenzahl = len(zeilenwerte)
+
+        if (len(zeilenwerte) != spaltenzahl):
+            num_unvollstaendig += 1
+            continue
+
+        werte += [zeilenwerte]
+
+    return [werte, spaltenzahl, num_ungueltig, num_unvollstaendig]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def CSV_Spalten_Einlesen(dateiname=None, text=None, anzahl_spalten=None, x_bereich=None):
+    """Lese Ergebnisse im Format von CSV_Ergebnisse_Einlesen aus der Datei dateiname oder aus text
+    (bspw. der Standardausgabe eines Berechnungsprogramms) ein. Die Daten werden blockweise gelesen und mit numpy (falls
+    verfuegbar) direkt in ein Array umgewandelt. Nur die ersten anzahl_spalten Spalten werden
+    zurueckgegeben. Mit x_bereich ([x_min, x_max]) wird das Einlesen beendet, sobald die erste Spalte
+    x_max erreicht (eine weitere Zeile wird fuer die Interpolation noch uebernommen). Das geschieht
+    nur, wenn der erste x-Wert nicht groesser als x_min ist, damit bei nicht abgedeckten
+    Stuetzstellen weiterhin alle Werte eingelesen werden. Leere und nicht nur aus Zahlen bestehende
+    Zeilen werden uebersprungen, ebenso Zeilen mit abweichender Anzahl an Werten (bspw. bei
+    abgebrochener Ausgabe). Letztere und nicht endliche Werte (NaN/Inf) werden gemeldet. Gibt ein
+    numpy-Array (bzw. ohne numpy eine Liste an zeilenweisen Zahleneintraegen) zurueck oder eine leere
+    Liste, falls keine Werte vorhanden sind.
+    """
+    import io
+    import warnings
+
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    bezeichnung = 'der Standardausgabe'
+    if (dateiname is not None):
+        bezeichnung = dateiname
+
+    spaltenzahl = None
+    teilwerte = []
+    num_ungueltig = 0
+    num_unvollstaendig = 0
+    x_erster = None
+    letzte_zeile_fehlt = False
+    for block in _Textbloecke(dateiname=dateiname, text=text):
+        if ((numpy is not None) and (spaltenzahl is None)):
+            # Die Anzahl an Werten je Zeile wird aus den ersten gueltigen Zeilen bestimmt
+            spaltenzahl = _Zeilen_Einlesen(block=block[:block.find('\n', 1024)+1], spaltenzahl=None)[1]
+
+        blockwerte = None
+        if ((numpy is not None) and (spaltenzahl is not None)):
+            # Bei Zeilen mit abweichender Anzahl an Werten oder Text wird der Block zeilenweise gelesen
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    blockwerte = numpy.loadtxt(io.StringIO(block), dtype=float, comments=None, ndmin=2)
+            except ValueError:
+                blockwerte = None
+
+            if ((blockwerte is not None) and (blockwerte.size > 0) and (blockwerte.shape[1] != spaltenzahl)):
+                blockwerte = None
+
+        if (blockwerte is None):
+            blockwerte, spaltenzahl, temp_ungueltig, temp_unvollstaendig = _Zeilen_Einlesen(block=block,
+                spaltenzahl=spaltenzahl)
+            num_ungueltig += temp_ungueltig
+            num_unvollstaendig += temp_unvollstaendig
+            if (len(blockwerte) == 0):
+                continue
+
+            if (numpy is not None):
+                blockwerte = numpy.array(blockwerte, dtype=float)
+
+        if (len(blockwerte) == 0):
+            continue
+
+        if (anzahl_spalten is not None):
+            if (numpy is None):
+                blockwerte = [zeile[:anzahl_spalten] for zeile in blockwerte]
+            else:
+                blockwerte = blockwerte[:, :anzahl_spalten]
+
+        if (letzte_zeile_fehlt):
+            teilwerte += [blockwerte[:1]]
+            break
+
+        teilwerte += [blockwerte]
+        if (x_bereich is None):
+            continue
+
+        if (x_erster is None):
+            x_erster = blockwerte[0][0]
+            if (not (x_erster <= x_bereich[0])):
+                x_bereich = None
+                continue
+
+        if (numpy is None):
+            treffer = [idx for idx, zeile in enumerate(blockwerte) if (zeile[0] >= x_bereich[1])]
+        else:
+            treffer = numpy.flatnonzero(blockwerte[:, 0] >= x_bereich[1])
+
+        if (len(treffer) > 0):
+            teilwerte[-1] = blockwerte[:treffer[0]+2]
+            if (treffer[0]+2 <= len(blockwerte)):
+                break
+
+            letzte_zeile_fehlt = True
+
+    if (num_unvollstaendig > 0):
+        print('# Warnung: ' + str(num_unvollstaendig) + ' unvollstaendige Zeile(n) in ' + bezeichnung \
+            + ' uebersprungen')
+
+    if ((num_ungueltig > 0) and (dateiname is not None)):
+        print('# Warnung: ' + str(num_ungueltig) + ' ungueltige Zeile(n) in ' + bezeichnung + ' uebersprungen')
+
+    if (len(teilwerte) == 0):
+        return []
+
+    if (numpy is None):
+        werte = [zeile for blockwerte in teilwerte for zeile in blockwerte]
+        if (any([not (-float('inf') < x < float('inf')) for zeile in werte for x in zeile])):
+            print('# Warnung: Nicht endliche Werte (NaN/Inf) in ' + bezeichnung)
+
+        return werte
+
+    werte = numpy.concatenate(teilwerte)
+    if (not numpy.isfinite(werte).all()):
+        print('# Warnung: Nicht endliche Werte (NaN/Inf) in ' + bezeichnung)
+
+    return werte
+
+
+
 # -------------------------------------------------------------------------------------------------
 def Teildatei_Schreiben(neue_datei, datei, zeile_start=1, zeile_ende=1000000):
     """Lese den Inhalt aus datei von zeile_start bis zeile_ende (jeweils inklusive).
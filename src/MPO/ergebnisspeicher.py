@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+ergebnisspeicher.py   v0.1
+2023-09 Dominik Zobel
+"""
+
+# Copyright 2020-2023 Dominik Zobel.
+# All rights reserved.
+#
+# This file is part of the MPO package.
+# MPO is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# MPO is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with MPO. If not, see <http://www.gnu.org/licenses/>.
+
+
+# Anzahl an neuen Eintraegen, nach denen die Datenbank zwischengespeichert wird
+_eintraege_je_speicherung = 200
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Programmkennung(dateiname, zusatz=[]):
+    """Bestimme eine Kennung fuer das Berechnungsprogramm (oder die Bibliothek) dateiname aus dem
+    Hashwert des Dateiinhalts und den Eintraegen in zusatz (bspw. Symbol und Belastungspfad).
+    Aendert sich das Programm, aendert sich auch die Kennung und alle bisher gespeicherten
+    Ergebnisse werden nicht mehr gefunden. Gibt die Kennung als Text zurueck oder None, falls die
+    Datei nicht gelesen werden kann.
+    """
+    import hashlib
+
+    pruefsumme = hashlib.sha256()
+    try:
+        with open(dateiname, 'rb') as eingabe:
+            for block in iter(lambda: eingabe.read(1024*1024), b''):
+                pruefsumme.update(block)
+    except OSError:
+        return None
+
+    for eintrag in zusatz:
+        pruefsumme.update(b'\0' + str(eintrag).encode('utf-8'))
+
+    return pruefsumme.hexdigest()
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Ergebnisspeicher_Schluessel(programmkennung, argumente, stuetzstellen):
+    """Bestimme den Schluessel eines Ergebnisses aus der programmkennung (siehe Programmkennung),
+    allen argumente des Aufrufs (inklusive der Parameter der Variation, aber ohne Ausgabedatei) und
+    den stuetzstellen, an denen die Ergebnisse ausgewertet werden. Gibt den Schluessel als Text
+    zurueck.
+    """
+    import hashlib
+    import json
+
+    inhalt = json.dumps([programmkennung, [str(x) for x in argumente], stuetzstellen])
+    return hashlib.sha256(inhalt.encode('utf-8')).hexdigest()
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Ergebnisspeicher_Oeffnen(dateiname, max_eintraege=None):
+    """Oeffne (oder erstelle) den Ergebnisspeicher in der SQLite-Datenbank dateiname. Darin werden
+    fuer jeden Schluessel (siehe Ergebnisspeicher_Schluessel) der Status und die Werte an den
+    Stuetzstellen gespeichert. Ist max_eintraege angegeben, werden beim Schliessen die am laengsten
+    nicht mehr genutzten Eintraege entfernt, bis die Anzahl nicht mehr ueberschritten wird.
+    Gibt ein dict mit allen Informationen des Speichers zurueck oder None, falls die Datenbank nicht
+    geoeffnet werden kann.
+    """
+    try:
+        import sqlite3
+    except ImportError:
+        print('# Warnung: sqlite3 nicht verfuegbar, Ergebnisspeicher wird nicht genutzt')
+        return None
+
+    try:
+        verbindung = sqlite3.connect(dateiname, timeout=60.0)
+        verbindung.execute('CREATE TABLE IF NOT EXISTS ergebnisse (schluessel TEXT PRIMARY KEY, ' \
+            + 'status TEXT NOT NULL, werte TEXT, zugriff INTEGER NOT NULL)')
+        verbindung.execute('CREATE INDEX IF NOT EXISTS ergebnisse_zugriff ON ergebnisse (zugriff)')
+        letzter_zugriff = verbindung.execute('SELECT MAX(zugriff) FROM ergebnisse').fetchone()[0]
+        verbindung.commit()
+    except sqlite3.Error as e:
+        print('# Warnung: Ergebnisspeicher ' + dateiname + ' konnte nicht geoeffnet werden (' + str(e) + ')')
+        return None
+
+    if (letzter_zugriff is None):
+        letzter_zugriff = 0
+
+    return dict([('verbindung', verbindung), ('dateiname', dateiname), ('max_eintraege', max_eintraege),
+        ('zugriff', letzter_zugriff+1), ('treffer', 0), ('neu', 0), ('ungespeichert', 0)])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Ergebnisspeicher_Lesen(speicher, schluessel):
+    """Suche das Ergebnis zu schluessel im speicher. Gibt den Status und die Werte an den
+    Stuetzstellen (None bei fehlgeschlagenen Berechnungen) zurueck oder None, falls kein Ergebnis
+    gespeichert ist.
+    """
+    import json
+
+    verbindung = speicher['verbindung']
+    eintrag = verbindung.execute('SELECT status, werte FROM ergebnisse WHERE schluessel = ?',
+        (schluessel, )).fetchone()
+    if (eintrag is None):
+        return None
+
+    verbindung.execute('UPDATE ergebnisse SET zugriff = ? WHERE schluessel = ?',
+        (speicher['zugriff'], schluessel))
+    speicher['zugriff'] += 1
+    speicher['treffer'] += 1
+
+    status, werte = eintrag
+    if (werte is not None):
+        werte = json.loads(werte)
+
+    return [status, werte]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Ergebnisspeicher_Schreiben(speicher, schluessel, status, werte=None):
+    """Speichere den status und die werte an den Stuetzstellen (None bei fehlgeschlagenen
+    Berechnungen) unter schluessel im speicher. Ein vorhandener Eintrag wird ersetzt.
+    """
+    import json
+
+    if (werte is not None):
+        werte = json.dumps(werte)
+
+    speicher['verbindung'].execute('INSERT OR REPLACE INTO ergebnisse (schluessel, status, werte, zugriff) ' \
+        + 'VALUES (?, ?, ?, ?)', (schluessel, status, werte, speicher['zugriff']))
+    speicher['zugriff'] += 1
+    speicher['neu'] += 1
+    speicher['ungespeichert'] += 1
+    if (speicher['ungespeichert'] >= _eintraege_je_speicherung):
+        speicher['verbindung'].commit()
+        speicher['ungespeichert'] = 0
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Ergebnisspeicher_Schliessen(speicher):
+    """Entferne ggfs. die am laengsten nicht genutzten Eintraege aus dem speicher, speichere alle
+    Aenderungen und schliesse die Datenbank.
+    """
+    verbindung = speicher['verbindung']
+    max_eintraege = speicher['max_eintraege']
+    if (max_eintraege is not None):
+        anzahl = verbindung.execute('SELECT COUNT(*) FROM ergebnisse').fetchone()[0]
+        if (anzahl > max_eintraege):
+            verbindung.execute('DELETE FROM ergebnisse WHERE schluessel IN (SELECT schluessel ' \
+                + 'FROM ergebnisse ORDER BY zugriff ASC LIMIT ?)', (anzahl-max_eintraege, ))
+
+    verbindung.commit()
+    verbindung.close()
+    print('# Ergebnisspeicher: ' + str(speicher['treffer']) + ' Treffer, ' + str(speicher['neu']) \
+        + ' neue Ergebnisse')
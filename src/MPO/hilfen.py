@@ -95,6 +95,95 @@ def LinearInterpoliertenIndexUndFaktor(vergleichswert, vergleichswertliste):
 
 
 
+# -------------------------------------------------------------------------------------------------
+def LinearInterpolierteIndizesUndFaktoren(vergleichswerte, vergleichswertliste):
+    """Bestimme wie LinearInterpoliertenIndexUndFaktor die Positionen aller vergleichswerte in der
+    vergleichswertliste, aber ohne die Liste fuer jeden Wert erneut zu durchlaufen. Dazu wird einmal
+    das laufende Maximum der Liste gebildet und darin fuer jeden Wert binaer die erste Position
+    gesucht, an der ein Listenwert groesser oder gleich dem Wert ist (mit numpy fuer alle Werte
+    gleichzeitig). Das ist genau die Position, an der LinearInterpoliertenIndexUndFaktor abbricht,
+    sodass auch unsortierte Listen gleich behandelt werden. Gibt eine Liste mit den Indizes und eine
+    mit den Faktoren zurueck oder [None, None], falls ein Wert nicht gefunden wird.
+    """
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    if (numpy is None):
+        from bisect import bisect_left
+
+        # NaN ist weder gleich noch groesser als ein Vergleichswert und wird daher uebersprungen
+        laufendes_maximum = []
+        maximum = float('-inf')
+        for listenwert in vergleichswertliste:
+            if (listenwert > maximum):
+                maximum = listenwert
+
+            laufendes_maximum += [maximum]
+
+        positionen = [bisect_left(laufendes_maximum, vergleichswert) for vergleichswert in vergleichswerte]
+    else:
+        listenwerte = numpy.asarray(vergleichswertliste, dtype=float)
+        laufendes_maximum = numpy.maximum.accumulate(numpy.where(numpy.isnan(listenwerte), -numpy.inf,
+            listenwerte))
+        positionen = numpy.searchsorted(laufendes_maximum, vergleichswerte, side='left').tolist()
+
+    letzterIndex = len(vergleichswertliste) - 1
+    indizes = []
+    faktoren = []
+    for vergleichswert, idx_wert in zip(vergleichswerte, positionen):
+        if ((idx_wert > letzterIndex) or (vergleichswert != vergleichswert)):
+            break
+
+        listenwert = vergleichswertliste[idx_wert]
+        if (listenwert == vergleichswert):
+            if (idx_wert == letzterIndex):
+                indizes += [idx_wert-1]
+                faktoren += [1.0]
+            else:
+                indizes += [idx_wert]
+                faktoren += [0.0]
+        else:
+            if (idx_wert == 0):
+                break
+
+            indizes += [idx_wert-1]
+            faktoren += [(vergleichswert-vergleichswertliste[idx_wert-1]) \
+                / (vergleichswertliste[idx_wert]-vergleichswertliste[idx_wert-1])]
+
+    if (len(indizes) < len(vergleichswerte)):
+        print('# Warnung: Vergleichswert nicht in Liste gefunden (echt kleiner/groesser oder Liste unsortiert)')
+        return [None, None]
+
+    return [indizes, faktoren]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Werte_Interpolieren(extradaten, indizes, faktoren):
+    """Interpoliere alle Vektoren in extradaten linear an den Stellen, die durch indizes und
+    faktoren (siehe LinearInterpolierteIndizesUndFaktoren) gegeben sind. Es werden nur die Werte an
+    den benoetigten Indizes entnommen und mit numpy je Vektor in einem Schritt interpoliert. Gibt
+    eine Liste mit den interpolierten Vektoren zurueck.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return [[extravektor[idx_davor] + faktor*(extravektor[idx_davor+1]-extravektor[idx_davor])
+            for idx_davor, faktor in zip(indizes, faktoren)] for extravektor in extradaten]
+
+    faktoren = numpy.array(faktoren, dtype=float)
+    extrawerte = []
+    for extravektor in extradaten:
+        werte_davor = numpy.array([extravektor[idx_davor] for idx_davor in indizes], dtype=float)
+        werte_danach = numpy.array([extravektor[idx_davor+1] for idx_davor in indizes], dtype=float)
+        extrawerte += [(werte_davor + faktoren*(werte_danach-werte_davor)).tolist()]
+
+    return extrawerte
+
+
+
 # -------------------------------------------------------------------------------------------------
 def Gleichmaessig_Unterteilte_Daten(x_min, x_max, num_werte, xdaten, extradaten=None):
     """Erwartet einen monoton steigenden Vektor xdaten (und optional weitere Vektoren gleicher Laenge
@@ -107,24 +196,15 @@ def Gleichmaessig_Unterteilte_Daten(x_min, x_max, num_werte, xdaten, extradaten=
     """
 
     xwerte = [x_min + (x_max - x_min)*x/(num_werte-1) for x in range(num_werte)]
-    num_extra = 0
-    if (extradaten is not None):
-        num_extra = len(extradaten)
-
-    extrawerte = [[0 for ini in range(num_werte)] for x in range(num_extra)]
-
-    successful = True
-    for idx_xwert, xwert in enumerate(xwerte):
-        idx_davor, faktor = LinearInterpoliertenIndexUndFaktor(vergleichswert=xwert,
-            vergleichswertliste=xdaten)
-        if (idx_davor is None):
-            return [[]] + [[] for x in range(num_extra)]
+    if (extradaten is None):
+        extradaten = []
 
-        for idx_extra in range(num_extra):
-            extrawerte[idx_extra][idx_xwert] = extradaten[idx_extra][idx_davor] + \
-                faktor*(extradaten[idx_extra][idx_davor+1]-extradaten[idx_extra][idx_davor])
+    indizes, faktoren = LinearInterpolierteIndizesUndFaktoren(vergleichswerte=xwerte,
+        vergleichswertliste=xdaten)
+    if (indizes is None):
+        return [[]] + [[] for x in range(len(extradaten))]
 
-    return [xwerte] + extrawerte
+    return [xwerte] + _Werte_Interpolieren(extradaten=extradaten, indizes=indizes, faktoren=faktoren)
 
 
 
@@ -139,22 +219,12 @@ def Daten_An_Stuetzstellen(xrefwerte, xdaten, extradaten):
     Wert in xdaten oder der Endwert von xrefwerte groesser als der letzte (d.h. groesste) Wert in
     xdaten, dann wird eine Liste leerer Listen zurueckgegeben.
     """
+    indizes, faktoren = LinearInterpolierteIndizesUndFaktoren(vergleichswerte=xrefwerte,
+        vergleichswertliste=xdaten)
+    if (indizes is None):
+        return [[] for x in range(len(extradaten))]
 
-    num_extra = len(extradaten)
-    extrawerte = [[0 for ini in range(len(xrefwerte))] for x in range(num_extra)]
-
-    successful = True
-    for idx_xwert, xwert in enumerate(xrefwerte):
-        idx_davor, faktor = LinearInterpoliertenIndexUndFaktor(vergleichswert=xwert,
-            vergleichswertliste=xdaten)
-        if (idx_davor is None):
-            return [[] for x in range(num_extra)]
-
-        for idx_extra in range(num_extra):
-            extrawerte[idx_extra][idx_xwert] = extradaten[idx_extra][idx_davor] + \
-                faktor*(extradaten[idx_extra][idx_davor+1]-extradaten[idx_extra][idx_davor])
-
-    return extrawerte
+    return _Werte_Interpolieren(extradaten=extradaten, indizes=indizes, faktoren=faktoren)
 
 
 
@@ -0,0 +1,921 @@
+# -*- coding: utf-8 -*-
+"""
+optimierung.py   v0.1
+2023-09 Dominik Zobel
+"""
+
+# Copyright 2020-2023 Dominik Zobel.
+# All rights reserved.
+#
+# This file is part of the MPO package.
+# MPO is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# MPO is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with MPO. If not, see <http://www.gnu.org/licenses/>.
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Verfeinerung_Vorbereiten(einstellungen):
+    """Pruefe, ob die einstellungen eine iterative Verfeinerung erlauben. Diese ist nur mit dem
+    vollstaendigen Auswahlverfahren moeglich und benoetigt eine Variationsdatei, an die neue
+    Variationen angehaengt werden koennen (ein Variationsstrom wird daher abgeschaltet). Gibt True
+    zurueck, falls die Verfeinerung durchgefuehrt werden kann, ansonsten False.
+    """
+    if (einstellungen['Auswahlverfahren'] != 'vollstaendig'):
+        print('# Abbruch: Verfeinerung nur mit vollstaendigem Auswahlverfahren moeglich')
+        return False
+
+    if (einstellungen.get('Variationsstrom', False)):
+        print('# Warnung: Variationsstrom bei der Verfeinerung nicht moeglich, erstelle Variationsdatei')
+        einstellungen['Variationsstrom'] = False
+
+    return True
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Verfeinerungseinstellungen(einstellungen):
+    """Lese die Einstellungen der Verfeinerung aus einstellungen['Verfeinerung'] und ergaenze
+    fehlende Eintraege mit Standardwerten. Gibt ein dict mit allen Einstellungen zurueck oder None,
+    falls ein Eintrag ungueltig ist.
+    """
+    verfeinerung = einstellungen.get('Verfeinerung', dict())
+    beste = verfeinerung.get('Beste', 3)
+    stufen = verfeinerung.get('Stufen', 3)
+    faktor = verfeinerung.get('Faktor', 0.5)
+    max_berechnungen = verfeinerung.get('max. Berechnungen', einstellungen['max. Variationen'])
+    toleranz = verfeinerung.get('Toleranz', 0.0)
+
+    if ((beste < 1) or (stufen < 0) or (max_berechnungen < 1)):
+        print('# Abbruch: Beste und max. Berechnungen der Verfeinerung muessen groesser Null sein ' \
+            + '(Stufen mindestens Null)')
+        return None
+
+    if ((faktor <= 0.0) or (faktor >= 1.0)):
+        print('# Abbruch: Faktor der Verfeinerung muss zwischen Null und Eins liegen')
+        return None
+
+    return dict([('beste', beste), ('stufen', stufen), ('faktor', faktor),
+        ('max_berechnungen', max_berechnungen), ('toleranz', toleranz)])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Verfeinerungsraum(einstellungen, variation, anteil):
+    """Erstelle eine Kopie der einstellungen, deren Optimierungsraum auf ein Fenster um die
+    variation (Liste mit den Parametern als Text) beschraenkt ist. Die Schrittweite jedes variierten
+    Parameters betraegt anteil der urspruenglichen Schrittweite bei gleicher Anzahl an Variationen.
+    Das Fenster wird auf die urspruenglichen Grenzen beschnitten, die Bedingungen bleiben erhalten.
+    """
+    import copy
+
+    lokale_einstellungen = copy.deepcopy(einstellungen)
+    optimierungsraum = einstellungen['Optimierungsraum']
+    lokaler_raum = lokale_einstellungen['Optimierungsraum']
+    for idx, anzahl in enumerate(optimierungsraum['Variationen']):
+        if (anzahl == 0):
+            continue
+
+        untergrenze = optimierungsraum['Werte (min)'][idx]
+        obergrenze = optimierungsraum['Werte (max)'][idx]
+        halbbreite = 0.5*anteil*(obergrenze - untergrenze)
+        mittelpunkt = float(variation[idx])
+        lokaler_raum['Werte (min)'][idx] = max(untergrenze, mittelpunkt - halbbreite)
+        lokaler_raum['Werte (max)'][idx] = min(obergrenze, mittelpunkt + halbbreite)
+
+    return lokale_einstellungen
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Berechnen_Und_Bewerten(einstellungen, gesamtvergleichsdaten, pool, fortsetzen):
+    """Berechne alle Variationen der aktuellen Variationsdatei (ggfs. gestuft) und bewerte sie. Mit
+    fortsetzen=True werden bereits im Journal vorhandene Ergebnisse uebernommen. Gibt
+    [indizes, bewertungen] wie Bewerte_Ergebnisse zurueck.
+    """
+    from .abweichung import Bewerte_Ergebnisse
+    from .programmsteuerung import Berechne_Versuchsablauf, Berechne_Versuchsablauf_Gestuft
+
+    if ('Gestufte Auswertung' in einstellungen):
+        Berechne_Versuchsablauf_Gestuft(einstellungen=einstellungen,
+            gesamtvergleichsdaten=gesamtvergleichsdaten, pool=pool, fortsetzen=fortsetzen)
+    else:
+        Berechne_Versuchsablauf(einstellungen=einstellungen, gesamtvergleichsdaten=gesamtvergleichsdaten,
+            pool=pool, fortsetzen=fortsetzen)
+
+    print('\n# ----------------------------------------')
+    return Bewerte_Ergebnisse(einstellungen=einstellungen, mit_bewertung=True)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Verfeinerung_Durchfuehren(einstellungen, gesamtvergleichsdaten, pool=None, fortsetzen=False):
+    """Berechne das (grobe) Gitter der bereits erstellten Variationsdatei und verfeinere es
+    anschliessend stufenweise. In jeder Stufe wird um die besten Variationen
+    (einstellungen['Verfeinerung']['Beste']) ein Gitter mit derselben Anzahl an Variationen, aber
+    einer um 'Faktor' kleineren Schrittweite aufgespannt. Neue Variationen werden an die
+    Variationsdatei angehaengt, sodass bereits berechnete Variationen ihren Index behalten und ueber
+    das Journal wiederverwendet werden. Die Verfeinerung endet nach 'Stufen' Stufen, wenn
+    'max. Berechnungen' Variationen erreicht sind, sich die beste Bewertung um weniger als
+    'Toleranz' verbessert oder keine neuen Variationen mehr entstehen. Gibt True zurueck, falls
+    die Verfeinerung durchgefuehrt werden konnte, ansonsten False.
+    """
+    import os
+    from .versuchsliste import Gitterzeilen, Variationsquelle_Erstellen, Variation_Ermitteln
+
+    verfeinerung = _Verfeinerungseinstellungen(einstellungen=einstellungen)
+    if (verfeinerung is None):
+        return False
+
+    variationsdatei = einstellungen['Arbeitsverzeichnis'] + os.sep + einstellungen['Ausgabedatei_Variationen']
+    quelle = Variationsquelle_Erstellen(einstellungen=einstellungen, dateiname=variationsdatei)
+    vorhandene_zeilen = set([' '.join(Variation_Ermitteln(quelle=quelle, idx_variation=idx))
+        for idx in range(quelle['anzahl'])])
+    anzahl_variationen = len(vorhandene_zeilen)
+
+    indizes, bewertungen = _Berechnen_Und_Bewerten(einstellungen=einstellungen,
+        gesamtvergleichsdaten=gesamtvergleichsdaten, pool=pool, fortsetzen=fortsetzen)
+    if (bewertungen[0:1] in [[], [None]]):
+        print('# Abbruch: Keine brauchbaren Ergebnisse fuer die Verfeinerung')
+        return False
+
+    beste_bewertung = bewertungen[0]
+    for stufe in range(1, verfeinerung['stufen']+1):
+        restbudget = verfeinerung['max_berechnungen'] - anzahl_variationen
+        if (restbudget <= 0):
+            print('# Verfeinerung beendet: max. Berechnungen erreicht')
+            break
+
+        quelle = Variationsquelle_Erstellen(einstellungen=einstellungen, dateiname=variationsdatei)
+        beste_indizes = [idx for idx, bewertung in zip(indizes, bewertungen)
+            if (bewertung is not None)][:verfeinerung['beste']]
+
+        anteil = verfeinerung['faktor']**stufe
+        neue_zeilen = []
+        for idx_variation in beste_indizes:
+            variation = Variation_Ermitteln(quelle=quelle, idx_variation=idx_variation)
+            lokale_zeilen = Gitterzeilen(einstellungen=_Verfeinerungsraum(einstellungen=einstellungen,
+                variation=variation, anteil=anteil))
+            if (lokale_zeilen is None):
+                return False
+
+            for zeile in lokale_zeilen:
+                if (zeile not in vorhandene_zeilen):
+                    vorhandene_zeilen.add(zeile)
+                    neue_zeilen += [zeile]
+
+        # Bei zu vielen neuen Variationen werden die um die beste Variation bevorzugt
+        neue_zeilen = neue_zeilen[:restbudget]
+        if (neue_zeilen == []):
+            print('# Verfeinerung beendet: Keine neuen Variationen in Stufe ' + str(stufe))
+            break
+
+        print('\n# ----------------------------------------')
+        print('# --- Verfeinerung ' + str(stufe) + '/' + str(verfeinerung['stufen']) + ': ' \
+            + str(len(neue_zeilen)) + ' neue Variationen um die ' + str(len(beste_indizes)) \
+            + ' besten (Schrittweite x' + str(anteil) + ')')
+        with open(variationsdatei, 'a', encoding='utf-8') as ausgabe:
+            ausgabe.write('\n'.join(neue_zeilen) + '\n')
+
+        anzahl_variationen += len(neue_zeilen)
+        indizes, bewertungen = _Berechnen_Und_Bewerten(einstellungen=einstellungen,
+            gesamtvergleichsdaten=gesamtvergleichsdaten, pool=pool, fortsetzen=True)
+
+        verbesserung = beste_bewertung - bewertungen[0]
+        beste_bewertung = bewertungen[0]
+        print('# Beste Bewertung nach Stufe ' + str(stufe) + ': ' + str(beste_bewertung) \
+            + ' (Verbesserung ' + str(verbesserung) + ', ' + str(anzahl_variationen) + ' Variationen)')
+        if (verbesserung < verfeinerung['toleranz']):
+            print('# Verfeinerung beendet: Verbesserung unter der Toleranz')
+            break
+
+    return True
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Vorhandene_Variationen(einstellungen, variationsdatei):
+    """Lese alle Variationen der variationsdatei ein. Gibt [quelle, zeilenindizes] zurueck, wobei
+    quelle wie bei Variationsquelle_Erstellen aufgebaut ist und zeilenindizes jeder Variation (als
+    Text) ihren ersten Index zuordnet.
+    """
+    from .versuchsliste import Variationsquelle_Erstellen, Variation_Ermitteln
+
+    quelle = Variationsquelle_Erstellen(einstellungen=einstellungen, dateiname=variationsdatei)
+    zeilenindizes = dict()
+    for idx in range(quelle['anzahl']):
+        zeilenindizes.setdefault(' '.join(Variation_Ermitteln(quelle=quelle, idx_variation=idx)), idx)
+
+    return [quelle, zeilenindizes]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Variationen_Zuordnen(zeilen, zeilenindizes, anzahl_variationen, genutzte_variationen, restbudget):
+    """Ordne jeder Variation in zeilen (Text oder None) ihren Index in der Variationsdatei zu.
+    Unbekannte Variationen erhalten neue Indizes ab anzahl_variationen (und werden in zeilenindizes
+    ergaenzt), solange weniger als restbudget neue Indizes vergeben sind. Als neu gelten auch
+    Variationen ab dem Index genutzte_variationen, die aus einem unterbrochenen Durchlauf bereits in
+    der Variationsdatei stehen. Gibt [neue_zeilen, neue_indizes, indizes] zurueck, wobei neue_zeilen
+    an die Variationsdatei anzuhaengen sind und indizes fuer jede Zeile den Index (oder None) enthaelt.
+    """
+    neue_zeilen = []
+    neue_indizes = set()
+    indizes = []
+    for zeile in zeilen:
+        idx_zeile = zeilenindizes.get(zeile, None)
+        if ((zeile is not None) and (idx_zeile is None) and (len(neue_indizes) < restbudget)):
+            idx_zeile = anzahl_variationen + len(neue_zeilen)
+            zeilenindizes[zeile] = idx_zeile
+            neue_zeilen += [zeile]
+
+        if ((idx_zeile is not None) and (idx_zeile >= genutzte_variationen)):
+            neue_indizes.add(idx_zeile)
+
+        indizes += [idx_zeile]
+
+    return [neue_zeilen, neue_indizes, indizes]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Populationsgroesse(einstellungen):
+    """Ermittle die Groesse der Population der differentiellen Evolution aus
+    einstellungen['Differentielle Evolution']['Populationsgroesse']. Standardmaessig werden zehn
+    Individuen je variiertem Parameter genutzt (mindestens vier, hoechstens max. Variationen).
+    """
+    evolution = einstellungen.get('Differentielle Evolution', dict())
+    anzahl_parameter = len([x for x in einstellungen['Optimierungsraum']['Variationen'] if (x > 0)])
+    populationsgroesse = evolution.get('Populationsgroesse', max(4, 10*anzahl_parameter))
+    return max(4, min(populationsgroesse, einstellungen['max. Variationen']))
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Evolutionseinstellungen(einstellungen):
+    """Lese die Einstellungen der differentiellen Evolution aus
+    einstellungen['Differentielle Evolution'] und ergaenze fehlende Eintraege mit Standardwerten.
+    Gibt ein dict mit allen Einstellungen zurueck oder None, falls ein Eintrag ungueltig ist.
+    """
+    evolution = einstellungen.get('Differentielle Evolution', dict())
+    mutationsfaktor = evolution.get('Mutationsfaktor', 0.8)
+    rekombinationsrate = evolution.get('Rekombinationsrate', 0.9)
+    generationen = evolution.get('Generationen', None)
+    toleranz = evolution.get('Toleranz', 0.0)
+
+    if ((mutationsfaktor <= 0.0) or (mutationsfaktor > 2.0)):
+        print('# Abbruch: Mutationsfaktor der differentiellen Evolution muss zwischen Null und Zwei liegen')
+        return None
+
+    if ((rekombinationsrate < 0.0) or (rekombinationsrate > 1.0)):
+        print('# Abbruch: Rekombinationsrate der differentiellen Evolution muss zwischen Null und Eins ' \
+            + 'liegen')
+        return None
+
+    return dict([('populationsgroesse', Populationsgroesse(einstellungen=einstellungen)),
+        ('mutationsfaktor', mutationsfaktor), ('rekombinationsrate', rekombinationsrate),
+        ('generationen', generationen), ('toleranz', toleranz)])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Bewertungen_Je_Index(indizes, bewertungen):
+    """Ordne die bewertungen (siehe Bewerte_Ergebnisse) ihrem Variationsindex zu. Variationen ohne
+    brauchbares Ergebnis erhalten eine unendlich grosse Bewertung. Gibt ein dict zurueck.
+    """
+    return dict([(idx, float('inf') if (bewertung is None) else bewertung)
+        for idx, bewertung in zip(indizes, bewertungen)])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Versuchsindividuen(einstellungen, evolution, population, zufallsgenerator, bedingungen, max_versuche=20):
+    """Erzeuge fuer jedes Individuum der population (numpy-Array mit einer Zeile je Individuum und
+    einer Spalte je Parameter) ein Versuchsindividuum nach dem Schema DE/rand/1/bin mit den
+    Einstellungen aus evolution (siehe _Evolutionseinstellungen). Es werden nur die Parameter mit
+    Variationen groesser Null veraendert und auf die Grenzen des Optimierungsraums beschnitten.
+    Erfuellt ein Versuchsindividuum die bedingungen nicht, wird es bis zu max_versuche mal neu
+    erzeugt (sonst None). Gibt eine Liste mit den Versuchsindividuen als Text zurueck.
+    """
+    import numpy
+    from .hilfen import Runden_Auf_Signifikante_Stellen
+    from .versuchsliste import Bedingungen_Maske
+
+    optimierungsraum = einstellungen['Optimierungsraum']
+    spalten = [idx for idx, anzahl in enumerate(optimierungsraum['Variationen']) if (anzahl > 0)]
+    untergrenzen = numpy.array([optimierungsraum['Werte (min)'][idx] for idx in spalten])
+    obergrenzen = numpy.array([optimierungsraum['Werte (max)'][idx] for idx in spalten])
+    anzahl_individuen = population.shape[0]
+
+    versuchsindividuen = []
+    for idx_individuum in range(anzahl_individuen):
+        andere = [idx for idx in range(anzahl_individuen) if (idx != idx_individuum)]
+        neues_individuum = None
+        for versuch in range(max_versuche):
+            erster, zweiter, dritter = zufallsgenerator.choice(andere, size=3, replace=False)
+            mutant = population[erster, spalten] \
+                + evolution['mutationsfaktor']*(population[zweiter, spalten] - population[dritter, spalten])
+            # Mindestens ein Parameter wird immer vom Mutanten uebernommen
+            kreuzung = zufallsgenerator.random(len(spalten)) < evolution['rekombinationsrate']
+            kreuzung[zufallsgenerator.integers(len(spalten))] = True
+
+            individuum = population[idx_individuum].copy()
+            individuum[spalten] = numpy.clip(numpy.where(kreuzung, mutant,
+                population[idx_individuum, spalten]), untergrenzen, obergrenzen)
+            individuum = numpy.array([Runden_Auf_Signifikante_Stellen(wert=x, stellen=6) for x in individuum])
+            if (Bedingungen_Maske(bedingungen=bedingungen, werte=individuum[numpy.newaxis, :])[0]):
+                neues_individuum = ' '.join([str(float(x)) for x in individuum])
+                break
+
+        versuchsindividuen += [neues_individuum]
+
+    return versuchsindividuen
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Evolution_Durchfuehren(einstellungen, gesamtvergleichsdaten, pool=None, fortsetzen=False):
+    """Optimiere die Parameter mit differentieller Evolution. Die Startpopulation sind die ersten
+    Variationen der bereits erstellten Variationsdatei (Latin-Hypercube-Stichprobe). In jeder
+    Generation wird fuer jedes Individuum ein Versuchsindividuum erzeugt, alle neuen Variationen
+    werden an die Variationsdatei angehaengt und gemeinsam berechnet. Ziel ist die Gesamtbewertung
+    aus Bewerte_Ergebnisse. Ein Versuchsindividuum ersetzt sein Elternteil, wenn seine Bewertung
+    nicht schlechter ist. Die Evolution endet nach max. Variationen Variationen, nach 'Generationen'
+    Generationen oder wenn die Bewertungen der Population um weniger als 'Toleranz' streuen. Mit
+    gleichem Zufallsstartwert wird ein unterbrochener Durchlauf mit fortsetzen=True anhand des
+    Journals nachvollzogen. Gibt True zurueck, falls die Evolution durchgefuehrt werden konnte,
+    ansonsten False.
+    """
+    import os
+    from .versuchsliste import Bedingungen_Kompilieren, Variation_Ermitteln, Zufallsstartwert
+
+    try:
+        import numpy
+    except ImportError:
+        print('# Abbruch: Differentielle Evolution benoetigt numpy')
+        return False
+
+    evolution = _Evolutionseinstellungen(einstellungen=einstellungen)
+    bedingungen = Bedingungen_Kompilieren(einstellungen=einstellungen)
+    if ((evolution is None) or (bedingungen is None)):
+        return False
+
+    variationsdatei = einstellungen['Arbeitsverzeichnis'] + os.sep + einstellungen['Ausgabedatei_Variationen']
+    quelle, zeilenindizes = _Vorhandene_Variationen(einstellungen=einstellungen,
+        variationsdatei=variationsdatei)
+    anzahl_variationen = quelle['anzahl']
+    anzahl_individuen = min(evolution['populationsgroesse'], anzahl_variationen)
+    if (anzahl_individuen < 4):
+        print('# Abbruch: Differentielle Evolution benoetigt mindestens vier Variationen als Startpopulation')
+        return False
+
+    indizes_population = list(range(anzahl_individuen))
+    population = numpy.array([[float(x) for x in Variation_Ermitteln(quelle=quelle, idx_variation=idx)]
+        for idx in indizes_population])
+
+    # Eigener Zufallsstrom neben dem der Startpopulation
+    zufallsgenerator = numpy.random.default_rng([Zufallsstartwert(einstellungen=einstellungen), 1])
+
+    indizes, bewertungen = _Berechnen_Und_Bewerten(einstellungen=einstellungen,
+        gesamtvergleichsdaten=gesamtvergleichsdaten, pool=pool, fortsetzen=fortsetzen)
+    bewertung_je_index = _Bewertungen_Je_Index(indizes=indizes, bewertungen=bewertungen)
+
+    # Variationen ab diesem Index sind noch keiner Generation zugeordnet (bei fortsetzen=True koennen
+    # sie aus dem unterbrochenen Durchlauf bereits in der Variationsdatei vorhanden sein)
+    genutzte_variationen = anzahl_individuen
+    generation = 0
+    while ((evolution['generationen'] is None) or (generation < evolution['generationen'])):
+        restbudget = einstellungen['max. Variationen'] - genutzte_variationen
+        if (restbudget <= 0):
+            print('# Evolution beendet: max. Variationen erreicht')
+            break
+
+        bewertungen_population = [bewertung_je_index[idx] for idx in indizes_population]
+        gueltige_bewertungen = [x for x in bewertungen_population if (x != float('inf'))]
+        if ((len(gueltige_bewertungen) == anzahl_individuen)
+            and (max(gueltige_bewertungen) - min(gueltige_bewertungen) < evolution['toleranz'])):
+            print('# Evolution beendet: Streuung der Population unter der Toleranz')
+            break
+
+        generation += 1
+        versuchsindividuen = _Versuchsindividuen(einstellungen=einstellungen, evolution=evolution,
+            population=population, zufallsgenerator=zufallsgenerator, bedingungen=bedingungen)
+
+        # Bereits vorhandene Variationen werden nicht erneut angehaengt, sondern nur zugeordnet
+        neue_zeilen, neue_indizes, indizes_versuch = _Variationen_Zuordnen(zeilen=versuchsindividuen,
+            zeilenindizes=zeilenindizes, anzahl_variationen=anzahl_variationen,
+            genutzte_variationen=genutzte_variationen, restbudget=restbudget)
+        if (not neue_indizes):
+            print('# Evolution beendet: Keine neuen Variationen in Generation ' + str(generation))
+            break
+
+        print('\n# ----------------------------------------')
+        print('# --- Generation ' + str(generation) + ': ' + str(len(neue_indizes)) + ' neue Variationen')
+        if (neue_zeilen):
+            with open(variationsdatei, 'a', encoding='utf-8') as ausgabe:
+                ausgabe.write('\n'.join(neue_zeilen) + '\n')
+
+        anzahl_variationen += len(neue_zeilen)
+        genutzte_variationen = max(genutzte_variationen, max(neue_indizes)+1)
+        indizes, bewertungen = _Berechnen_Und_Bewerten(einstellungen=einstellungen,
+            gesamtvergleichsdaten=gesamtvergleichsdaten, pool=pool, fortsetzen=True)
+        bewertung_je_index = _Bewertungen_Je_Index(indizes=indizes, bewertungen=bewertungen)
+
+        for idx_individuum, idx_versuch in enumerate(indizes_versuch):
+            if (idx_versuch is None):
+                continue
+
+            if (bewertung_je_index[idx_versuch] <= bewertung_je_index[indizes_population[idx_individuum]]):
+                indizes_population[idx_individuum] = idx_versuch
+                population[idx_individuum] = [float(x) for x in versuchsindividuen[idx_individuum].split(' ')]
+
+        beste_bewertung = min([bewertung_je_index[idx] for idx in indizes_population])
+        print('# Beste Bewertung nach Generation ' + str(generation) + ': ' + str(beste_bewertung) \
+            + ' (' + str(genutzte_variationen) + ' Variationen)')
+
+    return True
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Anzahl_Startpunkte(einstellungen):
+    """Ermittle die Anzahl an Startpunkten der bayesschen Optimierung aus
+    einstellungen['Bayessche Optimierung']['Startpunkte']. Standardmaessig werden fuenf Startpunkte
+    je variiertem Parameter genutzt (mindestens zehn, hoechstens max. Variationen).
+    """
+    bayes = einstellungen.get('Bayessche Optimierung', dict())
+    anzahl_parameter = len([x for x in einstellungen['Optimierungsraum']['Variationen'] if (x > 0)])
+    startpunkte = bayes.get('Startpunkte', max(10, 5*anzahl_parameter))
+    return max(2, min(startpunkte, einstellungen['max. Variationen']))
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Bayes_Einstellungen(einstellungen, pool=None):
+    """Lese die Einstellungen der bayesschen Optimierung aus einstellungen['Bayessche Optimierung']
+    und ergaenze fehlende Eintraege mit Standardwerten. Ohne 'Vorschlaege je Runde' werden so viele
+    Variationen je Runde vorgeschlagen, wie der pool gleichzeitig berechnen kann. Gibt ein dict mit
+    allen Einstellungen zurueck oder None, falls ein Eintrag ungueltig ist.
+    """
+    from .arbeitsverteilung import Anzahl_Prozesse, Arbeiterpool_Groesse
+
+    bayes = einstellungen.get('Bayessche Optimierung', dict())
+    vorschlaege = bayes.get('Vorschlaege je Runde', None)
+    if (vorschlaege is None):
+        if (pool is None):
+            simulationen_je_prozess = einstellungen.get('Simulationen je Prozess', 1)
+            vorschlaege = Anzahl_Prozesse(simulationen_je_prozess=simulationen_je_prozess) \
+                *simulationen_je_prozess
+        else:
+            vorschlaege = Arbeiterpool_Groesse(pool=pool)
+
+    kandidaten = bayes.get('Kandidaten', 2000)
+    if ((vorschlaege < 1) or (kandidaten < 1)):
+        print('# Abbruch: Vorschlaege je Runde und Kandidaten der bayesschen Optimierung muessen ' \
+            + 'groesser Null sein')
+        return None
+
+    return dict([('startpunkte', Anzahl_Startpunkte(einstellungen=einstellungen)),
+        ('vorschlaege', vorschlaege), ('kandidaten', kandidaten)])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Quadratische_Abstaende(erste, zweite):
+    """Berechne die quadrierten euklidischen Abstaende aller Zeilen von erste zu allen Zeilen von
+    zweite (numpy-Arrays mit einer Spalte je Dimension). Gibt ein numpy-Array mit einer Zeile je
+    Punkt aus erste zurueck.
+    """
+    import numpy
+
+    abstaende = numpy.sum(erste**2, axis=1)[:, numpy.newaxis] \
+        + numpy.sum(zweite**2, axis=1)[numpy.newaxis, :] - 2.0*numpy.dot(erste, zweite.T)
+    return numpy.maximum(abstaende, 0.0)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Gauss_Prozess(punkte, werte, laengenskalen=[0.05, 0.1, 0.2, 0.3, 0.5, 1.0]):
+    """Passe einen Gauss-Prozess mit quadratisch-exponentiellem Kern an die werte an den punkten
+    (numpy-Array mit einer Zeile je Punkt im Einheitswuerfel) an. Die werte werden standardisiert
+    und die Laengenskala wird aus laengenskalen anhand der Randwahrscheinlichkeit gewaehlt. Gibt ein
+    dict mit allen Informationen des Modells zurueck oder None, falls kein Modell angepasst werden
+    kann.
+    """
+    import numpy
+
+    mittelwert = numpy.mean(werte)
+    streuung = numpy.std(werte)
+    if (streuung <= 0.0):
+        streuung = 1.0
+
+    normiert = (werte - mittelwert)/streuung
+    abstaende = _Quadratische_Abstaende(erste=punkte, zweite=punkte)
+    einheitsmatrix = numpy.eye(punkte.shape[0])
+
+    modell = None
+    for rauschen in [1e-6, 1e-3]:
+        for laengenskala in laengenskalen:
+            try:
+                cholesky = numpy.linalg.cholesky(numpy.exp(-0.5*abstaende/laengenskala**2) \
+                    + rauschen*einheitsmatrix)
+            except numpy.linalg.LinAlgError:
+                continue
+
+            alpha = numpy.linalg.solve(cholesky.T, numpy.linalg.solve(cholesky, normiert))
+            wahrscheinlichkeit = -0.5*numpy.dot(normiert, alpha) - numpy.sum(numpy.log(numpy.diag(cholesky)))
+            if ((modell is None) or (wahrscheinlichkeit > modell['wahrscheinlichkeit'])):
+                modell = dict([('punkte', punkte), ('werte', werte), ('mittelwert', mittelwert),
+                    ('streuung', streuung), ('laengenskala', laengenskala), ('rauschen', rauschen),
+                    ('cholesky', cholesky), ('alpha', alpha), ('wahrscheinlichkeit', wahrscheinlichkeit)])
+
+        if (modell is not None):
+            break
+
+    return modell
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Gauss_Prozess_Vorhersage(modell, punkte):
+    """Sage mit dem Gauss-Prozess modell (siehe _Gauss_Prozess) die Werte an den punkten voraus.
+    Gibt [mittelwerte, standardabweichungen] als numpy-Arrays zurueck.
+    """
+    import numpy
+
+    kreuzkern = numpy.exp(-0.5*_Quadratische_Abstaende(erste=punkte, zweite=modell['punkte']) \
+        /modell['laengenskala']**2)
+    mittelwerte = numpy.dot(kreuzkern, modell['alpha'])
+    hilfswerte = numpy.linalg.solve(modell['cholesky'], kreuzkern.T)
+    varianzen = numpy.maximum(1.0 + modell['rauschen'] - numpy.sum(hilfswerte**2, axis=0), 1e-12)
+    return [modell['mittelwert'] + modell['streuung']*mittelwerte, modell['streuung']*numpy.sqrt(varianzen)]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Erwartete_Verbesserung(mittelwerte, standardabweichungen, bester_wert):
+    """Berechne die erwartete Verbesserung (expected improvement) gegenueber bester_wert fuer eine
+    Minimierung aus den vorhergesagten mittelwerte und standardabweichungen (numpy-Arrays).
+    """
+    import math
+    import numpy
+
+    verbesserung = bester_wert - mittelwerte
+    z = verbesserung/standardabweichungen
+    verteilung = 0.5*(1.0 + numpy.vectorize(math.erf)(z/math.sqrt(2.0)))
+    dichte = numpy.exp(-0.5*z**2)/math.sqrt(2.0*math.pi)
+    return verbesserung*verteilung + standardabweichungen*dichte
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Vorschlaege(einstellungen, bayes, zeilenwerte, bewertungen, bekannt, zufallsgenerator, bedingungen):
+    """Schlage bis zu bayes['vorschlaege'] neue Variationen vor. Dazu wird ein Gauss-Prozess an die
+    (logarithmierten) bewertungen der zeilenwerte (numpy-Array mit einer Zeile je berechneter
+    Variation) im normierten Raum der variierten Parameter angepasst. Aus zufaelligen Kandidaten
+    (gleichverteilt und um die besten Variationen), welche die bedingungen erfuellen und nicht in
+    bekannt (Menge der Variationen als Text, wird um alle Kandidaten ergaenzt) enthalten sind, wird
+    nacheinander der mit der groessten erwarteten Verbesserung gewaehlt. Fuer jeden gewaehlten
+    Kandidaten wird die Vorhersage als Ergebnis angenommen, damit sich die Vorschlaege einer Runde
+    nicht haeufen. Gibt eine Liste mit den Variationen als Text zurueck.
+    """
+    import numpy
+    from .hilfen import Runden_Auf_Signifikante_Stellen
+    from .versuchsliste import Bedingungen_Maske
+
+    optimierungsraum = einstellungen['Optimierungsraum']
+    spalten = [idx for idx, anzahl in enumerate(optimierungsraum['Variationen']) if (anzahl > 0)]
+    untergrenzen = numpy.array([optimierungsraum['Werte (min)'][idx] for idx in spalten])
+    spannen = numpy.array([optimierungsraum['Werte (max)'][idx] - optimierungsraum['Werte (min)'][idx]
+        for idx in spalten])
+    spannen[spannen <= 0.0] = 1.0
+
+    # Fehlgeschlagene Berechnungen werden wie die schlechteste gueltige Bewertung behandelt
+    gueltig = numpy.isfinite(bewertungen)
+    werte = numpy.log(numpy.maximum(bewertungen, 1e-300))
+    if (numpy.any(gueltig)):
+        werte[~gueltig] = numpy.max(werte[gueltig])
+
+    punkte = (zeilenwerte[:, spalten] - untergrenzen)/spannen
+    anzahl_kandidaten = bayes['kandidaten']
+    beste = punkte[numpy.argsort(werte)[:5]]
+    kandidaten = numpy.vstack([zufallsgenerator.random((anzahl_kandidaten, len(spalten))),
+        numpy.clip(beste[zufallsgenerator.integers(beste.shape[0], size=anzahl_kandidaten)] \
+        + zufallsgenerator.normal(0.0, 0.05, (anzahl_kandidaten, len(spalten))), 0.0, 1.0)])
+
+    kandidatenwerte = numpy.tile(numpy.array(optimierungsraum['Werte (min)'], dtype=float),
+        (kandidaten.shape[0], 1))
+    kandidatenwerte[:, spalten] = untergrenzen + kandidaten*spannen
+    kandidatenwerte = numpy.vectorize(Runden_Auf_Signifikante_Stellen)(kandidatenwerte)
+    kandidatenwerte = kandidatenwerte[Bedingungen_Maske(bedingungen=bedingungen, werte=kandidatenwerte)]
+
+    texte = []
+    auswahl = []
+    for idx_kandidat, zeile in enumerate(kandidatenwerte.tolist()):
+        text = ' '.join([str(x) for x in zeile])
+        if (text not in bekannt):
+            bekannt.add(text)
+            texte += [text]
+            auswahl += [idx_kandidat]
+
+    kandidaten = (kandidatenwerte[auswahl][:, spalten] - untergrenzen)/spannen
+    modell = None
+    if (numpy.any(gueltig)):
+        modell = _Gauss_Prozess(punkte=punkte, werte=werte)
+
+    vorschlaege = []
+    while ((len(vorschlaege) < bayes['vorschlaege']) and (texte != [])):
+        if (modell is None):
+            idx_auswahl = 0
+        else:
+            mittelwerte, standardabweichungen = _Gauss_Prozess_Vorhersage(modell=modell, punkte=kandidaten)
+            idx_auswahl = int(numpy.argmax(_Erwartete_Verbesserung(mittelwerte=mittelwerte,
+                standardabweichungen=standardabweichungen, bester_wert=numpy.min(modell['werte']))))
+            modell = _Gauss_Prozess(punkte=numpy.vstack([modell['punkte'], kandidaten[idx_auswahl]]),
+                werte=numpy.append(modell['werte'], mittelwerte[idx_auswahl]),
+                laengenskalen=[modell['laengenskala']])
+
+        vorschlaege += [texte.pop(idx_auswahl)]
+        kandidaten = numpy.delete(kandidaten, idx_auswahl, axis=0)
+
+    return vorschlaege
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Bayes_Optimierung_Durchfuehren(einstellungen, gesamtvergleichsdaten, pool=None, fortsetzen=False):
+    """Optimiere die Parameter mit bayesscher Optimierung. Die Startpunkte sind die ersten
+    Variationen der bereits erstellten Variationsdatei (Latin-Hypercube-Stichprobe). In jeder Runde
+    wird ein Gauss-Prozess an alle berechneten Variationen angepasst und es werden so viele neue
+    Variationen vorgeschlagen, wie gleichzeitig berechnet werden koennen (siehe _Vorschlaege). Diese
+    werden an die Variationsdatei angehaengt und gemeinsam berechnet. Ziel ist die Gesamtbewertung
+    aus Bewerte_Ergebnisse. Die Optimierung endet nach max. Variationen Variationen oder wenn keine
+    neuen Variationen mehr vorgeschlagen werden. Mit gleichem Zufallsstartwert und gleicher Anzahl
+    an Vorschlaegen je Runde wird ein unterbrochener Durchlauf mit fortsetzen=True anhand des
+    Journals nachvollzogen. Gibt True zurueck, falls die Optimierung durchgefuehrt werden konnte,
+    ansonsten False.
+    """
+    import os
+    from .versuchsliste import Bedingungen_Kompilieren, Variation_Ermitteln, Zufallsstartwert
+
+    try:
+        import numpy
+    except ImportError:
+        print('# Abbruch: Bayessche Optimierung benoetigt numpy')
+        return False
+
+    bayes = _Bayes_Einstellungen(einstellungen=einstellungen, pool=pool)
+    bedingungen = Bedingungen_Kompilieren(einstellungen=einstellungen)
+    if ((bayes is None) or (bedingungen is None)):
+        return False
+
+    variationsdatei = einstellungen['Arbeitsverzeichnis'] + os.sep + einstellungen['Ausgabedatei_Variationen']
+    quelle, zeilenindizes = _Vorhandene_Variationen(einstellungen=einstellungen,
+        variationsdatei=variationsdatei)
+    anzahl_variationen = quelle['anzahl']
+    zeilen = [' '.join(Variation_Ermitteln(quelle=quelle, idx_variation=idx))
+        for idx in range(anzahl_variationen)]
+
+    # Nur Variationen unterhalb dieses Index fliessen in das Modell ein (bei fortsetzen=True koennen
+    # weitere aus dem unterbrochenen Durchlauf bereits in der Variationsdatei vorhanden sein)
+    genutzte_variationen = min(bayes['startpunkte'], anzahl_variationen)
+    if (genutzte_variationen < 2):
+        print('# Abbruch: Bayessche Optimierung benoetigt mindestens zwei Variationen als Startpunkte')
+        return False
+
+    print('# Bis zu ' + str(bayes['vorschlaege']) + ' Vorschlaege je Runde')
+    zufallsgenerator = numpy.random.default_rng([Zufallsstartwert(einstellungen=einstellungen), 2])
+
+    indizes, bewertungen = _Berechnen_Und_Bewerten(einstellungen=einstellungen,
+        gesamtvergleichsdaten=gesamtvergleichsdaten, pool=pool, fortsetzen=fortsetzen)
+    bewertung_je_index = _Bewertungen_Je_Index(indizes=indizes, bewertungen=bewertungen)
+
+    runde = 0
+    while True:
+        restbudget = einstellungen['max. Variationen'] - genutzte_variationen
+        if (restbudget <= 0):
+            print('# Optimierung beendet: max. Variationen erreicht')
+            break
+
+        runde += 1
+        zeilenwerte = numpy.array([[float(x) for x in zeile.split(' ')]
+            for zeile in zeilen[:genutzte_variationen]])
+        vorschlaege = _Vorschlaege(einstellungen=einstellungen, bayes=bayes, zeilenwerte=zeilenwerte,
+            bewertungen=numpy.array([bewertung_je_index[idx] for idx in range(genutzte_variationen)]),
+            bekannt=set(zeilen[:genutzte_variationen]), zufallsgenerator=zufallsgenerator,
+            bedingungen=bedingungen)
+
+        neue_zeilen, neue_indizes, indizes_vorschlaege = _Variationen_Zuordnen(zeilen=vorschlaege,
+            zeilenindizes=zeilenindizes, anzahl_variationen=anzahl_variationen,
+            genutzte_variationen=genutzte_variationen, restbudget=restbudget)
+        if (not neue_indizes):
+            print('# Optimierung beendet: Keine neuen Variationen in Runde ' + str(runde))
+            break
+
+        print('\n# ----------------------------------------')
+        print('# --- Runde ' + str(runde) + ': ' + str(len(neue_indizes)) + ' neue Variationen')
+        if (neue_zeilen):
+            with open(variationsdatei, 'a', encoding='utf-8') as ausgabe:
+                ausgabe.write('\n'.join(neue_zeilen) + '\n')
+
+        zeilen += neue_zeilen
+        anzahl_variationen += len(neue_zeilen)
+        genutzte_variationen = max(genutzte_variationen, max(neue_indizes)+1)
+        indizes, bewertungen = _Berechnen_Und_Bewerten(einstellungen=einstellungen,
+            gesamtvergleichsdaten=gesamtvergleichsdaten, pool=pool, fortsetzen=True)
+        bewertung_je_index = _Bewertungen_Je_Index(indizes=indizes, bewertungen=bewertungen)
+
+        beste_bewertung = min([bewertung_je_index[idx] for idx in range(genutzte_variationen)])
+        print('# Beste Bewertung nach Runde ' + str(runde) + ': ' + str(beste_bewertung) \
+            + ' (' + str(genutzte_variationen) + ' Variationen)')
+
+    return True
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Sensitivitaetseinstellungen(einstellungen):
+    """Lese die Einstellungen der Sensitivitaetsanalyse aus einstellungen['Sensitivitaet'] und
+    ergaenze fehlende Eintraege mit Standardwerten. Gibt ein dict mit allen Einstellungen zurueck
+    oder None, falls ein Eintrag ungueltig ist.
+    """
+    sensitivitaet = einstellungen.get('Sensitivitaet', dict())
+    trajektorien = sensitivitaet.get('Trajektorien', 10)
+    stufen = sensitivitaet.get('Stufen', 4)
+    schwellwert = sensitivitaet.get('Schwellwert', 0.1)
+    ausgabedatei = sensitivitaet.get('Ausgabedatei', 'einstellungen_reduziert.json')
+
+    if ((trajektorien < 2) or (stufen < 2) or (stufen % 2 != 0)):
+        print('# Abbruch: Sensitivitaet benoetigt mindestens zwei Trajektorien und eine gerade Anzahl ' \
+            + 'an Stufen')
+        return None
+
+    return dict([('trajektorien', trajektorien), ('stufen', stufen), ('schwellwert', schwellwert),
+        ('ausgabedatei', ausgabedatei)])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Morris_Trajektorie(einstellungen, stufen, zufallsgenerator, bedingungen, max_versuche=100):
+    """Erzeuge eine Trajektorie fuer die Methode der Elementareffekte nach Morris. Ausgehend von
+    einem zufaelligen Punkt auf einem Gitter mit stufen Stufen je variiertem Parameter wird jeder
+    Parameter in zufaelliger Reihenfolge einmal um den normierten Schritt stufen/(2*(stufen-1))
+    veraendert. Erfuellt ein Punkt die bedingungen nicht, wird die Trajektorie bis zu max_versuche
+    mal neu erzeugt. Gibt [zeilen, spalten, schritte] mit den Punkten als Text, dem veraenderten
+    Parameter und dem normierten Schritt je Uebergang zurueck oder None, falls keine gueltige
+    Trajektorie gefunden wurde.
+    """
+    from .hilfen import Runden_Auf_Signifikante_Stellen
+    from .versuchsliste import Bedingungen_Erfuellt
+
+    optimierungsraum = einstellungen['Optimierungsraum']
+    untergrenzen = optimierungsraum['Werte (min)']
+    obergrenzen = optimierungsraum['Werte (max)']
+    variiert = [idx for idx, anzahl in enumerate(optimierungsraum['Variationen']) if (anzahl > 0)]
+    schritt = stufen/(2.0*(stufen-1))
+
+    for versuch in range(max_versuche):
+        punkt = [0.0 for x in untergrenzen]
+        for idx in variiert:
+            punkt[idx] = zufallsgenerator.randrange(stufen)/(stufen-1.0)
+
+        reihenfolge = list(variiert)
+        zufallsgenerator.shuffle(reihenfolge)
+        punkte = [list(punkt)]
+        schritte = []
+        for idx in reihenfolge:
+            if (punkt[idx] + schritt <= 1.0 + 1e-12):
+                schritte += [schritt]
+            else:
+                schritte += [-schritt]
+
+            punkt[idx] += schritte[-1]
+            punkte += [list(punkt)]
+
+        werte = [[Runden_Auf_Signifikante_Stellen(wert=untergrenzen[idx] \
+            + anteil*(obergrenzen[idx] - untergrenzen[idx]), stellen=6)
+            for idx, anteil in enumerate(einheitspunkt)] for einheitspunkt in punkte]
+        if (all([Bedingungen_Erfuellt(bedingungen=bedingungen, eintraege=zeile) for zeile in werte])):
+            return [[' '.join([str(x) for x in zeile]) for zeile in werte], reihenfolge, schritte]
+
+    return None
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Sensitivitaet_Ermitteln(einstellungen, gesamtvergleichsdaten, pool=None):
+    """Schaetze den Einfluss jedes variierten Parameters (Variationen groesser Null) auf die
+    Gesamtbewertung aus Bewerte_Ergebnisse mit der Methode der Elementareffekte nach Morris. Dazu
+    werden alle Punkte von einstellungen['Sensitivitaet']['Trajektorien'] Trajektorien (siehe
+    _Morris_Trajektorie) in die Variationsdatei geschrieben und gemeinsam berechnet. Parameter, deren
+    mittlerer absoluter Elementareffekt unter 'Schwellwert' mal dem groessten liegt, gelten als
+    unempfindlich. Sie werden in einer Kopie der einstellungen auf ihren Wert in der besten Variation
+    festgesetzt (Variationen = 0), die als 'Ausgabedatei' gespeichert wird. Gibt True zurueck, falls
+    die Sensitivitaet ermittelt werden konnte, ansonsten False.
+    """
+    import copy
+    import os
+    import random
+    from .dateneinlesen import JSONDateiSpeichern
+    from .versuchsliste import Bedingungen_Kompilieren, Zufallsstartwert
+
+    # Die reduzierten Einstellungen sollen keine waehrend der Analyse gesetzten Werte enthalten
+    reduzierte_einstellungen = copy.deepcopy(einstellungen)
+    sensitivitaet = _Sensitivitaetseinstellungen(einstellungen=einstellungen)
+    bedingungen = Bedingungen_Kompilieren(einstellungen=einstellungen)
+    if ((sensitivitaet is None) or (bedingungen is None)):
+        return False
+
+    if (einstellungen.get('Variationsstrom', False)):
+        print('# Warnung: Variationsstrom bei der Sensitivitaet nicht moeglich, erstelle Variationsdatei')
+        einstellungen['Variationsstrom'] = False
+
+    optimierungsraum = einstellungen['Optimierungsraum']
+    variiert = [idx for idx, anzahl in enumerate(optimierungsraum['Variationen']) if (anzahl > 0)]
+    if (variiert == []):
+        print('# Abbruch: Keine variierten Parameter fuer die Sensitivitaet vorhanden')
+        return False
+
+    zufallsgenerator = random.Random(Zufallsstartwert(einstellungen=einstellungen))
+    zeilenindizes = dict()
+    trajektorien = []
+    for idx_trajektorie in range(sensitivitaet['trajektorien']):
+        trajektorie = _Morris_Trajektorie(einstellungen=einstellungen, stufen=sensitivitaet['stufen'],
+            zufallsgenerator=zufallsgenerator, bedingungen=bedingungen)
+        if (trajektorie is None):
+            print('# Abbruch: Keine Trajektorie gefunden, welche die Bedingungen erfuellt')
+            return False
+
+        punkte, reihenfolge, schritte = trajektorie
+        for zeile in punkte:
+            zeilenindizes.setdefault(zeile, len(zeilenindizes))
+
+        trajektorien += [[[zeilenindizes[zeile] for zeile in punkte], reihenfolge, schritte]]
+
+    zeilen = sorted(zeilenindizes.keys(), key=lambda zeile: zeilenindizes[zeile])
+    print('# Sensitivitaet mit ' + str(len(trajektorien)) + ' Trajektorien (' + str(len(zeilen)) \
+        + ' Variationen)')
+    variationsdatei = einstellungen['Arbeitsverzeichnis'] + os.sep + einstellungen['Ausgabedatei_Variationen']
+    with open(variationsdatei, 'w', encoding='utf-8') as ausgabe:
+        ausgabe.write('\n'.join(zeilen) + '\n')
+
+    indizes, bewertungen = _Berechnen_Und_Bewerten(einstellungen=einstellungen,
+        gesamtvergleichsdaten=gesamtvergleichsdaten, pool=pool, fortsetzen=False)
+    if (bewertungen[0:1] in [[], [None]]):
+        print('# Abbruch: Keine brauchbaren Ergebnisse fuer die Sensitivitaet')
+        return False
+
+    bewertung_je_index = _Bewertungen_Je_Index(indizes=indizes, bewertungen=bewertungen)
+    elementareffekte = dict([(idx, []) for idx in variiert])
+    for indizes_trajektorie, reihenfolge, schritte in trajektorien:
+        for idx_schritt, idx_parameter in enumerate(reihenfolge):
+            davor = bewertung_je_index[indizes_trajektorie[idx_schritt]]
+            danach = bewertung_je_index[indizes_trajektorie[idx_schritt+1]]
+            if ((davor != float('inf')) and (danach != float('inf'))):
+                elementareffekte[idx_parameter] += [(danach - davor)/schritte[idx_schritt]]
+
+    mittelwerte = dict()
+    for idx in variiert:
+        effekte = elementareffekte[idx]
+        if (effekte == []):
+            mittelwerte[idx] = None
+        else:
+            mittelwerte[idx] = sum([abs(x) for x in effekte])/len(effekte)
+
+    groesster_effekt = max([0.0] + [x for x in mittelwerte.values() if (x is not None)])
+    beste_variation = [float(x) for x in zeilen[indizes[0]].split(' ')]
+
+    print('\n# Mittlerer absoluter Elementareffekt (mu*) und Standardabweichung (sigma) je Parameter\n')
+    reduzierter_raum = reduzierte_einstellungen['Optimierungsraum']
+    for idx in variiert:
+        effekte = elementareffekte[idx]
+        bezeichnung = optimierungsraum['Bezeichnungen'][idx]
+        if (mittelwerte[idx] is None):
+            print('{:>16s}: keine gueltigen Elementareffekte'.format(bezeichnung))
+            continue
+
+        mittel = sum(effekte)/len(effekte)
+        streuung = (sum([(x - mittel)**2 for x in effekte])/len(effekte))**0.5
+        textzeile = '{:>16s}: mu* = {:12.5f}, sigma = {:12.5f}'.format(bezeichnung, mittelwerte[idx],
+            streuung)
+        if (mittelwerte[idx] < sensitivitaet['schwellwert']*groesster_effekt):
+            reduzierter_raum['Werte (min)'][idx] = beste_variation[idx]
+            reduzierter_raum['Werte (max)'][idx] = beste_variation[idx]
+            reduzierter_raum['Variationen'][idx] = 0
+            textzeile += ' -> festgesetzt auf ' + str(beste_variation[idx])
+
+        print(textzeile)
+
+    print('')
+    JSONDateiSpeichern(datensatz=reduzierte_einstellungen, dateiname=sensitivitaet['ausgabedatei'])
+    print('# Reduzierte Einstellungen in ' + sensitivitaet['ausgabedatei'] + ' gespeichert')
+    return True
@@ -23,7 +23,7 @@ optionsverarbeitung.py   v0.6
 
 
 # -------------------------------------------------------------------------------------------------
-def Hilfsausgabe(optionen):
+def Hilfsausgabe(optionen, zusatzoptionen=[]):
     """Gib Benutzungshinweise in der Konsole aus.
     """
     print('Das Programm kann interaktiv oder mit allen folgenden Argumenten aufgerufen werden:')
@@ -39,6 +39,10 @@ def Hilfsausgabe(optionen):
             else:
                 optionsuebersicht += '\n' + einrueckung + unteroption[1] + ': '  + unteroption[0]
 
+    for option in zusatzoptionen:
+        schalter += ' [-' + option[1] + '=' + option[2] + ']'
+        optionsuebersicht += '\n   -' + option[1] + '=' + option[2] + ': ' + option[0] + ' (optional)'
+
     print('python3 MPO.pyz' + schalter)
     print(optionsuebersicht)
     return None
@@ -46,21 +50,28 @@ def Hilfsausgabe(optionen):
 
 
 # -------------------------------------------------------------------------------------------------
-def _Uebergabewerte_Interpretieren(optionen, argumente):
+def _Uebergabewerte_Interpretieren(optionen, argumente, zusatzoptionen=[]):
     """Vergleiche die uebergebenen argumente, ob sie den in optionen definierten Erwartungswerten
-    entsprechen. Es wird ein dict mit den eingelesenen Werten zurueckgegeben.
+    entsprechen. Die zusatzoptionen sind optional und koennen beliebige Werte annehmen, ansonsten
+    wird ihr Standardwert verwendet. Es wird ein dict mit den eingelesenen Werten zurueckgegeben.
     Falls -h oder --help uebergeben wird oder die argumente nicht einwandfrei eingelesen werden
     können, wird die Hilfsausgabe aufgerufen. In diesem Fall wird None zurueckgegeben.
     """
     if ((len(argumente) == 1) and ((argumente[0] == '-h') or (argumente[0] == '--help'))):
-        return Hilfsausgabe(optionen)
+        return Hilfsausgabe(optionen, zusatzoptionen)
 
     gesamtoptionen = dict()
     argument_bezeichner = [elem.split('=')[0][1:] for elem in argumente]
+    for option in zusatzoptionen:
+        gesamtoptionen.update([(option[1], option[3])])
+        for idx_arg, arg in enumerate(argument_bezeichner):
+            if (option[1] == arg):
+                gesamtoptionen.update([(option[1], argumente[idx_arg].split('=', 1)[1])])
+
     for option in optionen:
         if (option[1] not in argument_bezeichner):
             print('# Abbruch: Argument -' + option[1] + ' nicht vorhanden')
-            return Hilfsausgabe(optionen)
+            return Hilfsausgabe(optionen, zusatzoptionen)
         else:
             unteroptionen = [unteropt[1] for unteropt in option[2]]
             for idx_arg, arg in enumerate(argument_bezeichner):
@@ -69,7 +80,7 @@ def _Uebergabewerte_Interpretieren(optionen, argumente):
                     if (wert_eingelesen not in unteroptionen):
                         print('# Abbruch: Ungueltiger Wert ' + wert_eingelesen + ' für Argument -' \
                             + option[1])
-                        return Hilfsausgabe(optionen)
+                        return Hilfsausgabe(optionen, zusatzoptionen)
 
                     if (option[1] in gesamtoptionen):
                         print('# Warnung: Argument -' + option[1] + ' mehr als einmal uebergeben')
@@ -118,12 +129,12 @@ def _Auswahlliste_Zahleneingabe(beschreibung, optionen, max_iterationen=10):
 
 
 # -------------------------------------------------------------------------------------------------
-def _Interaktive_Optionsauswahl(optionen):
+def _Interaktive_Optionsauswahl(optionen, zusatzoptionen=[]):
     """Lese die uebergebenen optionen über eine Benutzereingabe ein. Gibt ein dict mit den Werten
-    aus optionen und der Benutzereingabe zuruck. Falls die Eingabe beendet worden ist, wird None
-    zurueckgegeben.
+    aus optionen und der Benutzereingabe zuruck (fuer zusatzoptionen jeweils der Standardwert).
+    Falls die Eingabe beendet worden ist, wird None zurueckgegeben.
     """
-    gesamtoptionen = dict()
+    gesamtoptionen = dict([(option[1], option[3]) for option in zusatzoptionen])
     for option in optionen:
         auswahl = _Auswahlliste_Zahleneingabe(beschreibung=option[0],
             optionen=option[2])
@@ -147,13 +158,23 @@ def Optionen_verarbeiten(argumente=[]):
         ['Was soll getan werden?', 'cmd',
             [['Alles abarbeiten', 'normal'],
             ['Liste mit Variationen erstellen', 'liste_erstellen'],
-            ['Bestehende Liste mit Variationen nutzen', 'nutze_liste']]]]
+            ['Bestehende Liste mit Variationen nutzen', 'nutze_liste'],
+            ['Unterbrochenen Durchlauf fortsetzen', 'fortsetzen'],
+            ['Gitter schrittweise um die besten Variationen verfeinern', 'verfeinern'],
+            ['Einfluss der Parameter ermitteln und unempfindliche festsetzen', 'sensitivitaet'],
+            ['Als entfernter Arbeiter fuer einen Pool unter -adresse rechnen', 'arbeiter']]]]
+
+    # Zusatzoptionen mit Beschreibung, Name, Platzhalter und Standardwert
+    zusatzoptionen = [
+        ['Adresse des Pools fuer entfernte Arbeiter', 'adresse', 'host:port', None],
+        ['Anzahl gleichzeitiger Berechnungen (Standard: nutzbare CPUs - 1)', 'jobs', 'n', None]]
 
     if (len(argumente) == 0):
-        optionen_formatiert = _Interaktive_Optionsauswahl(optionen=programmoptionen)
+        optionen_formatiert = _Interaktive_Optionsauswahl(optionen=programmoptionen,
+            zusatzoptionen=zusatzoptionen)
     else:
         optionen_formatiert = _Uebergabewerte_Interpretieren(optionen=programmoptionen,
-            argumente=argumente)
+            argumente=argumente, zusatzoptionen=zusatzoptionen)
 
     return optionen_formatiert
 
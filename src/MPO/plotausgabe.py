@@ -58,7 +58,7 @@ def Plots_Erstellen(einstellungen, gesamtbodendaten, indizes):
     matplotlib.use('Agg')
 
     from matplotlib import pyplot
-    from .dateneinlesen import JSONDateiEinlesen, CSV_Ergebnisse_Einlesen
+    from .dateneinlesen import JSONDateiEinlesen, CSV_Ergebnisse_Einlesen, Existenz_Datei
     from .hilfen import Daten_Reduzieren
 
     pyplot, fig1, ax1 = PlotVorbereiten(plotbreite=8.0, plothoehe=7.0)
@@ -97,7 +97,12 @@ def Plots_Erstellen(einstellungen, gesamtbodendaten, indizes):
         for idx_plot, idx_versuch in enumerate(reversed(indizes[:num_plots])):
             num_versuch = str(idx_versuch).zfill(6)
             idx_leg = start_topplots + num_plots_legende - idx_plot
-            werte = CSV_Ergebnisse_Einlesen(dateiname=basisdatei + '_' + num_versuch + '.csv')
+            ergebnisdatei = basisdatei + '_' + num_versuch + '.csv'
+            # Abgebrochene Berechnungen (bspw. wegen Zeitueberschreitung) haben keine Ergebnisdatei
+            if (not Existenz_Datei(dateiname=ergebnisdatei)):
+                continue
+
+            werte = CSV_Ergebnisse_Einlesen(dateiname=ergebnisdatei)
             werte_red = Daten_Reduzieren(daten=werte, intervall=200)
             if (werte_red is None):
                 continue
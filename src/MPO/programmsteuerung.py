@@ -22,132 +22,1321 @@ programmsteuerung.py   v0.5
 # along with MPO. If not, see <http://www.gnu.org/licenses/>.
 
 
+import threading
+
+# Laufende Berechnungsprogramme dieses Prozesses und ob noch neue gestartet werden duerfen
+# (siehe Laufende_Programme_Beenden)
+_laufende_programme = dict([('prozesse', set()), ('beendet', False), ('sperre', threading.Lock())])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Prozessgruppe_Beenden(prozess):
+    """Beende prozess samt aller von ihm gestarteten Prozesse. Unter POSIX-Systemen wird dazu die
+    ganze Prozessgruppe beendet (der Prozess muss mit start_new_session=True gestartet worden sein).
+    """
+    import os
+    import signal
+
+    try:
+        if (os.name == 'posix'):
+            os.killpg(prozess.pid, signal.SIGKILL)
+        else:
+            prozess.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+    prozess.wait()
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Laufende_Programme_Beenden():
+    """Beende die Prozessgruppen aller Berechnungsprogramme, die in diesem Prozess gerade (auch aus
+    anderen Threads) mit Programmausfuehrung_Ausgabe ausgefuehrt werden. Anschliessend werden keine
+    neuen Programme mehr gestartet. Da die Programme in einer eigenen Sitzung laufen, muss ein
+    Arbeiter das beim Beenden (bspw. durch Strg+C oder SIGTERM) selbst erledigen.
+    """
+    with _laufende_programme['sperre']:
+        _laufende_programme['beendet'] = True
+        prozesse = list(_laufende_programme['prozesse'])
+
+    for prozess in prozesse:
+        _Prozessgruppe_Beenden(prozess=prozess)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Programmausfuehrung_Ausgabe(befehl, bezugsordner='.', nachricht_abbruch='Undefinierter Fehler',
+    max_laufzeit=None, max_cpuzeit=None, wiederholungen=0, ausgabe_erfassen=False):
+    """Fuehrt mit dem uebergebenen befehl (als Liste) einen Systemaufruf durch und gibt den Status
+    'erfolgreich', 'fehlgeschlagen' oder 'zeitueberschreitung' sowie die Standardausgabe des Aufrufs
+    als Text zurueck. Die Standardausgabe wird nur mit ausgabe_erfassen=True ueber eine Pipe
+    eingelesen, ansonsten wird sie nicht umgeleitet und None zurueckgegeben. Ueberschreitet der Aufruf
+    max_laufzeit (Sekunden Wanduhrzeit) oder max_cpuzeit (Sekunden CPU-Zeit, nur POSIX), wird
+    seine Prozessgruppe beendet. Fehlgeschlagene Aufrufe werden bis zu wiederholungen mal erneut
+    gestartet, Zeitueberschreitungen nicht. Bei Misserfolg wird nachricht_abbruch ausgegeben.
+    Der Aufruf wird in bezugsordner ausgefuehrt, ohne das Arbeitsverzeichnis des aufrufenden
+    Prozesses zu aendern. Daher kann die Funktion auch aus mehreren Threads gleichzeitig genutzt
+    werden. Alle laufenden Aufrufe koennen mit Laufende_Programme_Beenden beendet werden.
+    """
+    import os
+    import signal
+    import subprocess
+
+    startoptionen = dict([('cwd', bezugsordner)])
+    if (ausgabe_erfassen):
+        startoptionen.update([('stdout', subprocess.PIPE), ('universal_newlines', True)])
+
+    cpu_begrenzung_nachtraeglich = False
+    if (os.name == 'posix'):
+        import resource
+
+        startoptionen.update([('start_new_session', True)])
+        if (max_cpuzeit is not None):
+            grenze = int(max_cpuzeit + 0.5)
+            # preexec_fn ist in Prozessen mit mehreren Threads nicht sicher. Wenn moeglich wird die
+            # Grenze daher direkt nach dem Start von aussen gesetzt
+            if (hasattr(resource, 'prlimit')):
+                cpu_begrenzung_nachtraeglich = True
+            else:
+                def _CPU_Zeit_Begrenzen():
+                    resource.setrlimit(resource.RLIMIT_CPU, (grenze, grenze+1))
+
+                startoptionen.update([('preexec_fn', _CPU_Zeit_Begrenzen)])
+
+    if (_laufende_programme['beendet']):
+        return ['fehlgeschlagen', None]
+
+    print('# ' + ' '.join(befehl))
+    status = 'fehlgeschlagen'
+    ausgabe = None
+    for idx_versuch in range(wiederholungen+1):
+        if (_laufende_programme['beendet']):
+            break
+
+        if (idx_versuch > 0):
+            print('# Wiederhole (' + str(idx_versuch) + '/' + str(wiederholungen) + '): ' + ' '.join(befehl))
+
+        try:
+            prozess = subprocess.Popen(befehl, shell=False, **startoptionen)
+        except:
+            print('# Fehler: ' + nachricht_abbruch)
+            continue
+
+        with _laufende_programme['sperre']:
+            abgebrochen = _laufende_programme['beendet']
+            if (not abgebrochen):
+                _laufende_programme['prozesse'].add(prozess)
+
+        if (abgebrochen):
+            # Laufende_Programme_Beenden wurde waehrend des Starts aufgerufen
+            _Prozessgruppe_Beenden(prozess=prozess)
+            break
+
+        if (cpu_begrenzung_nachtraeglich):
+            try:
+                resource.prlimit(prozess.pid, resource.RLIMIT_CPU, (grenze, grenze+1))
+            except (ProcessLookupError, OSError):
+                pass
+
+        try:
+            # communicate liest die Standardausgabe (falls erfasst) waehrend der Ausfuehrung ein,
+            # damit das Programm nicht an einer vollen Pipe haengen bleibt
+            ausgabe = prozess.communicate(timeout=max_laufzeit)[0]
+            rueckgabewert = prozess.returncode
+        except subprocess.TimeoutExpired:
+            _Prozessgruppe_Beenden(prozess=prozess)
+            # Bereits erhaltene Ausgaben bleiben erhalten (bspw. fertige Variationen eines Stapels)
+            ausgabe = prozess.communicate()[0]
+            print('# Abbruch: Maximale Laufzeit ueberschritten - ' + nachricht_abbruch)
+            status = 'zeitueberschreitung'
+            break
+        except:
+            _Prozessgruppe_Beenden(prozess=prozess)
+            raise
+        finally:
+            with _laufende_programme['sperre']:
+                _laufende_programme['prozesse'].discard(prozess)
+
+        if (_laufende_programme['beendet']):
+            break
+
+        if (rueckgabewert == 0):
+            status = 'erfolgreich'
+            break
+        elif ((os.name == 'posix') and (rueckgabewert in [-signal.SIGXCPU, -signal.SIGKILL]) \
+            and (max_cpuzeit is not None)):
+            print('# Abbruch: Maximale CPU-Zeit ueberschritten - ' + nachricht_abbruch)
+            status = 'zeitueberschreitung'
+            break
+        else:
+            print('# Abbruch: Rueckgabewert ungleich Null - ' + nachricht_abbruch)
+
+    return [status, ausgabe]
+
+
+
 # -------------------------------------------------------------------------------------------------
-def Programmausfuehrung(befehl, bezugsordner='.', nachricht_abbruch='Undefinierter Fehler'):
+def Programmausfuehrung_Status(befehl, bezugsordner='.', nachricht_abbruch='Undefinierter Fehler', **kwargs):
+    """Fuehrt mit dem uebergebenen befehl (als Liste) einen Systemaufruf durch und gibt den Status
+    'erfolgreich', 'fehlgeschlagen' oder 'zeitueberschreitung' zurueck. Weitere Optionen
+    (max_laufzeit, max_cpuzeit, wiederholungen) werden an Programmausfuehrung_Ausgabe weitergegeben.
+    """
+    return Programmausfuehrung_Ausgabe(befehl=befehl, bezugsordner=bezugsordner,
+        nachricht_abbruch=nachricht_abbruch, **kwargs)[0]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Programmausfuehrung(befehl, bezugsordner='.', nachricht_abbruch='Undefinierter Fehler', **kwargs):
     """Fuehrt mit dem uebergebenen befehl (als Liste) einen Systemaufruf durch. Wenn der Aufruf
     erfolgreich war, gibt die Funktion True zurueck, sonst False. Bei Misserfolg oder wenn der
     Rueckgabewert einer nicht erfolgreichen Ausfuehrung entspricht wird nachricht_abbruch ausgegeben.
+    Weitere Optionen (max_laufzeit, max_cpuzeit, wiederholungen) werden an
+    Programmausfuehrung_Ausgabe weitergegeben.
+    """
+    status = Programmausfuehrung_Status(befehl=befehl, bezugsordner=bezugsordner,
+        nachricht_abbruch=nachricht_abbruch, **kwargs)
+    return (status == 'erfolgreich')
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Eintrag_Aufloesen(kontext, eintrag):
+    """Gib die Parameter einer Variation als Liste zurueck. Beim Variationsstrom ist eintrag nur der
+    Gitterindex, aus dem die Parameter mit der Beschreibung des Gitters in kontext erzeugt werden.
+    """
+    if (kontext['variationsquelle'] is None):
+        return eintrag
+
+    from .versuchsliste import Gitterpunkt_Eintrag
+
+    return Gitterpunkt_Eintrag(gitter=kontext['variationsquelle'], gitterindex=eintrag)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Simulationsargumente(kontext, idx_zeile, eintrag):
+    """Stelle die Argumente fuer eine Berechnung der Variation idx_zeile mit den Parametern aus
+    eintrag zusammen. Gibt die Liste der Argumente (ohne Programmname) und den Namen der
+    Ergebnisdatei zurueck. Bei der Ausgabe ueber stdout wird dem Programm statt der Ergebnisdatei
+    "-" uebergeben.
+    """
+    eintrag = _Eintrag_Aufloesen(kontext=kontext, eintrag=eintrag)
+
+    # Der Name der Ausgabedatei bleibt relativ, da die Programme nur kurze Dateinamen verarbeiten koennen
+    ausgabedatei = kontext['str_versuch'] + '_' + kontext['dateiname'] + '_' + str(idx_zeile).zfill(6) + '.csv'
+    programmausgabe = ausgabedatei
+    if (kontext['ausgabe'] == 'stdout'):
+        programmausgabe = '-'
+
+    return [[*kontext['args_davor'], *eintrag, *kontext['args_danach'], programmausgabe], ausgabedatei]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Kurve_Behalten(kontext, abweichungstext):
+    """Pruefe anhand der Abweichungen (Text wie in der Ausgabedatei der Differenzen), ob die
+    Ergebniskurve einer Variation gespeichert werden soll. Ohne Schwellwert ('Kurven speichern')
+    werden bei der Ausgabe in Dateien alle Kurven behalten und bei der Ausgabe ueber stdout keine.
+    Mit Schwellwert werden nur Kurven mit einer Bewertung kleiner oder gleich dem Schwellwert
+    behalten.
+    """
+    from .abweichung import Differenzzeile_Bewerten
+
+    schwellwert = kontext['kurven_schwellwert']
+    if (schwellwert is None):
+        return (kontext['ausgabe'] != 'stdout')
+
+    bewertung = Differenzzeile_Bewerten(zeile=abweichungstext)
+    return ((bewertung is not None) and (bewertung <= schwellwert))
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Kurve_Schreiben(dateiname, simulationsergebnisse):
+    """Schreibe die simulationsergebnisse (zeilenweise Liste an Zahlen) als Ergebnisdatei dateiname
+    im gleichen Format wie die Berechnungsprogramme (Leerzeichen als Trenner, keine Kopfzeile).
+    """
+    with open(dateiname, 'w', encoding='utf-8') as ausgabe:
+        for zeile in simulationsergebnisse:
+            ausgabe.write('   '.join(['{:13.6f}'.format(x) for x in zeile]) + '\n')
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Differenzen_Auswerten_Stapel(kontext, simulationsergebnisse_stapel):
+    """Bestimme fuer jede der simulationsergebnisse in simulationsergebnisse_stapel die Werte an den
+    Stuetzstellen und deren Differenz zu den vergleichsdaten. Alle Simulationen, die die
+    Stuetzstellen abdecken, werden gemeinsam bewertet (siehe Differenzen_An_Stuetzstellen_Stapel).
+    Gibt je Simulation die Differenzen als Text fuer die Ausgabedatei der Differenzen und die Werte an
+    den Stuetzstellen zurueck (None, falls die Stuetzstellen nicht abgedeckt werden).
+    """
+    from .abweichung import Simulationswerte_An_Stuetzstellen, Differenzen_An_Stuetzstellen_Stapel, \
+        Berechnung_Differenzen_Daten
+
+    auswertungen = []
+    gueltige_simwerte = []
+    for simulationsergebnisse in simulationsergebnisse_stapel:
+        simwerte = Simulationswerte_An_Stuetzstellen(einstellungen=kontext['einstellungen'],
+            str_versuch=kontext['str_versuch'], simulationsergebnisse=simulationsergebnisse)
+        if (simwerte[0] == []):
+            abweichungen = Berechnung_Differenzen_Daten(einstellungen=kontext['einstellungen'],
+                vergleichsdaten=kontext['vergleichsdaten'], str_versuch=kontext['str_versuch'],
+                simulationsergebnisse=simulationsergebnisse)
+            auswertungen += [[', '.join([str(x) for x in abweichungen]), None]]
+        else:
+            gueltige_simwerte += [simwerte]
+            auswertungen += [[None, simwerte]]
+
+    stapelabweichungen = Differenzen_An_Stuetzstellen_Stapel(einstellungen=kontext['einstellungen'],
+        vergleichsdaten=kontext['vergleichsdaten'], simwerte_stapel=gueltige_simwerte,
+        skalierungen=kontext['skalierungen'])
+    idx_gueltig = 0
+    for auswertung in auswertungen:
+        if (auswertung[1] is not None):
+            auswertung[0] = ', '.join([str(x) for x in stapelabweichungen[idx_gueltig]])
+            idx_gueltig += 1
+
+    return auswertungen
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Differenzen_Auswerten(kontext, simulationsergebnisse):
+    """Bestimme die Werte der simulationsergebnisse an den Stuetzstellen und deren Differenz zu den
+    vergleichsdaten. Gibt die Differenzen als Text fuer die Ausgabedatei der Differenzen und die
+    Werte an den Stuetzstellen zurueck (None, falls die Stuetzstellen nicht abgedeckt werden).
+    """
+    return _Differenzen_Auswerten_Stapel(kontext=kontext,
+        simulationsergebnisse_stapel=[simulationsergebnisse])[0]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Ausgabe_Einlesen(kontext, ausgabe, ausgabedatei):
+    """Lies die Ergebnisse einer Variation ein. Bei der Ausgabe ueber stdout werden sie aus dem Text
+    ausgabe gelesen, ansonsten aus der Ergebnisdatei ausgabedatei. Es werden nur die Spalten und
+    Zeilen eingelesen, die fuer den Vergleich mit den vergleichsdaten benoetigt werden (siehe
+    CSV_Spalten_Einlesen). Gibt die Ergebnisse zurueck oder None, falls keine Ergebnisse vorhanden
+    sind.
+    """
+    import os
+    from .dateneinlesen import CSV_Spalten_Einlesen
+    from .abweichung import Stuetzstellenbereich
+
+    x_bereich = Stuetzstellenbereich(einstellungen=kontext['einstellungen'], str_versuch=kontext['str_versuch'])
+    if (kontext['ausgabe'] == 'stdout'):
+        simulationsergebnisse = CSV_Spalten_Einlesen(text=ausgabe, anzahl_spalten=len(kontext['vergleichsdaten']),
+            x_bereich=x_bereich)
+    else:
+        simulationsergebnisse = CSV_Spalten_Einlesen(dateiname=os.path.join(kontext['arbeitsverzeichnis'],
+            ausgabedatei), anzahl_spalten=len(kontext['vergleichsdaten']), x_bereich=x_bereich)
+
+    if (len(simulationsergebnisse) == 0):
+        print('# Abbruch: Keine Ergebnisse vom Berechnungsprogramm erhalten (' + ausgabedatei + ')')
+        return None
+
+    return simulationsergebnisse
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Ausgabe_Abschliessen(kontext, ausgabe, ausgabedatei, abweichungstext):
+    """Behalte oder entferne die Ergebnisse einer Variation anhand ihrer Abweichungen (siehe
+    _Kurve_Behalten). Bei der Ausgabe ueber stdout wird der Text ausgabe nur in die Ergebnisdatei
+    ausgabedatei geschrieben, wenn die Kurve behalten werden soll. Ansonsten wird ausgabedatei ggfs.
+    entfernt.
+    """
+    import os
+
+    dateipfad = os.path.join(kontext['arbeitsverzeichnis'], ausgabedatei)
+    behalten = _Kurve_Behalten(kontext=kontext, abweichungstext=abweichungstext)
+    if (kontext['ausgabe'] == 'stdout'):
+        if (behalten):
+            with open(dateipfad, 'w', encoding='utf-8') as ergebnisdatei:
+                ergebnisdatei.write(ausgabe)
+    elif (not behalten):
+        os.remove(dateipfad)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Ausgabe_und_Differenz(kontext, ausgabe, ausgabedatei):
+    """Bestimme die Differenz zu den vergleichsdaten aus den Ergebnissen einer Variation. Bei der
+    Ausgabe ueber stdout werden die Ergebnisse aus dem Text ausgabe gelesen und nur in die
+    Ergebnisdatei ausgabedatei geschrieben, wenn die Kurve behalten werden soll. Ansonsten wird
+    ausgabedatei eingelesen und ggfs. danach entfernt. Gibt den Status, die Differenzen als Text
+    fuer die Ausgabedatei der Differenzen und die Werte an den Stuetzstellen zurueck.
+    """
+    simulationsergebnisse = _Ausgabe_Einlesen(kontext=kontext, ausgabe=ausgabe, ausgabedatei=ausgabedatei)
+    if (simulationsergebnisse is None):
+        return ['fehlgeschlagen', '-1.0', None]
+
+    abweichungstext, simwerte = _Differenzen_Auswerten(kontext=kontext,
+        simulationsergebnisse=simulationsergebnisse)
+    _Ausgabe_Abschliessen(kontext=kontext, ausgabe=ausgabe, ausgabedatei=ausgabedatei,
+        abweichungstext=abweichungstext)
+    return ['erfolgreich', abweichungstext, simwerte]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Simulation_und_Differenz(kontext, idx_zeile, eintrag):
+    """Diese Funktion wird von den Arbeiterprozessen fuer jede Variation aufgerufen, um das
+    Berechnungsprogramm mit den Parametern aus eintrag zu starten und die Differenz zu den
+    vergleichsdaten zu bestimmen. Alle fuer einen Versuch gleichbleibenden Werte (Programmname,
+    Argumente, einstellungen, vergleichsdaten, ...) werden im dict kontext uebergeben.
+    Gibt den Status der Programmausfuehrung, die Differenzen als Text fuer die Ausgabedatei der
+    Differenzen, die benoetigte Zeit und die Werte an den Stuetzstellen (fuer den Ergebnisspeicher)
+    zurueck.
+    """
+    import os
+    import time
+
+    startzeit = time.time()
+
+    # Das Programm wird mit absolutem Pfad im Arbeitsverzeichnis gestartet
+    arbeitsverzeichnis = kontext['arbeitsverzeichnis']
+    argumente, ausgabedatei = _Simulationsargumente(kontext=kontext, idx_zeile=idx_zeile, eintrag=eintrag)
+
+    status, ausgabe = Programmausfuehrung_Ausgabe(befehl=[os.path.join(arbeitsverzeichnis,
+        kontext['dateiname']), *argumente], bezugsordner=arbeitsverzeichnis,
+        nachricht_abbruch='Ausfuehren des Fortran-Programms fehlgeschlagen',
+        max_laufzeit=kontext['max_laufzeit'], max_cpuzeit=kontext['max_cpuzeit'],
+        wiederholungen=kontext['wiederholungen'], ausgabe_erfassen=(kontext['ausgabe'] == 'stdout'))
+    if (status != 'erfolgreich'):
+        return [status, '-1.0', time.time()-startzeit]
+
+    status, abweichungstext, simwerte = _Ausgabe_und_Differenz(kontext=kontext, ausgabe=ausgabe,
+        ausgabedatei=ausgabedatei)
+    return [status, abweichungstext, time.time()-startzeit, simwerte]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Bibliothek_Berechnen(kontext, eintrag):
+    """Berechne den Versuch mit den Parametern aus eintrag direkt mit der UMAT-Bibliothek des
+    kontext. Gibt die Ergebnisse als zeilenweise Liste zurueck oder None, falls die Berechnung
+    fehlschlaegt.
     """
     import os
+    from .umatbibliothek import UMAT_Versuch_Berechnen
+
+    eintrag = _Eintrag_Aufloesen(kontext=kontext, eintrag=eintrag)
+    simulationsergebnisse = UMAT_Versuch_Berechnen(bibliothek=os.path.join(kontext['arbeitsverzeichnis'],
+        kontext['bibliothek']), belastungspfad=kontext['belastungspfad'],
+        argumente=[*kontext['args_davor'], *eintrag, *kontext['args_danach']], symbol=kontext['symbol'])
+    if ((simulationsergebnisse is None) or (len(simulationsergebnisse) == 0)):
+        return None
+
+    return simulationsergebnisse.tolist()
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Bibliothekskurve_Schreiben(kontext, idx_zeile, eintrag, simulationsergebnisse, abweichungstext):
+    """Schreibe die simulationsergebnisse einer mit der UMAT-Bibliothek berechneten Variation nur
+    dann als Ergebnisdatei, wenn ein Schwellwert fuer das Speichern der Kurven angegeben ist und die
+    Bewertung der Variation ihn nicht ueberschreitet.
+    """
+    import os
+
+    # Ohne Schwellwert werden (wie bei der Ausgabe ueber stdout) keine Kurven gespeichert
+    if ((kontext['kurven_schwellwert'] is not None)
+        and _Kurve_Behalten(kontext=kontext, abweichungstext=abweichungstext)):
+        _, ausgabedatei = _Simulationsargumente(kontext=kontext, idx_zeile=idx_zeile, eintrag=eintrag)
+        _Kurve_Schreiben(dateiname=os.path.join(kontext['arbeitsverzeichnis'], ausgabedatei),
+            simulationsergebnisse=simulationsergebnisse)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Bibliothek_und_Differenz(kontext, idx_zeile, eintrag):
+    """Diese Funktion wird von den Arbeiterprozessen fuer jede Variation aufgerufen, wenn fuer den
+    Versuch eine UMAT-Bibliothek angegeben ist. Der Versuch wird mit den Parametern aus eintrag
+    direkt im Arbeiterprozess berechnet (ohne Programmaufruf) und die Differenz zu den vergleichsdaten
+    bestimmt. Eine Ergebnisdatei wird nur geschrieben, wenn ein Schwellwert fuer das Speichern der
+    Kurven angegeben ist und die Bewertung der Variation ihn nicht ueberschreitet. Gibt die
+    Ergebnisse in gleicher Form wie _Simulation_und_Differenz zurueck.
+    """
+    import time
+
+    startzeit = time.time()
+
+    simulationsergebnisse = _Bibliothek_Berechnen(kontext=kontext, eintrag=eintrag)
+    if (simulationsergebnisse is None):
+        return ['fehlgeschlagen', '-1.0', time.time()-startzeit]
+
+    abweichungstext, simwerte = _Differenzen_Auswerten(kontext=kontext,
+        simulationsergebnisse=simulationsergebnisse)
+    _Bibliothekskurve_Schreiben(kontext=kontext, idx_zeile=idx_zeile, eintrag=eintrag,
+        simulationsergebnisse=simulationsergebnisse, abweichungstext=abweichungstext)
+    return ['erfolgreich', abweichungstext, time.time()-startzeit, simwerte]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Bibliotheksstapel_und_Differenzen(kontext, aufgaben):
+    """Diese Funktion wird von den Arbeiterprozessen fuer einen Stapel von Variationen (Liste aus
+    Tupeln mit idx_zeile und eintrag) aufgerufen, wenn fuer den Versuch eine UMAT-Bibliothek angegeben
+    ist. Alle Variationen werden nacheinander mit der Bibliothek berechnet und anschliessend gemeinsam
+    bewertet (siehe _Differenzen_Auswerten_Stapel). Gibt eine Liste mit dem Ergebnis je Variation in
+    gleicher Form wie _Simulation_und_Differenz zurueck.
+    """
+    import time
+
+    startzeit = time.time()
+
+    berechnet = dict()
+    for idx_stapel, (idx_zeile, eintrag) in enumerate(aufgaben):
+        simulationsergebnisse = _Bibliothek_Berechnen(kontext=kontext, eintrag=eintrag)
+        if (simulationsergebnisse is not None):
+            berechnet[idx_stapel] = simulationsergebnisse
+
+    auswertungen = dict(zip(berechnet.keys(), _Differenzen_Auswerten_Stapel(kontext=kontext,
+        simulationsergebnisse_stapel=list(berechnet.values()))))
+    dauer = (time.time()-startzeit)/len(aufgaben)
+
+    ergebnisse = []
+    for idx_stapel, (idx_zeile, eintrag) in enumerate(aufgaben):
+        if (idx_stapel not in auswertungen):
+            ergebnisse += [['fehlgeschlagen', '-1.0', dauer]]
+            continue
+
+        abweichungstext, simwerte = auswertungen[idx_stapel]
+        _Bibliothekskurve_Schreiben(kontext=kontext, idx_zeile=idx_zeile, eintrag=eintrag,
+            simulationsergebnisse=berechnet[idx_stapel], abweichungstext=abweichungstext)
+        ergebnisse += [['erfolgreich', abweichungstext, dauer, simwerte]]
+
+    return ergebnisse
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Stapelbetrieb_Pruefen(programm, bezugsordner='.'):
+    """Pruefe, ob das Berechnungsprogramm programm den Stapelbetrieb unterstuetzt. Dazu wird es mit
+    dem Argument --stapel-info aufgerufen und muss als erste Zeile "MPO-Stapel 1" ausgeben.
+    Gibt True zurueck, wenn der Stapelbetrieb unterstuetzt wird, sonst False.
+    """
     import subprocess
 
-    aktueller_ordner = os.path.abspath(os.curdir)
-    os.chdir(bezugsordner)
-    print('# ' + ' '.join(befehl))
     try:
-        ergebnis = subprocess.run(befehl, shell=False, check=True)
-    except subprocess.CalledProcessError:
-        print('# Abbruch: ' + nachricht_abbruch)
-        os.chdir(aktueller_ordner)
-        return False
-    except:
-        print('# Fehler: ' + nachricht_abbruch)
-        os.chdir(aktueller_ordner)
+        ausgabe = subprocess.run([programm, '--stapel-info'], cwd=bezugsordner, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, timeout=10, universal_newlines=True)
+    except (OSError, subprocess.SubprocessError):
         return False
 
-    if (ergebnis.returncode == 0):
-        os.chdir(aktueller_ordner)
-        return True
+    zeilen = ausgabe.stdout.splitlines()
+    return ((ausgabe.returncode == 0) and (len(zeilen) > 0) and (zeilen[0].strip() == 'MPO-Stapel 1'))
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Simulationsstapel_und_Differenzen(kontext, aufgaben):
+    """Diese Funktion wird von den Arbeiterprozessen fuer einen Stapel von Variationen (Liste aus
+    Tupeln mit idx_zeile und eintrag) aufgerufen, wenn das Berechnungsprogramm den Stapelbetrieb
+    unterstuetzt. Die Argumente aller Variationen werden zeilenweise in eine Stapeldatei geschrieben,
+    die das Programm mit --stapel <Stapeldatei> in einem einzigen Aufruf abarbeitet. Fuer jede Zeile
+    gibt das Programm "MPO-Stapel <Zeilennummer> <Status>" aus (Status 0 bei Erfolg). Bei der
+    Ausgabe ueber stdout stehen die Ergebnisse einer Zeile direkt vor deren Statusmeldung. Variationen
+    ohne Statusmeldung (bspw. nach einem Absturz oder einer Zeitueberschreitung des Stapels) werden
+    einzeln mit _Simulation_und_Differenz nachgerechnet. Gibt eine Liste mit dem Ergebnis je
+    Variation in gleicher Form wie _Simulation_und_Differenz zurueck.
+    """
+    import os
+    import time
+
+    startzeit = time.time()
+
+    arbeitsverzeichnis = kontext['arbeitsverzeichnis']
+    dateiname = kontext['dateiname']
+    stapeldatei = kontext['str_versuch'] + '_' + dateiname + '_stapel_' + str(aufgaben[0][0]).zfill(6) + '.txt'
+
+    ausgabedateien = []
+    with open(os.path.join(arbeitsverzeichnis, stapeldatei), 'w', encoding='utf-8') as ausgabe:
+        for idx_zeile, eintrag in aufgaben:
+            argumente, ausgabedatei = _Simulationsargumente(kontext=kontext, idx_zeile=idx_zeile,
+                eintrag=eintrag)
+            ausgabe.write(' '.join(argumente) + '\n')
+            ausgabedateien += [ausgabedatei]
+
+    # Die Zeitgrenzen gelten je Variation und werden daher mit der Stapelgroesse skaliert
+    max_laufzeit = kontext['max_laufzeit']
+    if (max_laufzeit is not None):
+        max_laufzeit = max_laufzeit*len(aufgaben)
+
+    max_cpuzeit = kontext['max_cpuzeit']
+    if (max_cpuzeit is not None):
+        max_cpuzeit = max_cpuzeit*len(aufgaben)
+
+    _, programmausgabe = Programmausfuehrung_Ausgabe(befehl=[os.path.join(arbeitsverzeichnis, dateiname),
+        '--stapel', stapeldatei], bezugsordner=arbeitsverzeichnis,
+        nachricht_abbruch='Ausfuehren des Fortran-Programms im Stapelbetrieb fehlgeschlagen',
+        max_laufzeit=max_laufzeit, max_cpuzeit=max_cpuzeit, ausgabe_erfassen=True)
+
+    try:
+        os.remove(os.path.join(arbeitsverzeichnis, stapeldatei))
+    except OSError:
+        pass
+
+    stapelstatus = dict()
+    stapelausgaben = dict()
+    zeilenpuffer = []
+    if (programmausgabe is not None):
+        for zeile in programmausgabe.splitlines(True):
+            eintraege = zeile.split()
+            if ((len(eintraege) != 3) or (eintraege[0] != 'MPO-Stapel')):
+                zeilenpuffer += [zeile]
+                continue
+
+            try:
+                idx_stapel = int(eintraege[1])-1
+                stapelstatus[idx_stapel] = int(eintraege[2])
+            except ValueError:
+                zeilenpuffer += [zeile]
+                continue
+
+            stapelausgaben[idx_stapel] = ''.join(zeilenpuffer)
+            zeilenpuffer = []
+
+    num_gemeldet = len([idx for idx in range(len(aufgaben)) if (idx in stapelstatus)])
+    dauer = (time.time()-startzeit)/max(1, num_gemeldet)
+
+    # Alle erfolgreich gemeldeten Variationen werden eingelesen und gemeinsam bewertet
+    eingelesen = dict()
+    for idx_stapel in range(len(aufgaben)):
+        if (stapelstatus.get(idx_stapel, None) == 0):
+            simulationsergebnisse = _Ausgabe_Einlesen(kontext=kontext, ausgabe=stapelausgaben[idx_stapel],
+                ausgabedatei=ausgabedateien[idx_stapel])
+            if (simulationsergebnisse is not None):
+                eingelesen[idx_stapel] = simulationsergebnisse
+
+    auswertungen = dict(zip(eingelesen.keys(), _Differenzen_Auswerten_Stapel(kontext=kontext,
+        simulationsergebnisse_stapel=list(eingelesen.values()))))
+
+    ergebnisse = []
+    for idx_stapel, (idx_zeile, eintrag) in enumerate(aufgaben):
+        if (idx_stapel not in stapelstatus):
+            ergebnisse += [_Simulation_und_Differenz(kontext=kontext, idx_zeile=idx_zeile, eintrag=eintrag)]
+        elif (stapelstatus[idx_stapel] != 0):
+            print('# Abbruch: Statusmeldung ungleich Null im Stapelbetrieb (Variation ' + str(idx_zeile) + ')')
+            ergebnisse += [['fehlgeschlagen', '-1.0', dauer]]
+        elif (idx_stapel not in auswertungen):
+            ergebnisse += [['fehlgeschlagen', '-1.0', dauer]]
+        else:
+            abweichungstext, simwerte = auswertungen[idx_stapel]
+            _Ausgabe_Abschliessen(kontext=kontext, ausgabe=stapelausgaben[idx_stapel],
+                ausgabedatei=ausgabedateien[idx_stapel], abweichungstext=abweichungstext)
+            ergebnisse += [['erfolgreich', abweichungstext, dauer, simwerte]]
+
+    return ergebnisse
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Ergebnissammler_Starten(dateiname):
+    """Oeffne die Datei dateiname zum fortlaufenden Schreiben von Ergebnissen und gib ein dict mit
+    allen Informationen des Sammlers zurueck. Die Ergebnisse koennen in beliebiger Reihenfolge
+    uebergeben werden, werden aber in der Reihenfolge ihrer Indizes in die Datei geschrieben.
+    """
+    ausgabe = open(dateiname, 'w', encoding='utf-8')
+    return dict([('ausgabe', ausgabe), ('naechster_index', 0), ('zwischenspeicher', dict())])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Ergebnissammler_Hinzufuegen(sammler, idx_ergebnis, ergebnis):
+    """Uebergib dem sammler ein ergebnis (Textzeile) mit dem Index idx_ergebnis. Alle Ergebnisse,
+    die lueckenlos an die bisher geschriebenen anschliessen, werden direkt in die Datei geschrieben.
+    Nur vorzeitig fertige Ergebnisse bleiben bis dahin im Speicher.
+    """
+    zwischenspeicher = sammler['zwischenspeicher']
+    zwischenspeicher[idx_ergebnis] = ergebnis
+
+    naechster_index = sammler['naechster_index']
+    if (naechster_index not in zwischenspeicher):
+        return
+
+    zeilen = []
+    while (naechster_index in zwischenspeicher):
+        zeilen += [zwischenspeicher.pop(naechster_index)]
+        naechster_index += 1
+
+    # Zeilenumbruch nur zwischen den Eintraegen, damit die Datei nicht mit einer Leerzeile endet
+    if (sammler['naechster_index'] > 0):
+        zeilen = [''] + zeilen
+
+    sammler['ausgabe'].write('\n'.join(zeilen))
+    sammler['ausgabe'].flush()
+    sammler['naechster_index'] = naechster_index
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Ergebnissammler_Beenden(sammler):
+    """Schliesse die Datei des sammler. Gibt die Anzahl der geschriebenen Ergebnisse zurueck.
+    """
+    if (len(sammler['zwischenspeicher']) > 0):
+        print('# Warnung: ' + str(len(sammler['zwischenspeicher'])) + ' Ergebnis(se) konnten nicht ' \
+            + 'lueckenlos geschrieben werden')
+
+    sammler['ausgabe'].close()
+    return sammler['naechster_index']
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Journal_Laden(dateiname, quelle):
+    """Lese die bereits im Journal dateiname gespeicherten Ergebnisse ein. Jede Zeile enthaelt den
+    Index, die Parameter und das Ergebnis einer Variation (durch Semikolon getrennt). Ergebnisse
+    werden nur uebernommen, wenn die Parameter mit der Variation aus der quelle (siehe
+    Variationsquelle_Erstellen) uebereinstimmen und die Zeile vollstaendig geschrieben wurde.
+    Gibt ein dict mit Index und Ergebnis zurueck.
+    """
+    from .dateneinlesen import Existenz_Datei
+    from .versuchsliste import Variation_Ermitteln
+
+    ergebnisse = dict()
+    if (not Existenz_Datei(dateiname=dateiname)):
+        return ergebnisse
+
+    with open(dateiname, 'r', encoding='utf-8') as eingabe:
+        for zeile in eingabe:
+            eintraege = zeile.split(';')
+            if ((not zeile.endswith('\n')) or (len(eintraege) != 3)):
+                continue
+
+            try:
+                idx_zeile = int(eintraege[0])
+            except ValueError:
+                continue
+
+            if ((idx_zeile < 0) or (idx_zeile >= quelle['anzahl'])):
+                continue
+
+            if (eintraege[1] != ' '.join(Variation_Ermitteln(quelle=quelle, idx_variation=idx_zeile))):
+                continue
+
+            ergebnisse[idx_zeile] = eintraege[2].strip()
+
+    return ergebnisse
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Versuchskontext(einstellungen, vergleichsdaten, str_versuch, arbeitsverzeichnis):
+    """Stelle alle fuer die Berechnung der Variationen von str_versuch gleichbleibenden Werte in
+    einem dict zusammen, das den Arbeitern einmalig als Kontext uebergeben wird. Dazu gehoeren auch
+    die vorab bestimmten Skalierungen der vergleichsdaten.
+    """
+    from .abweichung import Skalierungen
+
+    skalierungen = None
+    if (vergleichsdaten is not None):
+        skalierungen = Skalierungen(vergleichsdaten=vergleichsdaten)
+
+    progeinstellungen = einstellungen['Versuchsablauf'][str_versuch]['Berechnungsprogramm']
+    return dict([
+        ('dateiname', progeinstellungen['Name']),
+        ('args_davor', progeinstellungen['zus. Argumente Start']),
+        ('args_danach', progeinstellungen['zus. Argumente Ende']),
+        ('einstellungen', einstellungen),
+        ('str_versuch', str_versuch),
+        ('vergleichsdaten', vergleichsdaten),
+        ('skalierungen', skalierungen),
+        ('arbeitsverzeichnis', arbeitsverzeichnis),
+        ('max_laufzeit', progeinstellungen.get('max. Laufzeit [s]', None)),
+        ('max_cpuzeit', progeinstellungen.get('max. CPU-Zeit [s]', None)),
+        ('wiederholungen', progeinstellungen.get('Wiederholungen', 0)),
+        ('stapelgroesse', progeinstellungen.get('Stapelgroesse', 1)),
+        ('bibliothek', progeinstellungen.get('Bibliothek', None)),
+        ('symbol', progeinstellungen.get('Symbol', 'umat_')),
+        ('belastungspfad', progeinstellungen.get('Belastungspfad', None)),
+        ('ausgabe', progeinstellungen.get('Ausgabe', 'datei')),
+        ('kurven_schwellwert', progeinstellungen.get('Kurven speichern', None)),
+        ('variationsquelle', None)])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Versuchsausgabe_Starten(einstellungen, str_versuch, quelle, fortsetzen=False):
+    """Bereite die Ausgabedateien (Differenzen, Journal) fuer str_versuch und alle Variationen der
+    quelle (siehe Variationsquelle_Erstellen) vor. Mit fortsetzen=True
+    werden alle gueltigen Ergebnisse aus dem Journal uebernommen. Gibt ein dict mit allen
+    Informationen zur Ausgabe zurueck, dessen Eintrag 'vorhanden' die bereits berechneten
+    Indizes enthaelt.
+    """
+    import os
+
+    differenzendatei = str_versuch + '_' + einstellungen['Ausgabedatei_Differenzen']
+    journaldatei = os.path.splitext(differenzendatei)[0] + '.journal'
+
+    vorhandene_ergebnisse = dict()
+    if (fortsetzen):
+        vorhandene_ergebnisse = _Journal_Laden(dateiname=journaldatei, quelle=quelle)
+        print('# Fortsetzen (' + str_versuch + '): ' + str(len(vorhandene_ergebnisse)) + ' von ' \
+            + str(quelle['anzahl']) + ' Variationen bereits berechnet')
+
+    # Die Ergebnisse werden bereits waehrend der Berechnung in die Ausgabedatei geschrieben.
+    # Das Journal wird immer neu geschrieben (beim Fortsetzen nur mit den gueltigen Eintraegen),
+    # damit unvollstaendige Zeilen eines abgebrochenen Durchlaufs nicht erhalten bleiben
+    versuchsausgabe = dict([('differenzendatei', differenzendatei), ('quelle', quelle),
+        ('sammler', Ergebnissammler_Starten(dateiname=differenzendatei)), ('fortsetzen', fortsetzen),
+        ('journal', open(journaldatei, 'w', encoding='utf-8')), ('zeitueberschreitungen', []),
+        ('vorhanden', set(vorhandene_ergebnisse.keys())), ('laufzeiten', [])])
+
+    for idx_vorhanden in sorted(vorhandene_ergebnisse.keys()):
+        _Versuchsausgabe_Ergebnis(versuchsausgabe=versuchsausgabe, idx_zeile=idx_vorhanden,
+            rueckgabe=['erfolgreich', vorhandene_ergebnisse[idx_vorhanden], None])
+
+    return versuchsausgabe
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Versuchsausgabe_Ergebnis(versuchsausgabe, idx_zeile, rueckgabe):
+    """Schreibe die rueckgabe ([status, ergebnis, dauer]) der Variation idx_zeile in die
+    Ausgabedateien der versuchsausgabe. Ein fehlendes Ergebnis (None, bspw. bei einem abgestuerzten
+    Arbeiter) wird wie eine fehlgeschlagene Simulation behandelt, aber nicht im Journal vermerkt und
+    beim Fortsetzen erneut berechnet. Gleiches gilt fuer nicht ausgewaehlte Variationen (Status
+    'ausgeschlossen').
+    """
+    from .versuchsliste import Variation_Ermitteln
+
+    if (rueckgabe is None):
+        ergebnis = '-1.0'
+    elif (rueckgabe[0] == 'ausgeschlossen'):
+        ergebnis = rueckgabe[1]
     else:
-        print('# Abbruch: Rueckgabewert ungleich Null')
-        os.chdir(aktueller_ordner)
-        return False
+        status, ergebnis, dauer = rueckgabe[:3]
+        if (status == 'zeitueberschreitung'):
+            versuchsausgabe['zeitueberschreitungen'].append(idx_zeile)
+
+        if (dauer is not None):
+            versuchsausgabe['laufzeiten'].append(dauer)
+
+        journal = versuchsausgabe['journal']
+        journal.write(str(idx_zeile) + ';' + ' '.join(Variation_Ermitteln(quelle=versuchsausgabe['quelle'],
+            idx_variation=idx_zeile)) + ';' + ergebnis + '\n')
+        journal.flush()
+
+    Ergebnissammler_Hinzufuegen(sammler=versuchsausgabe['sammler'], idx_ergebnis=idx_zeile,
+        ergebnis=ergebnis)
 
 
 
 # -------------------------------------------------------------------------------------------------
-def _Simulation_und_Differenz(dateiname, args_davor, args_danach, eintragsliste, einstellungen,
-    str_versuch, idx_zeile, vergleichsdaten, arbeitsverzeichnis, rueckgabemanager):
-    """Diese Funktion uebernimmt saemtliche Variablen, um ggfs. parallel verschiedene Varianten zu
-    berechnen und die Differenz zu vergleichsdaten zu bestimmen. Typischerweise sollten sich fuer
-    parallele Prozesse/Aufrufe nur idx_zeile und eintrag voneinander unterscheiden. Der
-    rueckgabemanager sammelt die Rueckgabewerte aller parallelen Prozesse zum Weiterverarbeiten.
+def _Versuchsausgabe_Beenden(versuchsausgabe):
+    """Schliesse alle Ausgabedateien der versuchsausgabe. Variationen mit Zeitueberschreitung
+    werden zusaetzlich separat aufgelistet.
     """
     import os
-    from shutil import copy
-    import tempfile
-    from .dateneinlesen import Datei_Schreiben
-    from .abweichung import Berechnung_Differenzen
+    from .versuchsliste import Variation_Ermitteln
 
-    os.chdir(arbeitsverzeichnis)
+    versuchsausgabe['journal'].close()
+    Ergebnissammler_Beenden(sammler=versuchsausgabe['sammler'])
 
-    for idx_eintrag, eintrag in enumerate(eintragsliste):
-        ausgabedatei = str_versuch + '_' + dateiname + '_' + str(idx_zeile+idx_eintrag).zfill(6) + '.csv'
+    zeitueberschreitungen = versuchsausgabe['zeitueberschreitungen']
+    zeitdatei = os.path.splitext(versuchsausgabe['differenzendatei'])[0] + '_zeitueberschreitungen.txt'
+    if (len(zeitueberschreitungen) > 0):
+        with open(zeitdatei, 'w', encoding='utf-8') as ausgabe:
+            for idx_zeile in sorted(zeitueberschreitungen):
+                ausgabe.write(str(idx_zeile) + ': ' + ' '.join(Variation_Ermitteln(quelle=versuchsausgabe['quelle'],
+                    idx_variation=idx_zeile)) + '\n')
 
-        if (not Programmausfuehrung(befehl=['./' + dateiname, *args_davor, *eintrag, *args_danach, ausgabedatei], bezugsordner='.',
-            nachricht_abbruch='Ausfuehren des Fortran-Programms fehlgeschlagen')):
-            rueckgabemanager[idx_zeile+idx_eintrag] = '-1.0'
-            continue
+        print('# Warnung: ' + str(len(zeitueberschreitungen)) + ' Variation(en) von ' \
+            + versuchsausgabe['differenzendatei'] + ' wegen Zeitueberschreitung abgebrochen')
+    elif ((not versuchsausgabe['fortsetzen']) and os.path.isfile(zeitdatei)):
+        os.remove(zeitdatei)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Programmkennung_Versuch(kontext, bibliothek=False):
+    """Bestimme die Kennung des Berechnungsprogramms fuer den Ergebnisspeicher. Wird der Versuch mit
+    einer UMAT-Bibliothek berechnet (bibliothek=True), wird die Bibliothek samt Symbol und
+    Belastungspfad verwendet. Gibt die Kennung zurueck oder None, falls sie nicht bestimmt werden kann.
+    """
+    import os
+    from .ergebnisspeicher import Programmkennung
+
+    if (bibliothek):
+        return Programmkennung(dateiname=os.path.join(kontext['arbeitsverzeichnis'], kontext['bibliothek']),
+            zusatz=['Bibliothek', kontext['symbol'], kontext['belastungspfad']])
 
-        abweichungen = Berechnung_Differenzen(einstellungen=einstellungen, vergleichsdaten=vergleichsdaten,
-            str_versuch=str_versuch, datei=arbeitsverzeichnis + os.sep + ausgabedatei)
+    return Programmkennung(dateiname=os.path.join(kontext['arbeitsverzeichnis'], kontext['dateiname']))
 
-        rueckgabemanager[idx_zeile+idx_eintrag] = ', '.join([str(x) for x in abweichungen])
+
+
+# -------------------------------------------------------------------------------------------------
+def _Gespeicherte_Rueckgabe(kontext, gespeichert):
+    """Erstelle aus einem Eintrag des Ergebnisspeichers (Status und Werte an den Stuetzstellen) die
+    Rueckgabe einer Variation in gleicher Form wie _Simulation_und_Differenz. Die Differenzen werden
+    mit den aktuellen vergleichsdaten bestimmt.
+    """
+    from .abweichung import Differenzen_An_Stuetzstellen
+
+    status, simwerte = gespeichert
+    if ((status != 'erfolgreich') or (simwerte is None)):
+        return [status, '-1.0', None]
+
+    abweichungen = Differenzen_An_Stuetzstellen(einstellungen=kontext['einstellungen'],
+        vergleichsdaten=kontext['vergleichsdaten'], simwerte=simwerte, skalierungen=kontext['skalierungen'])
+    return [status, ', '.join([str(x) for x in abweichungen]), None]
 
 
 
 # -------------------------------------------------------------------------------------------------
-def Berechne_Variationen(einstellungen, vergleichsdaten, str_versuch):
-    """Fuehre die Simulationen aller zuvor vorbereiteten Variationen durch und speichere die
-    Ergebnisse ab.
+def Berechne_Versuchsablauf(einstellungen, gesamtvergleichsdaten, pool=None, fortsetzen=False,
+    auswahl=None, quelle=None):
+    """Fuehre die Simulationen aller zuvor vorbereiteten Variationen fuer alle Versuche in
+    gesamtvergleichsdaten (dict mit den vergleichsdaten je Versuch) durch und speichere die
+    Ergebnisse je Versuch ab. Jedes Paar aus Versuch und Variation ist eine eigene Aufgabe, die ueber
+    eine gemeinsame Warteschlange an die Arbeiter im pool verteilt wird. Dadurch muss kein Versuch
+    auf die letzten Variationen des vorherigen warten. Falls kein pool uebergeben wird, wird fuer
+    diesen Aufruf ein eigener gestartet. Jedes Ergebnis wird zusaetzlich in einem Journal
+    festgehalten. Mit fortsetzen=True werden nur die Variationen berechnet, fuer die noch kein
+    gueltiges Ergebnis im Journal vorhanden ist. Optional kann in auswahl (dict mit einer Menge an
+    Indizes je Versuch) festgelegt werden, welche Variationen berechnet werden sollen. Alle anderen
+    werden als fehlgeschlagen (-1.0) eingetragen. Ist in einstellungen ein 'Ergebnisspeicher'
+    angegeben, werden dort vorhandene Ergebnisse uebernommen statt sie erneut zu berechnen und alle
+    neuen Ergebnisse darin abgelegt. Die Aufgaben werden erst bei Bedarf erzeugt und beim
+    Variationsstrom (siehe Variationsquelle_Erstellen) nur mit dem Gitterindex an die Arbeiter
+    uebergeben. Eine bereits erstellte quelle kann uebergeben werden, damit sie nicht erneut
+    erstellt wird. Am Ende wird auf die parallel geschriebene Variationsdatei gewartet (siehe
+    Variationsdatei_Abwarten). Gibt ein dict mit der mittleren Laufzeit einer Berechnung je Versuch
+    zurueck (None, falls keine Berechnung durchgefuehrt wurde).
     """
     import os
     import time
-    import multiprocessing as mp
-    from .dateneinlesen import Datei_Einlesen, Variationsdatei_Laden
+    from .versuchsliste import Variationsquelle_Erstellen, Variation_Aufgabe, Variation_Ermitteln, \
+        Variationsdatei_Abwarten
+    from .ergebnisspeicher import Ergebnisspeicher_Oeffnen, Ergebnisspeicher_Schluessel, \
+        Ergebnisspeicher_Lesen, Ergebnisspeicher_Schreiben, Ergebnisspeicher_Schliessen
+    from .arbeitsverteilung import Arbeiterpool_Kontext_Setzen, \
+        Arbeiterpool_Abarbeiten, Arbeiterpool_Beenden
+    from .umatbibliothek import UMAT_Bibliothek_Pruefen
 
-    # Beschraenke die Anzahl parallel ausgefuehrter Prozesse anhand der verfuegbaren Threads
-    mp_gleichzeitig = max(mp.cpu_count()-1, 1)
+    eigener_pool = (pool is None)
+    if (eigener_pool):
+        pool = Arbeiterpool_Aus_Einstellungen(einstellungen=einstellungen)
 
-    mp_manager = mp.Manager()
-    rueckgabemanager = mp_manager.dict()
-    mp_prozesse = []
+    # Der Ergebnisspeicher wird relativ zum aktuellen Ordner angegeben, damit er von mehreren
+    # Arbeitsverzeichnissen gemeinsam genutzt werden kann
+    speicher = None
+    if ('Ergebnisspeicher' in einstellungen):
+        speichereinstellungen = einstellungen['Ergebnisspeicher']
+        speicher = Ergebnisspeicher_Oeffnen(dateiname=os.path.abspath(speichereinstellungen['Datei']),
+            max_eintraege=speichereinstellungen.get('max. Eintraege', None))
 
     aktueller_ordner = os.path.abspath(os.curdir)
     arbeitsverzeichnis = einstellungen['Arbeitsverzeichnis'] + os.sep
     os.chdir(arbeitsverzeichnis)
 
-    progeinstellungen = einstellungen['Versuchsablauf'][str_versuch]['Berechnungsprogramm']
-    dateiname = progeinstellungen['Name']
-    args_davor = progeinstellungen['zus. Argumente Start']
-    args_danach = progeinstellungen['zus. Argumente Ende']
-
-    abweichungsliste = []
     starttime = time.time()
-    eingabeliste = Variationsdatei_Laden(dateiname=einstellungen['Ausgabedatei_Variationen'])
+    if (quelle is None):
+        quelle = Variationsquelle_Erstellen(einstellungen=einstellungen,
+            dateiname=einstellungen['Ausgabedatei_Variationen'])
+
+    abgeschlossen = False
+    versuchsausgaben = dict()
+    versuchsdaten = dict()
+    aufgabenzaehler = dict([('geschaetzt', 0), ('verteilt', 0)])
+    speicherschluessel = dict()
+    try:
+        for str_versuch in gesamtvergleichsdaten.keys():
+            kontext = _Versuchskontext(einstellungen=einstellungen,
+                vergleichsdaten=gesamtvergleichsdaten[str_versuch], str_versuch=str_versuch,
+                arbeitsverzeichnis=os.path.abspath(os.curdir))
+            kontext['variationsquelle'] = quelle['gitter']
+            funktion = _Simulation_und_Differenz
+            stapelfunktion = None
+            if (kontext['bibliothek'] is not None):
+                if (UMAT_Bibliothek_Pruefen(bibliothek=os.path.join(kontext['arbeitsverzeichnis'],
+                    kontext['bibliothek']), belastungspfad=kontext['belastungspfad'], symbol=kontext['symbol'])):
+                    funktion = _Bibliothek_und_Differenz
+                    if (kontext['stapelgroesse'] > 1):
+                        stapelfunktion = _Bibliotheksstapel_und_Differenzen
+                else:
+                    print('# Warnung: UMAT-Bibliothek nicht nutzbar, fuer Versuch ' + str_versuch \
+                        + ' wird ' + kontext['dateiname'] + ' aufgerufen')
+
+            if ((funktion == _Simulation_und_Differenz) and (kontext['stapelgroesse'] > 1)):
+                if (Stapelbetrieb_Pruefen(programm=os.path.join(kontext['arbeitsverzeichnis'],
+                    kontext['dateiname']), bezugsordner=kontext['arbeitsverzeichnis'])):
+                    stapelfunktion = _Simulationsstapel_und_Differenzen
+                else:
+                    print('# Warnung: ' + kontext['dateiname'] + ' unterstuetzt keinen Stapelbetrieb, ' \
+                        + 'Variationen von Versuch ' + str_versuch + ' werden einzeln berechnet')
 
-    print('\n# --- Anfang Multiprocessing Output (nutze ' + str(mp_gleichzeitig) + ' Threads) ---')
-    # Teile die Liste an Arbeitspaketen (Eintraegen in eingabeliste) gleichmaessig auf die
-    # verfuegbaren Threads auf
-    num_arbeiten = len(eingabeliste)
-    einzelarbeiten = num_arbeiten//mp_gleichzeitig
-    num_extraarbeit = num_arbeiten % mp_gleichzeitig
-    idx_ende = 0
-    for idx_prozess in range(mp_gleichzeitig):
-        idx_start = idx_ende
-        idx_ende = idx_start + einzelarbeiten
-        if (idx_prozess < num_extraarbeit):
-            idx_ende += 1
+            Arbeiterpool_Kontext_Setzen(pool=pool, kennung=str_versuch, funktion=funktion, daten=kontext,
+                stapelfunktion=stapelfunktion, stapelgroesse=kontext['stapelgroesse'])
 
-        sp_prozess = mp.Process(target=_Simulation_und_Differenz, args=(dateiname, \
-            args_davor, args_danach, eingabeliste[idx_start:idx_ende], einstellungen, \
-            str_versuch, idx_start, vergleichsdaten, os.path.abspath(os.curdir), \
-            rueckgabemanager))
-        mp_prozesse.append(sp_prozess)
-        sp_prozess.start()
+            programmkennung = None
+            if (speicher is not None):
+                programmkennung = _Programmkennung_Versuch(kontext=kontext,
+                    bibliothek=(funktion == _Bibliothek_und_Differenz))
 
-    for prozess in mp_prozesse:
-        prozess.join()
+            versuchsausgaben[str_versuch] = _Versuchsausgabe_Starten(einstellungen=einstellungen,
+                str_versuch=str_versuch, quelle=quelle, fortsetzen=fortsetzen)
+            vorhanden = versuchsausgaben[str_versuch]['vorhanden']
+            ausgewaehlt = None
+            if ((auswahl is not None) and (str_versuch in auswahl)):
+                ausgewaehlt = auswahl[str_versuch]
+                aufgabenzaehler['geschaetzt'] += len([idx for idx in ausgewaehlt if (idx not in vorhanden)])
+            else:
+                aufgabenzaehler['geschaetzt'] += quelle['anzahl'] - len(vorhanden)
 
-    print('# --- Ende Multiprocessing Output ---\n')
-    abweichungsliste = [rueckgabemanager[schluessel] for schluessel in range(len(eingabeliste))]
+            versuchsdaten[str_versuch] = [kontext, programmkennung, ausgewaehlt]
 
-    print('# Untersuchung der ' + str(len(eingabeliste)) + ' Variationen wurde abgeschlossen in: ' \
-        + str(time.time()-starttime) + 's')
+        def _Aufgaben_Erzeugen():
+            # Die Aufgaben werden erst beim Verteilen erzeugt, damit nie alle gleichzeitig im Speicher sind
+            for str_versuch, (kontext, programmkennung, ausgewaehlt) in versuchsdaten.items():
+                versuchsausgabe = versuchsausgaben[str_versuch]
+                for idx in range(quelle['anzahl']):
+                    if (idx in versuchsausgabe['vorhanden']):
+                        continue
 
-    with open(str_versuch + '_' + einstellungen['Ausgabedatei_Differenzen'], 'w', encoding='utf-8') as ausgabe:
-        ausgabe.write('\n'.join(abweichungsliste))
+                    if ((ausgewaehlt is not None) and (idx not in ausgewaehlt)):
+                        _Versuchsausgabe_Ergebnis(versuchsausgabe=versuchsausgabe, idx_zeile=idx,
+                            rueckgabe=['ausgeschlossen', '-1.0'])
+                        continue
+
+                    if (programmkennung is not None):
+                        schluessel = Ergebnisspeicher_Schluessel(programmkennung=programmkennung,
+                            argumente=[*kontext['args_davor'], *Variation_Ermitteln(quelle=quelle,
+                            idx_variation=idx), *kontext['args_danach']], stuetzstellen=kontext['vergleichsdaten'][0])
+                        gespeichert = Ergebnisspeicher_Lesen(speicher=speicher, schluessel=schluessel)
+                        if (gespeichert is not None):
+                            _Versuchsausgabe_Ergebnis(versuchsausgabe=versuchsausgabe, idx_zeile=idx,
+                                rueckgabe=_Gespeicherte_Rueckgabe(kontext=kontext, gespeichert=gespeichert))
+                            continue
+
+                        speicherschluessel[(str_versuch, idx)] = schluessel
+
+                    aufgabenzaehler['verteilt'] += 1
+                    yield (str_versuch, idx, Variation_Aufgabe(quelle=quelle, idx_variation=idx))
+
+        def _Ergebnis_Speichern(kennung, idx_aufgabe, rueckgabe):
+            _Versuchsausgabe_Ergebnis(versuchsausgabe=versuchsausgaben[kennung], idx_zeile=idx_aufgabe,
+                rueckgabe=rueckgabe)
+
+            # Zeitueberschreitungen haengen von der Auslastung ab und werden nicht gespeichert
+            schluessel = speicherschluessel.pop((kennung, idx_aufgabe), None)
+            if ((schluessel is None) or (rueckgabe is None) \
+                or (rueckgabe[0] not in ['erfolgreich', 'fehlgeschlagen'])):
+                return
+
+            simwerte = None
+            if (len(rueckgabe) > 3):
+                simwerte = rueckgabe[3]
+
+            Ergebnisspeicher_Schreiben(speicher=speicher, schluessel=schluessel, status=rueckgabe[0],
+                werte=simwerte)
+
+        print('\n# --- Anfang Multiprocessing Output (nutze ' + str(len(pool['prozesse'])) + ' Prozesse mit je ' \
+            + str(pool['simulationen_je_prozess']) + ' Thread(s)) ---')
+        Arbeiterpool_Abarbeiten(pool=pool, aufgaben=_Aufgaben_Erzeugen(), ergebnisfunktion=_Ergebnis_Speichern,
+            paketgroesse=einstellungen.get('Paketgroesse', 0), anzahl_aufgaben=aufgabenzaehler['geschaetzt'])
+        print('# --- Ende Multiprocessing Output ---\n')
+        abgeschlossen = True
+    finally:
+        Variationsdatei_Abwarten(abbrechen=(not abgeschlossen))
+        for versuchsausgabe in versuchsausgaben.values():
+            _Versuchsausgabe_Beenden(versuchsausgabe=versuchsausgabe)
+
+        if (eigener_pool):
+            Arbeiterpool_Beenden(pool=pool)
+
+        if (speicher is not None):
+            Ergebnisspeicher_Schliessen(speicher=speicher)
+
+        os.chdir(aktueller_ordner)
+
+    print('# Untersuchung von ' + str(aufgabenzaehler['verteilt']) + ' Variationen in ' + str(len(versuchsausgaben)) \
+        + ' Versuch(en) wurde abgeschlossen in: ' + str(time.time()-starttime) + 's')
+
+    mittlere_laufzeiten = dict()
+    for str_versuch, versuchsausgabe in versuchsausgaben.items():
+        laufzeiten = versuchsausgabe['laufzeiten']
+        if (len(laufzeiten) == 0):
+            mittlere_laufzeiten[str_versuch] = None
+        else:
+            mittlere_laufzeiten[str_versuch] = sum(laufzeiten)/len(laufzeiten)
+
+    return mittlere_laufzeiten
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Berechne_Variationen(einstellungen, vergleichsdaten, str_versuch, pool=None, fortsetzen=False):
+    """Fuehre die Simulationen aller zuvor vorbereiteten Variationen fuer str_versuch durch und
+    speichere die Ergebnisse ab (siehe Berechne_Versuchsablauf).
+    """
+    Berechne_Versuchsablauf(einstellungen=einstellungen,
+        gesamtvergleichsdaten=dict([(str_versuch, vergleichsdaten)]), pool=pool, fortsetzen=fortsetzen)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Stufenauswahl(bewertungen, anteil=1.0, schwellwert=None):
+    """Waehle aus den bisherigen bewertungen (Liste mit der Summe der Bewertungen je Variation oder
+    None fuer disqualifizierte Variationen) die Indizes der Variationen aus, die in der naechsten
+    Stufe weiter untersucht werden sollen. Mit schwellwert werden nur Variationen mit einer
+    Bewertung bis zu diesem Wert beruecksichtigt und davon hoechstens der (beste) anteil aller
+    gueltigen Variationen. Gibt eine Menge mit den ausgewaehlten Indizes zurueck.
+    """
+    from math import ceil
+
+    gueltig = [[wert, idx] for idx, wert in enumerate(bewertungen) if (wert is not None)]
+    num_maximal = int(ceil(anteil*len(gueltig)))
+    if (schwellwert is not None):
+        gueltig = [eintrag for eintrag in gueltig if (eintrag[0] <= schwellwert)]
+
+    gueltig.sort(key=lambda z: z[0])
+    return set([eintrag[1] for eintrag in gueltig[:num_maximal]])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Berechne_Versuchsablauf_Gestuft(einstellungen, gesamtvergleichsdaten, pool=None, fortsetzen=False):
+    """Fuehre die Simulationen der Versuche in gesamtvergleichsdaten stufenweise durch. Die Versuche
+    werden nach ihren Kosten sortiert, die entweder als 'Kosten' im Versuchsablauf angegeben sind
+    oder anhand eines kurzen Vorlaufs mit den ersten Variationen aller Versuche gemessen werden.
+    Nach jeder Stufe werden nur die vielversprechendsten Variationen (siehe 'Gestufte Auswertung'
+    in einstellungen) mit dem naechstteureren Versuch berechnet, alle anderen werden als
+    fehlgeschlagen eingetragen und damit in Bewerte_Ergebnisse disqualifiziert.
+    """
+    import os
+    from .versuchsliste import Variationsquelle_Erstellen, Variationsdatei_Abwarten
+    from .abweichung import Differenzzeile_Bewerten
+    from .arbeitsverteilung import Arbeiterpool_Beenden
+
+    stufeneinstellungen = einstellungen['Gestufte Auswertung']
+    anteil = stufeneinstellungen.get('Anteil', 1.0)
+    schwellwert = stufeneinstellungen.get('Schwellwert', None)
+
+    eigener_pool = (pool is None)
+    if (eigener_pool):
+        pool = Arbeiterpool_Aus_Einstellungen(einstellungen=einstellungen)
+
+    arbeitsverzeichnis = einstellungen['Arbeitsverzeichnis'] + os.sep
+    quelle = Variationsquelle_Erstellen(einstellungen=einstellungen, dateiname=arbeitsverzeichnis
+        + einstellungen['Ausgabedatei_Variationen'])
+    num_variationen = quelle['anzahl']
+
+    abgeschlossen = False
+    try:
+        versuche = list(gesamtvergleichsdaten.keys())
+        kosten = dict([(str_versuch, einstellungen['Versuchsablauf'][str_versuch].get('Kosten', None))
+            for str_versuch in versuche])
+        if (None in kosten.values()):
+            # Vorlauf: So viele Variationen jedes Versuchs berechnen wie gleichzeitig moeglich sind
+            # und deren mittlere Laufzeit als Kosten nutzen. Die Ergebnisse bleiben im Journal erhalten
+            num_vorlauf = min(num_variationen, len(pool['prozesse'])*pool['simulationen_je_prozess'])
+            print('# Gestufte Auswertung: Bestimme Kosten anhand von ' + str(num_vorlauf) \
+                + ' Variation(en) je Versuch')
+            laufzeiten = Berechne_Versuchsablauf(einstellungen=einstellungen,
+                gesamtvergleichsdaten=gesamtvergleichsdaten, pool=pool, fortsetzen=fortsetzen,
+                auswahl=dict([(str_versuch, set(range(num_vorlauf))) for str_versuch in versuche]),
+                quelle=quelle)
+            fortsetzen = True
+            for str_versuch in versuche:
+                if (kosten[str_versuch] is None):
+                    kosten[str_versuch] = laufzeiten[str_versuch]
+                    if (kosten[str_versuch] is None):
+                        kosten[str_versuch] = 0.0
+
+        reihenfolge = sorted(versuche, key=lambda str_versuch: kosten[str_versuch])
+        print('# Gestufte Auswertung in der Reihenfolge: ' + ', '.join([str_versuch + ' (' \
+            + str(kosten[str_versuch]) + ')' for str_versuch in reihenfolge]))
+
+        bewertungen = [0.0 for x in range(num_variationen)]
+        kandidaten = set(range(num_variationen))
+        for idx_stufe, str_versuch in enumerate(reihenfolge):
+            print('\n# --- Stufe ' + str(idx_stufe+1) + '/' + str(len(reihenfolge)) + ': Versuch ' \
+                + str_versuch + ' mit ' + str(len(kandidaten)) + ' Variation(en)')
+            Berechne_Versuchsablauf(einstellungen=einstellungen,
+                gesamtvergleichsdaten=dict([(str_versuch, gesamtvergleichsdaten[str_versuch])]),
+                pool=pool, fortsetzen=fortsetzen, auswahl=dict([(str_versuch, kandidaten)]), quelle=quelle)
+
+            if (idx_stufe == len(reihenfolge)-1):
+                break
+
+            with open(arbeitsverzeichnis + str_versuch + '_' + einstellungen['Ausgabedatei_Differenzen'],
+                'r', encoding='utf-8') as eingabe:
+                for idx_zeile, zeile in enumerate(eingabe):
+                    if (bewertungen[idx_zeile] is None):
+                        continue
+
+                    bewertung = Differenzzeile_Bewerten(zeile=zeile)
+                    if ((bewertung is None) or (idx_zeile not in kandidaten)):
+                        bewertungen[idx_zeile] = None
+                    else:
+                        bewertungen[idx_zeile] += bewertung
+
+            kandidaten = _Stufenauswahl(bewertungen=bewertungen, anteil=anteil, schwellwert=schwellwert)
+
+        abgeschlossen = True
+    finally:
+        Variationsdatei_Abwarten(abbrechen=(not abgeschlossen))
+        if (eigener_pool):
+            Arbeiterpool_Beenden(pool=pool)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Kurven_Nachberechnen(einstellungen, indizes):
+    """Berechne fuer die Variationen mit den uebergebenen indizes die Ergebniskurven aller Versuche
+    erneut, sofern keine Ergebnisdatei vorhanden ist (bspw. bei der Ausgabe ueber stdout, der
+    Berechnung mit einer UMAT-Bibliothek, Ergebnissen aus dem Ergebnisspeicher oder von entfernten
+    Arbeitern). Fehlgeschlagene Berechnungen werden nicht wiederholt. Die Berechnungen werden
+    nacheinander im aktuellen Prozess gestartet und schreiben ihre Ergebnisse in die jeweilige
+    Ergebnisdatei, damit sie anschliessend geplottet werden koennen.
+    """
+    import os
+    from .abweichung import Differenzzeile_Bewerten
+    from .dateneinlesen import Existenz_Datei
+    from .versuchsliste import Variationsquelle_Erstellen, Variation_Ermitteln
+    from .umatbibliothek import UMAT_Bibliothek_Pruefen, UMAT_Versuch_Berechnen
+
+    aktueller_ordner = os.path.abspath(os.curdir)
+    os.chdir(einstellungen['Arbeitsverzeichnis'])
+    arbeitsverzeichnis = os.path.abspath(os.curdir)
+
+    quelle = Variationsquelle_Erstellen(einstellungen=einstellungen,
+        dateiname=einstellungen['Ausgabedatei_Variationen'])
+    num_nachberechnet = 0
+    try:
+        for str_versuch in einstellungen['Versuchsablauf'].keys():
+            kontext = _Versuchskontext(einstellungen=einstellungen, vergleichsdaten=None,
+                str_versuch=str_versuch, arbeitsverzeichnis=arbeitsverzeichnis)
+            fehlgeschlagen = set()
+            with open(str_versuch + '_' + einstellungen['Ausgabedatei_Differenzen'], 'r', encoding='utf-8') as eingabe:
+                for idx_zeile, zeile in enumerate(eingabe):
+                    if (Differenzzeile_Bewerten(zeile=zeile) is None):
+                        fehlgeschlagen.add(idx_zeile)
+
+            kontext['ausgabe'] = 'datei'
+            bibliothek = None
+            if ((kontext['bibliothek'] is not None) and UMAT_Bibliothek_Pruefen(
+                bibliothek=os.path.join(arbeitsverzeichnis, kontext['bibliothek']),
+                belastungspfad=kontext['belastungspfad'], symbol=kontext['symbol'])):
+                bibliothek = os.path.join(arbeitsverzeichnis, kontext['bibliothek'])
+
+            for idx_zeile in indizes:
+                if (idx_zeile in fehlgeschlagen):
+                    continue
+
+                eintrag = Variation_Ermitteln(quelle=quelle, idx_variation=idx_zeile)
+                argumente, ausgabedatei = _Simulationsargumente(kontext=kontext, idx_zeile=idx_zeile,
+                    eintrag=eintrag)
+                if (Existenz_Datei(dateiname=ausgabedatei)):
+                    continue
+
+                if (bibliothek is not None):
+                    simulationsergebnisse = UMAT_Versuch_Berechnen(bibliothek=bibliothek,
+                        belastungspfad=kontext['belastungspfad'], symbol=kontext['symbol'],
+                        argumente=[*kontext['args_davor'], *eintrag, *kontext['args_danach']])
+                    if (simulationsergebnisse is None):
+                        continue
+
+                    _Kurve_Schreiben(dateiname=ausgabedatei, simulationsergebnisse=simulationsergebnisse.tolist())
+                else:
+                    status = Programmausfuehrung_Status(befehl=[os.path.join(arbeitsverzeichnis,
+                        kontext['dateiname']), *argumente], bezugsordner=arbeitsverzeichnis,
+                        nachricht_abbruch='Nachberechnen der Kurve fehlgeschlagen',
+                        max_laufzeit=kontext['max_laufzeit'], max_cpuzeit=kontext['max_cpuzeit'])
+                    if (status != 'erfolgreich'):
+                        continue
+
+                num_nachberechnet += 1
+    finally:
+        os.chdir(aktueller_ordner)
+
+    if (num_nachberechnet > 0):
+        print('# ' + str(num_nachberechnet) + ' Ergebniskurve(n) fuer die Plots nachberechnet')
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Kontext_Lokal_Anpassen(daten):
+    """Passe den Kontext eines Versuchs fuer einen entfernten Arbeiter an. Das Arbeitsverzeichnis
+    wird wie in den einstellungen relativ zum aktuellen Ordner des Arbeiters bestimmt, sodass dort
+    die lokal vorhandenen Berechnungsprogramme genutzt werden.
+    """
+    import os
+
+    daten = dict(daten)
+    daten['arbeitsverzeichnis'] = os.path.abspath(daten['einstellungen']['Arbeitsverzeichnis'])
+    return daten
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Verbindungsschluessel(einstellungen):
+    """Gib den Schluessel zur Authentifizierung zwischen Pool und entfernten Arbeitern zurueck. Da
+    beide Seiten die uebertragenen Daten mit pickle laden, gibt es keinen Standardwert. Ist in
+    einstellungen kein (nicht-leerer) 'Verbindungsschluessel' angegeben, wird None zurueckgegeben.
+    """
+    schluessel = einstellungen.get('Verbindungsschluessel', None)
+    if ((not isinstance(schluessel, str)) or (schluessel.strip() == '')):
+        print('# Abbruch: Fuer entfernte Arbeiter muss ein geheimer Verbindungsschluessel in ' \
+            + 'einstellungen.json angegeben werden')
+        return None
+
+    return schluessel.encode('utf-8')
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Arbeiterpool_Aus_Einstellungen(einstellungen, anzahl_gleichzeitig=None, adresse=None):
+    """Starte einen Arbeiterpool mit den Vorgaben aus einstellungen ('Simulationen je Prozess',
+    'CPU-Bindung', 'max. Systemlast', 'min. freier Speicher [MB]'). Mit anzahl_gleichzeitig wird
+    die Anzahl gleichzeitiger Berechnungen vorgegeben (statt sie aus den nutzbaren CPUs zu
+    bestimmen). Mit adresse (host, port) nimmt der Pool zusaetzlich entfernte Arbeiter auf.
+    Gibt den gestarteten Pool zurueck.
+    """
+    from .arbeitsverteilung import Arbeiterpool_Starten, Anzahl_Prozesse
+
+    simulationen_je_prozess = einstellungen.get('Simulationen je Prozess', 1)
+    authkey = None
+    if (adresse is not None):
+        authkey = Verbindungsschluessel(einstellungen=einstellungen)
+        if (authkey is None):
+            print('# Warnung: Pool wird ohne entfernte Arbeiter gestartet')
+            adresse = None
+
+    return Arbeiterpool_Starten(anzahl_prozesse=Anzahl_Prozesse(simulationen_je_prozess=simulationen_je_prozess,
+        anzahl_gleichzeitig=anzahl_gleichzeitig), simulationen_je_prozess=simulationen_je_prozess,
+        adresse=adresse, authkey=authkey, cpu_bindung=einstellungen.get('CPU-Bindung', False),
+        max_last=einstellungen.get('max. Systemlast', None),
+        min_speicher=einstellungen.get('min. freier Speicher [MB]', None))
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Entfernte_Arbeit_Starten(einstellungen, adresse, anzahl_gleichzeitig=None):
+    """Starte auf diesem Rechner Arbeiterprozesse fuer einen Pool auf einem anderen Rechner unter
+    adresse (host, port). Die Berechnungsprogramme werden im Arbeitsverzeichnis aus einstellungen
+    relativ zum aktuellen Ordner gestartet und muessen dort vorhanden sein. Mit anzahl_gleichzeitig
+    wird die Anzahl gleichzeitiger Berechnungen auf diesem Rechner vorgegeben.
+    """
+    import os
+    from .arbeitsverteilung import Entfernte_Arbeiter_Starten, Anzahl_Prozesse
 
-    os.chdir(aktueller_ordner)
+    if (not os.path.isdir(einstellungen['Arbeitsverzeichnis'])):
+        print('# Abbruch: Arbeitsverzeichnis ' + einstellungen['Arbeitsverzeichnis'] + ' nicht vorhanden')
+        return
 
+    authkey = Verbindungsschluessel(einstellungen=einstellungen)
+    if (authkey is None):
+        return
 
+    simulationen_je_prozess = einstellungen.get('Simulationen je Prozess', 1)
+    Entfernte_Arbeiter_Starten(adresse=adresse, authkey=authkey,
+        anzahl_prozesse=Anzahl_Prozesse(simulationen_je_prozess=simulationen_je_prozess,
+        anzahl_gleichzeitig=anzahl_gleichzeitig), simulationen_je_prozess=simulationen_je_prozess,
+        kontext_anpassen=_Kontext_Lokal_Anpassen, cpu_bindung=einstellungen.get('CPU-Bindung', False))
@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+"""
+umatbibliothek.py   v0.1
+2023-09 Dominik Zobel
+"""
+
+# Copyright 2020-2023 Dominik Zobel.
+# All rights reserved.
+#
+# This file is part of the MPO package.
+# MPO is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# MPO is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with MPO. If not, see <http://www.gnu.org/licenses/>.
+
+
+# Bereits geladene UMAT-Funktionen je Prozess (Schluessel: Dateiname und Symbol)
+_geladene_umats = dict()
+
+# Hoechstens so viele Materialparameter akzeptieren mpo_oedometer und mpo_triaxial (Umat_Bibliothek.f)
+_max_parameter = 16
+
+
+
+# -------------------------------------------------------------------------------------------------
+def UMAT_Laden(dateiname, symbol='umat_'):
+    """Lade die Bibliothek dateiname ueber ctypes. Jede Bibliothek wird je Prozess nur einmal geladen.
+    Genutzt werden die Funktionen mpo_oedometer und mpo_triaxial (siehe Umat_Bibliothek.f), die
+    einen ganzen Belastungspfad berechnen, sowie die UMAT mit dem Namen symbol (Standard: Name
+    einer mit gfortran kompilierten Subroutine UMAT), deren Aufrufe ansonsten aus Python gesteuert
+    werden. Gibt ein dict mit den verfuegbaren Funktionen und einer Sperre zurueck, da die meisten
+    UMAT-Implementierungen nicht threadsicher sind. Falls das Laden nicht moeglich ist, wird None
+    zurueckgegeben.
+    """
+    import ctypes
+    import os
+    import threading
+
+    schluessel = (os.path.abspath(dateiname), symbol)
+    if (schluessel in _geladene_umats):
+        return _geladene_umats[schluessel]
+
+    try:
+        bibliothek = ctypes.CDLL(schluessel[0])
+    except OSError as e:
+        print('# Warnung: Bibliothek ' + dateiname + ' konnte nicht geladen werden (' + str(e) + ')')
+        return None
+
+    umat = dict([('bibliothek', bibliothek), ('sperre', threading.Lock())])
+    # Alle Argumente werden als Referenz uebergeben, bei der UMAT folgt am Ende die Laenge des Materialnamens
+    for name, funktionsname, argumenttypen in [('funktion', symbol, [ctypes.c_void_p for x in range(37)] \
+        + [ctypes.c_size_t]), ('oedometer', 'mpo_oedometer', [ctypes.c_void_p for x in range(10)]),
+        ('triaxial', 'mpo_triaxial', [ctypes.c_void_p for x in range(11)])]:
+        funktion = getattr(bibliothek, funktionsname, None)
+        if (funktion is not None):
+            funktion.argtypes = argumenttypen
+            funktion.restype = None
+
+        umat[name] = funktion
+
+    if (umat['funktion'] is None):
+        print('# Warnung: UMAT ' + symbol + ' nicht in ' + dateiname + ' gefunden')
+        return None
+
+    _geladene_umats.setdefault(schluessel, umat)
+    return _geladene_umats[schluessel]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Belastungspfad_Nativ(funktion, materialname, eingangswerte, parameter, porenzahl, num_spalten,
+    maxiter=50000):
+    """Berechne einen ganzen Belastungspfad mit funktion (mpo_oedometer oder mpo_triaxial) aus der
+    Bibliothek. eingangswerte ist eine Liste aus Skalaren und Vektoren, die vor den Materialparametern
+    uebergeben werden. Die Ergebnisse werden direkt in ein vorab angelegtes NumPy-Array mit
+    num_spalten Spalten geschrieben. Gibt die Ergebnisse zurueck oder None bei ungueltigen Eingaben.
+    """
+    import ctypes
+    import numpy
+
+    argumente = [ctypes.create_string_buffer(materialname.encode('utf-8')[:80].ljust(80), 80)]
+    for wert in eingangswerte:
+        if (isinstance(wert, list)):
+            argumente += [numpy.array([len(wert)], dtype=numpy.int32), numpy.array(wert, dtype=numpy.float64)]
+        else:
+            argumente += [numpy.array([wert], dtype=numpy.float64)]
+
+    argumente += [numpy.array([len(parameter)], dtype=numpy.int32), numpy.array(parameter, dtype=numpy.float64),
+        numpy.array([porenzahl], dtype=numpy.float64), numpy.array([maxiter+1], dtype=numpy.int32)]
+    ergebnisse = numpy.empty((maxiter+1, num_spalten))
+    num_zeilen = numpy.zeros(1, dtype=numpy.int32)
+    status = numpy.ones(1, dtype=numpy.int32)
+
+    adressen = [ctypes.addressof(argumente[0])] + [wert.ctypes.data for wert in argumente[1:]]
+    funktion(*adressen, ergebnisse.ctypes.data, num_zeilen.ctypes.data, status.ctypes.data)
+    if (status[0] != 0):
+        return None
+
+    return ergebnisse[:num_zeilen[0]]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _UMAT_Aufruf_Vorbereiten(umat, materialname, parameter, nstatv=20):
+    """Lege alle konstanten Argumente fuer Aufrufe der geladenen umat mit dem materialname und den
+    Materialparametern in parameter an. Gibt eine Funktion aufruf(spannung, zustand, dehnungsinkrement),
+    die die uebergebenen NumPy-Vektoren direkt an die UMAT weiterreicht, und den (veraenderbaren)
+    Vektor fuer das Zeitinkrement zurueck. Die uebergebenen Vektoren muessen waehrend der gesamten
+    Berechnung dieselben bleiben (Aenderungen nur elementweise, bspw. mit vektor[:] = ...).
+    """
+    import ctypes
+    import numpy
+
+    ntens = 6
+    einheitsmatrix = numpy.asfortranarray(numpy.eye(3))
+    konstanten = dict([
+        ('ddsdde', numpy.zeros((ntens, ntens))), ('sse', numpy.zeros(1)), ('spd', numpy.zeros(1)),
+        ('scd', numpy.zeros(1)), ('rpl', numpy.zeros(1)), ('ddsddt', numpy.zeros(ntens)),
+        ('drplde', numpy.zeros(ntens)), ('drpldt', numpy.zeros(1)), ('stran', numpy.zeros(ntens)),
+        ('time', numpy.array([0.001, 0.001])), ('dtime', numpy.zeros(1)), ('temp', numpy.zeros(1)),
+        ('dtemp', numpy.zeros(1)), ('predef', numpy.zeros(1)), ('dpred', numpy.zeros(1)),
+        ('ndi', numpy.array([3], dtype=numpy.int32)), ('nshr', numpy.array([3], dtype=numpy.int32)),
+        ('ntens', numpy.array([ntens], dtype=numpy.int32)), ('nstatv', numpy.array([nstatv], dtype=numpy.int32)),
+        ('props', numpy.array(parameter, dtype=numpy.float64)),
+        ('nprops', numpy.array([len(parameter)], dtype=numpy.int32)), ('coords', numpy.zeros(3)),
+        ('drot', einheitsmatrix.copy(order='F')), ('pnewdt', numpy.zeros(1)), ('celent', numpy.zeros(1)),
+        ('dfgrd0', einheitsmatrix.copy(order='F')), ('dfgrd1', einheitsmatrix.copy(order='F')),
+        ('noel', numpy.zeros(1, dtype=numpy.int32)), ('npt', numpy.zeros(1, dtype=numpy.int32)),
+        ('layer', numpy.zeros(1, dtype=numpy.int32)), ('kspt', numpy.zeros(1, dtype=numpy.int32)),
+        ('jstep', numpy.zeros(4, dtype=numpy.int32)), ('kinc', numpy.zeros(1, dtype=numpy.int32))])
+    cmname = ctypes.create_string_buffer(materialname.encode('utf-8')[:80].ljust(80), 80)
+
+    a = dict([(name, ctypes.c_void_p(wert.ctypes.data)) for name, wert in konstanten.items()])
+    davor = (a['ddsdde'], a['sse'], a['spd'], a['scd'], a['rpl'], a['ddsddt'], a['drplde'], a['drpldt'],
+        a['stran'])
+    danach = (a['time'], a['dtime'], a['temp'], a['dtemp'], a['predef'], a['dpred'],
+        ctypes.c_void_p(ctypes.addressof(cmname)), a['ndi'], a['nshr'], a['ntens'], a['nstatv'], a['props'],
+        a['nprops'], a['coords'], a['drot'], a['pnewdt'], a['celent'], a['dfgrd0'], a['dfgrd1'], a['noel'],
+        a['npt'], a['layer'], a['kspt'], a['jstep'], a['kinc'], ctypes.c_size_t(80))
+    funktion = umat['funktion']
+
+    # Das Ermitteln der Adressen ist im Vergleich zum eigentlichen Aufruf teuer. Daher werden die
+    # vollstaendigen Argumente fuer jede Kombination aus Vektoren nur einmal zusammengestellt
+    argumentlisten = dict()
+
+    def aufruf(spannung, zustand, dehnungsinkrement):
+        schluessel = (id(spannung), id(zustand), id(dehnungsinkrement))
+        argumente = argumentlisten.get(schluessel, None)
+        if (argumente is None):
+            argumente = (ctypes.c_void_p(spannung.ctypes.data), ctypes.c_void_p(zustand.ctypes.data),
+                *davor, ctypes.c_void_p(dehnungsinkrement.ctypes.data), *danach)
+            argumentlisten[schluessel] = argumente
+
+        funktion(*argumente)
+
+    # Es werden nur die Adressen uebergeben, daher muessen alle Argumente referenziert bleiben
+    aufruf.argumente = [konstanten, cmname]
+    return [aufruf, konstanten['dtime']]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Oedometerversuch_Berechnen(umat, materialname, drucke, parameter, porenzahl, maxiter=50000):
+    """Berechne einen oedometrischen Versuch mit der geladenen umat fuer die Spannungen in drucke
+    (Start- und Umkehrpunkte) wie das Beispielprogramm Umat_Oedo. Falls die Bibliothek
+    mpo_oedometer bereitstellt, wird der ganze Belastungspfad dort berechnet, ansonsten wird jeder
+    Aufruf der UMAT von hier aus gesteuert. Gibt ein NumPy-Array mit Zeilen aus Axialspannung und
+    Porenzahl zurueck.
+    """
+    import numpy
+
+    if (umat['oedometer'] is not None):
+        return _Belastungspfad_Nativ(funktion=umat['oedometer'], materialname=materialname,
+            eingangswerte=[list(drucke)], parameter=parameter, porenzahl=porenzahl, num_spalten=2,
+            maxiter=maxiter)
+
+    aufruf, dtime = _UMAT_Aufruf_Vorbereiten(umat=umat, materialname=materialname, parameter=parameter)
+
+    dt = 0.00001
+    dtime[0] = dt
+
+    sigma1 = drucke[0]
+    K0 = 0.5
+    spannung = numpy.array([K0*sigma1, sigma1, K0*sigma1, 0.0, 0.0, 0.0])
+    dehnung = numpy.array([0.0, -1.0, 0.0, 0.0, 0.0, 0.0])*dt
+    zustand = numpy.zeros(20)
+    zustand[0] = porenzahl
+    zustand[2] = -0.0001
+
+    # Ergebnisse werden direkt in den vorab angelegten Speicher geschrieben
+    ergebnisse = numpy.empty((maxiter+1, 2))
+    ergebnisse[0] = [-spannung[1], porenzahl]
+    num_ergebnisse = 1
+
+    dehnungsinkrement = numpy.zeros(6)
+    idx = 1
+    abbruch = False
+    for istep in range(2, len(drucke)+1):
+        vorzeichen = (-1.0)**istep
+        dehnungsinkrement[:] = vorzeichen*dehnung
+        while (vorzeichen*spannung[1] >= vorzeichen*drucke[istep-1]):
+            aufruf(spannung, zustand, dehnungsinkrement)
+            ergebnisse[num_ergebnisse, 0] = -spannung[1]
+            ergebnisse[num_ergebnisse, 1] = zustand[0]
+            num_ergebnisse += 1
+
+            idx += 1
+            if (idx > maxiter):
+                print('# Warnung: Maximale Anzahl an Iterationen erreicht')
+                abbruch = True
+                break
+
+        if (abbruch):
+            break
+
+    return ergebnisse[:num_ergebnisse]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Triaxialschritt(aufruf, spannung, zustand, refdehnung, puffer, fak2, druckabweichung, maxiter):
+    """Bestimme das Dehnungsinkrement in Seitenrichtung, bei dem sich die Seitenspannung fuer die
+    axiale Dehnung aus refdehnung nicht aendert (Sekantenverfahren wie Triax_Step in Umat_Triax).
+    spannung, zustand und refdehnung werden angepasst. Gibt True zurueck, falls die Iteration
+    abgebrochen werden musste.
+    """
+    spannung1, spannung2, dehnung1, dehnung2, zwischenzustand = puffer
+
+    abbruch = False
+    spannung1[:] = spannung
+    spannung2[:] = spannung
+    dehnung1[:] = [refdehnung[0], 0.0, 0.0, refdehnung[3], refdehnung[4], refdehnung[5]]
+    zwischenzustand[:] = zustand
+    aufruf(spannung1, zwischenzustand, dehnung1)
+    diff1 = spannung1[1] - spannung[1]
+
+    dehnung2[:] = [refdehnung[0], fak2*refdehnung[0], fak2*refdehnung[0], refdehnung[3], refdehnung[4],
+        refdehnung[5]]
+    zwischenzustand[:] = zustand
+    aufruf(spannung2, zwischenzustand, dehnung2)
+    zwischenzustand[:] = zustand
+    diff2 = spannung2[1] - spannung[1]
+
+    idx_innen = 0
+    idx_dehnung = 0
+    while (abs(diff2) >= druckabweichung):
+        if (idx_innen > 10):
+            refdehnung /= 2.0
+
+            spannung1[:] = spannung
+            spannung2[:] = spannung
+            dehnung1[:] = [refdehnung[0], 0.0, 0.0, refdehnung[3], refdehnung[4], refdehnung[5]]
+            zwischenzustand[:] = zustand
+            aufruf(spannung1, zwischenzustand, dehnung1)
+            diff1 = spannung1[1] - spannung[1]
+
+            dehnung2[:] = [refdehnung[0], fak2*refdehnung[0], fak2*refdehnung[0], refdehnung[3],
+                refdehnung[4], refdehnung[5]]
+            zwischenzustand[:] = zustand
+            aufruf(spannung2, zwischenzustand, dehnung2)
+            diff2 = spannung2[1] - spannung[1]
+            idx_innen = 0
+
+        angepasste_dehnung = (diff2*dehnung1[1] - diff1*dehnung2[1])/(diff2 - diff1)
+        dehnung1[:] = dehnung2
+        diff1 = diff2
+        dehnung2[1:3] = angepasste_dehnung
+
+        spannung1[:] = spannung
+        zwischenzustand[:] = zustand
+        aufruf(spannung1, zwischenzustand, dehnung2)
+        diff2 = spannung1[1] - spannung[1]
+
+        refdehnung[:] = dehnung2
+        idx_innen += 1
+        idx_dehnung += 1
+
+        if (diff2 != diff2):
+            print('# Warnung: NaN-Eintraege im Triaxialschritt')
+            abbruch = True
+            break
+
+        if (idx_dehnung > maxiter):
+            print('# Warnung: Problem bei der Iteration im Triaxialschritt')
+            abbruch = True
+            break
+
+    spannung[:] = spannung1
+    zustand[:] = zwischenzustand
+    return abbruch
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Triaxialversuch_Berechnen(umat, materialname, seitendruck, zieldehnungen, parameter, porenzahl,
+    maxiter=50000):
+    """Berechne einen triaxialen Versuch mit der geladenen umat bei dem Seitendruck seitendruck bis
+    zu den axialen Dehnungen in zieldehnungen wie das Beispielprogramm Umat_Triax (mit
+    mpo_triaxial aus der Bibliothek, falls vorhanden). Gibt ein NumPy-Array mit Zeilen aus axialer
+    Dehnung [%], volumetrischer Dehnung [%] und Deviatorspannung [kPa] zurueck.
+    """
+    import numpy
+
+    if (umat['triaxial'] is not None):
+        return _Belastungspfad_Nativ(funktion=umat['triaxial'], materialname=materialname,
+            eingangswerte=[seitendruck, list(zieldehnungen)], parameter=parameter, porenzahl=porenzahl,
+            num_spalten=3, maxiter=maxiter)
+
+    aufruf, dtime = _UMAT_Aufruf_Vorbereiten(umat=umat, materialname=materialname, parameter=parameter)
+
+    dt = 0.0001
+    dtime[0] = dt
+
+    spannung = numpy.array([seitendruck, seitendruck, seitendruck, 0.0, 0.0, 0.0])
+    dehnung = numpy.array([-1.0, 0.0, 0.0, 0.0, 0.0, 0.0])*dt
+    zustand = numpy.zeros(20)
+    zustand[0] = porenzahl
+
+    druckabweichung = abs(0.000001*seitendruck)
+    fak2 = 0.0001
+    vergleichsdehnung = 0.0
+
+    ergebnisse = numpy.empty((maxiter+1, 3))
+    ergebnisse[0] = [0.0, 0.0, 0.0]
+    num_ergebnisse = 1
+
+    puffer = [numpy.zeros(6), numpy.zeros(6), numpy.zeros(6), numpy.zeros(6), numpy.zeros(20)]
+    refdehnung = numpy.zeros(6)
+    simdehnung = numpy.zeros(6)
+    idx = 1
+    for istep in range(1, len(zieldehnungen)+1):
+        vorzeichen = (-1.0)**(istep+1)
+        while (vorzeichen*vergleichsdehnung <= vorzeichen*zieldehnungen[istep-1]):
+            refdehnung[:] = vorzeichen*dehnung
+            if (_Triaxialschritt(aufruf=aufruf, spannung=spannung, zustand=zustand, refdehnung=refdehnung,
+                puffer=puffer, fak2=fak2, druckabweichung=druckabweichung, maxiter=maxiter)):
+                break
+
+            simdehnung += refdehnung
+            vergleichsdehnung = abs(simdehnung[0])
+
+            ergebnisse[num_ergebnisse, 0] = -100.0*simdehnung[0]
+            ergebnisse[num_ergebnisse, 1] = -100.0*(simdehnung[0] + simdehnung[1] + simdehnung[2])
+            ergebnisse[num_ergebnisse, 2] = -(spannung[0] - spannung[1])
+            num_ergebnisse += 1
+
+            idx += 1
+            if (idx > maxiter):
+                print('# Warnung: Maximale Anzahl an Iterationen erreicht')
+                break
+
+    return ergebnisse[:num_ergebnisse]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Zahlen_Lesen(werte, typ):
+    """Wandle alle Eintraege aus werte in typ um. Gibt None zurueck, falls das nicht moeglich ist.
+    """
+    try:
+        return [typ(x) for x in werte]
+    except ValueError:
+        return None
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Argumente_Aufteilen(argumente, belastungspfad):
+    """Teile die argumente (Liste aus Texten wie fuer einen Aufruf der Beispielprogramme, aber ohne
+    Ausgabedatei) fuer den belastungspfad 'oedometrisch' oder 'triaxial' auf. Gibt ein dict mit den
+    Eingaben fuer die Berechnung zurueck oder None, falls die Argumente ungueltig sind.
+    """
+    if (belastungspfad == 'oedometrisch'):
+        idx_anzahl = 1
+    elif (belastungspfad == 'triaxial'):
+        idx_anzahl = 2
+    else:
+        print('# Abbruch: Unbekannter Belastungspfad ' + str(belastungspfad))
+        return None
+
+    try:
+        num_werte = int(argumente[idx_anzahl])
+        num_parameter = int(argumente[idx_anzahl+num_werte+1])
+    except (ValueError, IndexError):
+        print('# Abbruch: Ungueltige Argumente fuer den Belastungspfad ' + belastungspfad)
+        return None
+
+    idx_parameter = idx_anzahl + num_werte + 2
+    if (num_parameter > _max_parameter):
+        print('# Abbruch: ' + str(num_parameter) + ' Materialparameter fuer den Belastungspfad ' \
+            + belastungspfad + ' angegeben, die UMAT-Bibliothek unterstuetzt hoechstens ' + str(_max_parameter))
+        return None
+
+    if (len(argumente) < idx_parameter + num_parameter + 1):
+        print('# Abbruch: Ungueltige Anzahl an Argumenten fuer den Belastungspfad ' + belastungspfad)
+        return None
+
+    werte = _Zahlen_Lesen(werte=argumente[idx_anzahl+1:idx_anzahl+num_werte+1], typ=float)
+    parameter = _Zahlen_Lesen(werte=argumente[idx_parameter:idx_parameter+num_parameter], typ=float)
+    porenzahl = _Zahlen_Lesen(werte=argumente[-1:], typ=float)
+    seitendruck = _Zahlen_Lesen(werte=argumente[1:2], typ=float)
+    if ((werte is None) or (parameter is None) or (porenzahl is None) or (seitendruck is None)):
+        print('# Abbruch: Ungueltige Zahlenwerte fuer den Belastungspfad ' + belastungspfad)
+        return None
+
+    return dict([('materialname', argumente[0]), ('werte', werte), ('parameter', parameter),
+        ('porenzahl', porenzahl[0]), ('seitendruck', seitendruck[0])])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def UMAT_Versuch_Berechnen(bibliothek, belastungspfad, argumente, symbol='umat_'):
+    """Berechne einen Versuch mit der UMAT symbol aus der Bibliothek bibliothek direkt im aktuellen
+    Prozess. Der belastungspfad ('oedometrisch' oder 'triaxial') und die argumente entsprechen dem
+    Aufruf der Beispielprogramme Umat_Oedo bzw. Umat_Triax (ohne Ausgabedatei). Gibt die Ergebnisse
+    als NumPy-Array mit den gleichen Spalten wie die Ausgabedateien der Beispielprogramme zurueck
+    oder None, falls die Berechnung nicht durchgefuehrt werden konnte.
+    """
+    import numpy
+
+    umat = UMAT_Laden(dateiname=bibliothek, symbol=symbol)
+    if (umat is None):
+        return None
+
+    eingaben = _Argumente_Aufteilen(argumente=argumente, belastungspfad=belastungspfad)
+    if (eingaben is None):
+        return None
+
+    with umat['sperre'], numpy.errstate(all='ignore'):
+        if (belastungspfad == 'oedometrisch'):
+            return Oedometerversuch_Berechnen(umat=umat, materialname=eingaben['materialname'],
+                drucke=eingaben['werte'], parameter=eingaben['parameter'], porenzahl=eingaben['porenzahl'])
+        else:
+            return Triaxialversuch_Berechnen(umat=umat, materialname=eingaben['materialname'],
+                seitendruck=eingaben['seitendruck'], zieldehnungen=eingaben['werte'],
+                parameter=eingaben['parameter'], porenzahl=eingaben['porenzahl'])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def UMAT_Bibliothek_Pruefen(bibliothek, belastungspfad, symbol='umat_'):
+    """Pruefe, ob NumPy verfuegbar ist, der belastungspfad unterstuetzt wird und die UMAT symbol aus
+    bibliothek geladen werden kann. Gibt True zurueck, wenn die Bibliothek genutzt werden kann,
+    sonst False.
+    """
+    if (belastungspfad not in ['oedometrisch', 'triaxial']):
+        print('# Warnung: Unbekannter Belastungspfad ' + str(belastungspfad) \
+            + ' (erwartet oedometrisch oder triaxial)')
+        return False
+
+    try:
+        import numpy
+    except ImportError:
+        print('# Warnung: Fuer die Berechnung mit einer UMAT-Bibliothek wird NumPy benoetigt')
+        return False
+
+    return (UMAT_Laden(dateiname=bibliothek, symbol=symbol) is not None)
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 """
-versuchsliste.py   v0.4
+versuchsliste.py   v0.5
 2023-09 Dominik Zobel
 """
 
@@ -22,16 +22,23 @@ versuchsliste.py   v0.4
 # along with MPO. If not, see <http://www.gnu.org/licenses/>.
 
 
+# Im Hintergrund laufendes Schreiben der Variationsdatei beim Variationsstrom (Thread, Abbruch, Fehler)
+_variationsdatei_schreiber = dict()
+
+
+
 # -------------------------------------------------------------------------------------------------
-def _Naechsten_Eintrag_Ermitteln(auswahlverfahren, index, variationen):
+def _Naechsten_Eintrag_Ermitteln(auswahlverfahren, index, variationen, zufallsgenerator=None):
     """Waehle aus einer Liste mit der Anzahl variationen fuer verschiedene Eintraege den naechsten
     Eintrag aus. Je nach gewaehltem auswahlverfahren wird eine zufaellige Kombination erzeugt
-    (monte_carlo) oder anhand des uebergebenen index ein Eintrag ermittelt (vollstaendig).
+    (monte_carlo, optional mit einem random.Random als zufallsgenerator) oder anhand des uebergebenen
+    index ein Eintrag ermittelt (vollstaendig).
     """
     if (auswahlverfahren == 'monte_carlo'):
-        import random
+        if (zufallsgenerator is None):
+            import random as zufallsgenerator
 
-        naechste_variation = [round((x+1)*random.random() - 0.5) for x in variationen]
+        naechste_variation = [round((x+1)*zufallsgenerator.random() - 0.5) for x in variationen]
 
     else:
         if (auswahlverfahren != 'vollstaendig'):
@@ -52,140 +59,641 @@ def _Naechsten_Eintrag_Ermitteln(auswahlverfahren, index, variationen):
 
 
 # -------------------------------------------------------------------------------------------------
-def _Schreibe_Variation_In_Datei(ausgabedatei, eintraege):
-    """Schreibe die in eintraege uebergebenen Zahlenwerte als Fortran-Listenvariable in ausgabedatei.
-    Dabei werden die Werte auf signifikante Stellen gerundet und als Double Precision deklariert.
+def _Spaltenwerte(einstellungen):
+    """Ermittle fuer jeden Parameter aus einstellungen alle moeglichen Werte (von Werte (min) bis
+    Werte (max) in Variationen Schritten) und deren Textdarstellung in der Variationsdatei. Die Werte
+    werden dabei nur einmal je Parameter und nicht fuer jede Zeile auf signifikante Stellen gerundet.
+    Gibt [werte, texte] mit je einer Liste fuer jeden Parameter zurueck.
+    """
+    from .hilfen import Runden_Auf_Signifikante_Stellen
+
+    min_eintraege = einstellungen['Optimierungsraum']['Werte (min)']
+    max_eintraege = einstellungen['Optimierungsraum']['Werte (max)']
+    variationen = einstellungen['Optimierungsraum']['Variationen']
+
+    werte = []
+    texte = []
+    for idx in range(len(min_eintraege)):
+        offset = max_eintraege[idx] - min_eintraege[idx]
+        if (variationen[idx] == 0):
+            gewichtungen = [0.0]
+        else:
+            gewichtungen = [float(x)/float(variationen[idx]) for x in range(variationen[idx]+1)]
+
+        spaltenwerte = [min_eintraege[idx] + offset*gewichtung for gewichtung in gewichtungen]
+        werte += [spaltenwerte]
+        texte += [[str(Runden_Auf_Signifikante_Stellen(wert=x, stellen=6)) for x in spaltenwerte]]
+
+    return [werte, texte]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Zufallsstartwert(einstellungen):
+    """Gib den Startwert fuer die Zufallszahlen aus einstellungen['Zufallsstartwert'] zurueck. Ist
+    keiner angegeben, wird ein zufaelliger Startwert gewaehlt und ausgegeben, damit die Auswahl
+    spaeter wiederholt werden kann. Der gewaehlte Startwert wird in einstellungen uebernommen, damit
+    alle weiteren Aufrufe denselben Startwert nutzen.
+    """
+    import random
+
+    startwert = einstellungen.get('Zufallsstartwert', None)
+    if (startwert is None):
+        startwert = random.SystemRandom().randrange(2**32)
+        print('# Zufallsstartwert: ' + str(startwert))
+        einstellungen['Zufallsstartwert'] = startwert
+
+    return startwert
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Primzahlen(anzahl):
+    """Gib eine Liste mit den ersten anzahl Primzahlen zurueck.
+    """
+    primzahlen = []
+    kandidat = 2
+    while (len(primzahlen) < anzahl):
+        if (all([(kandidat % x) != 0 for x in primzahlen])):
+            primzahlen += [kandidat]
+
+        kandidat += 1
+
+    return primzahlen
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Stichprobe_Vorbereiten(einstellungen, auswahlverfahren, spaltenwerte, bedingungen):
+    """Bereite die zufaellige Auswahl von Parameterkombinationen mit dem auswahlverfahren
+    (monte_carlo, latin_hypercube oder halton) vor. Variiert werden nur die Parameter mit
+    Variationen groesser Null. Gibt ein dict mit dem Zustand der Auswahl zurueck oder None, falls
+    das auswahlverfahren nicht ohne numpy verfuegbar ist.
+    """
+    import math
+
+    variationen = einstellungen['Optimierungsraum']['Variationen']
+    startwert = Zufallsstartwert(einstellungen=einstellungen)
+    zustand = dict([('auswahlverfahren', auswahlverfahren), ('variationen', variationen),
+        ('min_eintraege', einstellungen['Optimierungsraum']['Werte (min)']),
+        ('max_eintraege', einstellungen['Optimierungsraum']['Werte (max)']),
+        ('spalten', [idx for idx in range(len(variationen)) if (variationen[idx] > 0)]),
+        ('spaltenwerte', spaltenwerte), ('bedingungen', bedingungen), ('startindex', 0)])
+    try:
+        import numpy
+    except ImportError:
+        if (auswahlverfahren != 'monte_carlo'):
+            print('# Abbruch: Auswahlverfahren ' + auswahlverfahren + ' benoetigt numpy')
+            return None
+
+        import random
+
+        zustand.update([('numpy', None), ('zufallsgenerator', random.Random(startwert))])
+        return zustand
+
+    zufallsgenerator = numpy.random.default_rng(startwert)
+    zustand.update([('numpy', numpy), ('zufallsgenerator', zufallsgenerator),
+        ('werte_arrays', [numpy.array(werte) for werte in spaltenwerte])])
+    if (auswahlverfahren == 'halton'):
+        # Zufaellige Permutation jeder Ziffer (in der jeweiligen Basis) fuer eine verwuerfelte Halton-Folge
+        basen = _Primzahlen(anzahl=len(zustand['spalten']))
+        zustand['basen'] = basen
+        zustand['permutationen'] = [numpy.array([zufallsgenerator.permutation(basis)
+            for idx in range(math.ceil(53*math.log(2)/math.log(basis)))]) for basis in basen]
+
+    return zustand
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Einheitsstichprobe(zustand, anzahl):
+    """Erzeuge anzahl Punkte im Einheitswuerfel mit einer Dimension je variiertem Parameter nach
+    dem Auswahlverfahren in zustand (siehe _Stichprobe_Vorbereiten). Eine Halton-Folge wird bei
+    jedem Aufruf fortgesetzt. Gibt ein numpy-Array mit einer Zeile je Punkt zurueck.
+    """
+    numpy = zustand['numpy']
+    zufallsgenerator = zustand['zufallsgenerator']
+    dimension = len(zustand['spalten'])
+
+    if (zustand['auswahlverfahren'] == 'latin_hypercube'):
+        # Jede Dimension in anzahl gleich grosse Intervalle teilen und jedes genau einmal belegen
+        intervalle = zufallsgenerator.permuted(numpy.tile(numpy.arange(anzahl), (dimension, 1)), axis=1).T
+        return (intervalle + zufallsgenerator.random((anzahl, dimension)))/anzahl
+
+    elif (zustand['auswahlverfahren'] == 'halton'):
+        indizes = numpy.arange(zustand['startindex']+1, zustand['startindex']+anzahl+1, dtype=numpy.int64)
+        zustand['startindex'] += anzahl
+        punkte = numpy.zeros((anzahl, dimension))
+        for idx_spalte, basis in enumerate(zustand['basen']):
+            rest = indizes.copy()
+            faktor = 1.0/basis
+            for permutation in zustand['permutationen'][idx_spalte]:
+                punkte[:, idx_spalte] += permutation[rest % basis]*faktor
+                rest //= basis
+                faktor /= basis
+
+        return punkte
+
+    else:
+        return zufallsgenerator.random((anzahl, dimension))
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Stichprobenzeilen(zustand, anzahl, spaltentexte):
+    """Waehle anzahl Parameterkombinationen nach dem Auswahlverfahren in zustand (siehe
+    _Stichprobe_Vorbereiten) aus. Beim Monte-Carlo-Verfahren werden die Werte auf die durch
+    Variationen vorgegebenen Stufen gelegt, sonst werden sie beliebig zwischen Werte (min) und
+    Werte (max) gewaehlt. Gibt die Zeilen der Variationsdatei fuer alle Kombinationen zurueck, welche
+    die Bedingungen erfuellen.
     """
     from .hilfen import Runden_Auf_Signifikante_Stellen
 
-    ausgabezeilen = ' '.join([str(Runden_Auf_Signifikante_Stellen(wert=x, stellen=6)) for x in eintraege])
-    with open(ausgabedatei, 'a', encoding='utf-8') as ausgabe:
-        ausgabe.write(ausgabezeilen + '\n')
+    numpy = zustand['numpy']
+    spalten = zustand['spalten']
+    if (numpy is None):
+        zeilen = []
+        for idx_variation in range(anzahl):
+            naechste_variation = _Naechsten_Eintrag_Ermitteln(auswahlverfahren='monte_carlo', index=idx_variation,
+                variationen=zustand['variationen'], zufallsgenerator=zustand['zufallsgenerator'])
+            eintraege = [werte[x] for werte, x in zip(zustand['spaltenwerte'], naechste_variation)]
+            if (Bedingungen_Erfuellt(bedingungen=zustand['bedingungen'], eintraege=eintraege)):
+                zeilen += [' '.join([texte[x] for texte, x in zip(spaltentexte, naechste_variation)])]
+
+        return zeilen
+
+    werte_arrays = zustand['werte_arrays']
+    punkte = _Einheitsstichprobe(zustand=zustand, anzahl=anzahl)
+    indizes = numpy.zeros((anzahl, len(werte_arrays)), dtype=numpy.int64)
+    werte = numpy.column_stack([numpy.full(anzahl, werte_arrays[idx][0]) for idx in range(len(werte_arrays))])
+    for idx_punkt, idx in enumerate(spalten):
+        if (zustand['auswahlverfahren'] == 'monte_carlo'):
+            indizes[:, idx] = numpy.round(len(werte_arrays[idx])*punkte[:, idx_punkt] - 0.5)
+            werte[:, idx] = werte_arrays[idx][indizes[:, idx]]
+        else:
+            werte[:, idx] = zustand['min_eintraege'][idx] \
+                + (zustand['max_eintraege'][idx] - zustand['min_eintraege'][idx])*punkte[:, idx_punkt]
+
+    maske = Bedingungen_Maske(bedingungen=zustand['bedingungen'], werte=werte)
+    indizes = indizes[maske]
+    werte = werte[maske]
+    if (zustand['auswahlverfahren'] == 'monte_carlo'):
+        return [' '.join([texte[x] for texte, x in zip(spaltentexte, zeile)]) for zeile in indizes.tolist()]
+
+    textspalten = [[spaltentexte[idx][0]]*werte.shape[0] for idx in range(len(werte_arrays))]
+    for idx in spalten:
+        textspalten[idx] = [str(Runden_Auf_Signifikante_Stellen(wert=x, stellen=6)) for x in werte[:, idx].tolist()]
+
+    return [' '.join(zeile) for zeile in zip(*textspalten)]
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Bedingungen_Kompilieren(einstellungen):
+    """Pruefe die Bedingungen aus einstellungen einmalig und ersetze die Bezeichner durch den Index
+    des jeweiligen Parameters. Gibt eine Liste mit [index_erster, vergleichsoperator, index_zweiter]
+    fuer jede Bedingung zurueck oder None, falls eine Bedingung ungueltig ist.
+    """
+    bezeichnungen = einstellungen['Optimierungsraum']['Bezeichnungen']
+    bedingungen = []
+    for bedingung in einstellungen['Optimierungsraum']['Bedingungen']:
+        if (len(bedingung) != 3):
+            print('MPO: Bedingung muss Bezeichner, Vergleichsoperator, Bezeichner sein')
+            return None
+
+        vergleichsoperator = bedingung[1]
+        if (vergleichsoperator not in ['>', '>=', '==', '<=', '<']):
+            print('MPO: Vergleichsoperator der Bedingung muss einer der folgenden sein: ">", ">=", "==", "<=", oder "<"')
+            return None
+
+        if ((bedingung[0] not in bezeichnungen) or (bedingung[2] not in bezeichnungen)):
+            print('MPO: Bezeichner einer Bedingung müssen mit einem Eintrag aus "Bezeichnungen" übereinstimmen')
+            return None
+
+        bedingungen += [[bezeichnungen.index(bedingung[0]), vergleichsoperator, bezeichnungen.index(bedingung[2])]]
+
+    return bedingungen
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Vergleich_Erfuellt(first, vergleichsoperator, second):
+    """Werte einen vergleichsoperator einer Bedingung fuer first und second aus. Beide koennen
+    einzelne Zahlen oder numpy-Arrays sein (dann wird ein boolsches Array zurueckgegeben).
+    """
+    epsilon = 1e-9
+    if (vergleichsoperator == '>'):
+        return first > second+epsilon
+    elif (vergleichsoperator == '>='):
+        return first >= second
+    elif (vergleichsoperator == '=='):
+        return first == second
+    elif (vergleichsoperator == '<='):
+        return first <= second
+    else:
+        return first < second-epsilon
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Bedingungen_Erfuellt(bedingungen, eintraege):
+    """Gib zurueck, ob die Werte in eintraege alle (mit Bedingungen_Kompilieren aufbereiteten)
+    bedingungen erfuellen.
+    """
+    for index_erster, vergleichsoperator, index_zweiter in bedingungen:
+        if (not _Vergleich_Erfuellt(eintraege[index_erster], vergleichsoperator, eintraege[index_zweiter])):
+            return False
+
+    return True
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Bedingungen_Maske(bedingungen, werte):
+    """Pruefe die (mit Bedingungen_Kompilieren aufbereiteten) bedingungen fuer alle Zeilen des
+    numpy-Arrays werte (eine Spalte je Parameter) gleichzeitig. Gibt ein boolsches Array mit einem
+    Eintrag je Zeile zurueck.
+    """
+    import numpy
+
+    maske = numpy.ones(werte.shape[0], dtype=bool)
+    for index_erster, vergleichsoperator, index_zweiter in bedingungen:
+        maske &= _Vergleich_Erfuellt(werte[:, index_erster], vergleichsoperator, werte[:, index_zweiter])
+
+    return maske
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Bedingungen_Je_Spalte(bedingungen, spalten):
+    """Ordne die bedingungen der Position in spalten zu, ab der beide beteiligten Parameter
+    festgelegt sind. Die Indizes der Parameter werden dabei durch ihre Position in spalten ersetzt.
+    Bedingungen mit Parametern ausserhalb von spalten werden ignoriert.
+    """
+    bedingungen_je_spalte = [[] for spalte in spalten]
+    for index_erster, vergleichsoperator, index_zweiter in bedingungen:
+        if ((index_erster not in spalten) or (index_zweiter not in spalten)):
+            continue
+
+        position_erster = spalten.index(index_erster)
+        position_zweiter = spalten.index(index_zweiter)
+        bedingungen_je_spalte[max(position_erster, position_zweiter)] += [[position_erster,
+            vergleichsoperator, position_zweiter]]
+
+    return bedingungen_je_spalte
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Zulaessige_Bloecke(spaltenwerte, bedingungen_je_spalte, blockgroesse, praefixe=None):
+    """Erzeuge alle Kombinationen der spaltenwerte (numpy-Arrays mit den moeglichen Werten je
+    Parameter), welche die bedingungen_je_spalte erfuellen, blockweise als numpy-Array mit dem Index
+    jedes Parameterwerts. Die Kombinationen werden spaltenweise aufgebaut und nach jeder Spalte mit
+    den dann auswertbaren Bedingungen gefiltert, so dass unzulaessige Teilbereiche nie vollstaendig
+    erzeugt werden. Die Reihenfolge entspricht der des vollstaendigen Auswahlverfahrens.
+    """
+    import numpy
+
+    if (praefixe is None):
+        praefixe = numpy.zeros((1, 0), dtype=numpy.int64)
+
+    position = praefixe.shape[1]
+    if (position == len(spaltenwerte)):
+        yield praefixe
+        return
+
+    anzahl_werte = len(spaltenwerte[position])
+    teilgroesse = max(1, blockgroesse // anzahl_werte)
+    for start in range(0, praefixe.shape[0], teilgroesse):
+        teil = praefixe[start:start+teilgroesse]
+        erweitert = numpy.column_stack([numpy.repeat(teil, anzahl_werte, axis=0),
+            numpy.tile(numpy.arange(anzahl_werte, dtype=numpy.int64), teil.shape[0])])
+        if (bedingungen_je_spalte[position]):
+            maske = numpy.ones(erweitert.shape[0], dtype=bool)
+            for position_erster, vergleichsoperator, position_zweiter in bedingungen_je_spalte[position]:
+                maske &= _Vergleich_Erfuellt(spaltenwerte[position_erster][erweitert[:, position_erster]],
+                    vergleichsoperator, spaltenwerte[position_zweiter][erweitert[:, position_zweiter]])
+
+            erweitert = erweitert[maske]
+
+        if (erweitert.shape[0] > 0):
+            yield from _Zulaessige_Bloecke(spaltenwerte=spaltenwerte, bedingungen_je_spalte=bedingungen_je_spalte,
+                blockgroesse=blockgroesse, praefixe=erweitert)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Zulaessige_Kombinationen(spaltenwerte, bedingungen_je_spalte, praefix=[]):
+    """Erzeuge wie _Zulaessige_Bloecke alle zulaessigen Kombinationen der spaltenwerte, aber ohne
+    numpy und einzeln als Liste mit dem Index jedes Parameterwerts.
+    """
+    position = len(praefix)
+    if (position == len(spaltenwerte)):
+        yield praefix
+        return
+
+    for idx_wert in range(len(spaltenwerte[position])):
+        kandidat = praefix + [idx_wert]
+        erfuellt = True
+        for position_erster, vergleichsoperator, position_zweiter in bedingungen_je_spalte[position]:
+            if (not _Vergleich_Erfuellt(spaltenwerte[position_erster][kandidat[position_erster]],
+                vergleichsoperator, spaltenwerte[position_zweiter][kandidat[position_zweiter]])):
+                erfuellt = False
+                break
+
+        if (erfuellt):
+            yield from _Zulaessige_Kombinationen(spaltenwerte=spaltenwerte,
+                bedingungen_je_spalte=bedingungen_je_spalte, praefix=kandidat)
+
+
+
+# -------------------------------------------------------------------------------------------------
+def _Anzahl_Zulaessig(spaltenwerte, bedingungen, maximum):
+    """Zaehle die Kombinationen der spaltenwerte, welche alle bedingungen erfuellen. Dazu werden nur
+    die Parameter mit Bedingungen aufgezaehlt und das Ergebnis mit der Anzahl der Werte aller
+    uebrigen Parameter multipliziert. Ist die Anzahl groesser als maximum, wird die Zaehlung
+    abgebrochen und eine Zahl groesser als maximum zurueckgegeben. Mit maximum=None wird immer
+    vollstaendig gezaehlt.
+    """
+    from .hilfen import prod
+
+    spalten = sorted(set([x[0] for x in bedingungen] + [x[2] for x in bedingungen]))
+    faktor = prod([len(spaltenwerte[idx]) for idx in range(len(spaltenwerte)) if (idx not in spalten)])
+    bedingungen_je_spalte = _Bedingungen_Je_Spalte(bedingungen=bedingungen, spalten=spalten)
+    try:
+        import numpy
+
+        kombinationen = _Zulaessige_Bloecke(spaltenwerte=[numpy.array(spaltenwerte[idx]) for idx in spalten],
+            bedingungen_je_spalte=bedingungen_je_spalte, blockgroesse=65536)
+        anzahl_je_block = lambda block: block.shape[0]
+    except ImportError:
+        kombinationen = _Zulaessige_Kombinationen(spaltenwerte=[spaltenwerte[idx] for idx in spalten],
+            bedingungen_je_spalte=bedingungen_je_spalte)
+        anzahl_je_block = lambda kombination: 1
+
+    anzahl = 0
+    for block in kombinationen:
+        anzahl += faktor*anzahl_je_block(block)
+        if ((maximum is not None) and (anzahl > maximum)):
+            break
+
+    return anzahl
 
 
 
 # -------------------------------------------------------------------------------------------------
 def Ermittle_Max_Variationen(einstellungen):
     """Ermittle die notwendigen Variationen anhand der in einstellungen ausgewaehlten
-    Auswahlverfahren/max. Variationen.
+    Auswahlverfahren/max. Variationen. Beim vollstaendigen Auswahlverfahren werden nur die
+    Kombinationen gezaehlt, welche alle Bedingungen erfuellen. Beim Variationsstrom (siehe
+    _Variationsstrom_Aktiv) gilt max. Variationen dabei nicht, da weder die Variationsdatei noch alle
+    Variationen im Speicher gehalten werden muessen. Gibt None zurueck, falls zu viele Variationen
+    erforderlich oder die Bedingungen ungueltig sind.
     """
     from .hilfen import prod
 
     anzahl_untersuchungen = einstellungen['max. Variationen']
     if (einstellungen['Auswahlverfahren'] == 'vollstaendig'):
+        variationsstrom = _Variationsstrom_Aktiv(einstellungen=einstellungen)
+        bedingungen = Bedingungen_Kompilieren(einstellungen=einstellungen)
+        if (bedingungen is None):
+            return None
+
         variationen = einstellungen['Optimierungsraum']['Variationen']
-        anzahl_varianten = prod([x+1 for x in variationen])
-        if (anzahl_varianten > anzahl_untersuchungen):
+        anzahl_gitterpunkte = prod([x+1 for x in variationen])
+        if (bedingungen):
+            spaltenwerte, spaltentexte = _Spaltenwerte(einstellungen=einstellungen)
+            anzahl_varianten = _Anzahl_Zulaessig(spaltenwerte=spaltenwerte, bedingungen=bedingungen,
+                maximum=(None if (variationsstrom) else anzahl_untersuchungen))
+        else:
+            anzahl_varianten = anzahl_gitterpunkte
+
+        if ((not variationsstrom) and (anzahl_varianten > anzahl_untersuchungen)):
             print('Abbruch: Die erforderlichen ' + str(anzahl_varianten) \
                 + ' Operationen liegen ueber dem definierten Maximum von ' \
                 + str(einstellungen['max. Variationen']) + '.')
             print('         Eventuell ein anderes Auswahlverfahren oder ein groesseres Maximum waehlen')
             return None
         else:
-            anzahl_untersuchungen = anzahl_varianten
             print('# Es werden ' + str(anzahl_varianten) + ' Operationen mit dem ' \
                 + 'vollstaendigen Auswahlverfahren durchgefuehrt')
+            if (anzahl_varianten != anzahl_gitterpunkte):
+                print('# (' + str(anzahl_gitterpunkte-anzahl_varianten) + ' von ' + str(anzahl_gitterpunkte) \
+                    + ' Kombinationen erfuellen die Bedingungen nicht)')
+
             anzahl_untersuchungen = anzahl_varianten
     elif (einstellungen['Auswahlverfahren'] == 'monte_carlo'):
         print('# Es werden ' + str(anzahl_untersuchungen) + ' Operationen mit zufaelliger Kombination ' \
             + '(Monte-Carlo-Verfahren) durchgefuehrt')
+    elif (einstellungen['Auswahlverfahren'] == 'latin_hypercube'):
+        print('# Es werden ' + str(anzahl_untersuchungen) + ' Operationen mit einer Latin-Hypercube-Stichprobe ' \
+            + 'durchgefuehrt')
+    elif (einstellungen['Auswahlverfahren'] == 'halton'):
+        print('# Es werden ' + str(anzahl_untersuchungen) + ' Operationen mit einer verwuerfelten Halton-Folge ' \
+            + 'durchgefuehrt')
+    elif (einstellungen['Auswahlverfahren'] == 'differentielle_evolution'):
+        from .optimierung import Populationsgroesse
+
+        # In die Variationsdatei wird zunaechst nur die Startpopulation geschrieben
+        populationsgroesse = Populationsgroesse(einstellungen=einstellungen)
+        print('# Es werden bis zu ' + str(anzahl_untersuchungen) + ' Operationen mit differentieller ' \
+            + 'Evolution (Population ' + str(populationsgroesse) + ') durchgefuehrt')
+        anzahl_untersuchungen = populationsgroesse
+    elif (einstellungen['Auswahlverfahren'] == 'bayessche_optimierung'):
+        from .optimierung import Anzahl_Startpunkte
+
+        # In die Variationsdatei werden zunaechst nur die Startpunkte geschrieben
+        startpunkte = Anzahl_Startpunkte(einstellungen=einstellungen)
+        print('# Es werden bis zu ' + str(anzahl_untersuchungen) + ' Operationen mit bayesscher ' \
+            + 'Optimierung (' + str(startpunkte) + ' Startpunkte) durchgefuehrt')
+        anzahl_untersuchungen = startpunkte
 
     return anzahl_untersuchungen
 
 
 
 # -------------------------------------------------------------------------------------------------
-def _Bedingungen_Erfuellt(einstellungen, eintraege):
-    epsilon = 1e-9
-    bezeichnungen = einstellungen['Optimierungsraum']['Bezeichnungen']
-    bedingungen = einstellungen['Optimierungsraum']['Bedingungen']
-    num_erfolg = 0
-    is_invalid = False
-    for bedingung in bedingungen:
-        if (len(bedingung) != 3):
-            print('MPO: Bedingung muss Bezeichner, Vergleichsoperator, Bezeichner sein')
-            is_invalid = True
-            break
+def _Gitterzeilen_Bloecke(spaltenwerte, spaltentexte, bedingungen, blockgroesse):
+    """Erzeuge alle Gitterpunkte aus spaltenwerte, welche die (kompilierten) bedingungen erfuellen,
+    in lexikographischer Reihenfolge. Gibt die Eintraege (mit spaltentexte formatiert) blockweise als
+    Listen von hoechstens blockgroesse Zeilen zurueck (falls verfuegbar mit numpy).
+    """
+    bedingungen_je_spalte = _Bedingungen_Je_Spalte(bedingungen=bedingungen,
+        spalten=list(range(len(spaltenwerte))))
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    if (numpy is None):
+        zeilen = []
+        for naechste_variation in _Zulaessige_Kombinationen(spaltenwerte=spaltenwerte,
+            bedingungen_je_spalte=bedingungen_je_spalte):
+            zeilen += [' '.join([texte[x] for texte, x in zip(spaltentexte, naechste_variation)])]
+            if (len(zeilen) >= blockgroesse):
+                yield zeilen
+                zeilen = []
+
+        if (zeilen):
+            yield zeilen
+    else:
+        for block in _Zulaessige_Bloecke(spaltenwerte=[numpy.array(werte) for werte in spaltenwerte],
+            bedingungen_je_spalte=bedingungen_je_spalte, blockgroesse=blockgroesse):
+            yield [' '.join([texte[x] for texte, x in zip(spaltentexte, zeile)]) for zeile in block.tolist()]
 
-        vergleichsoperator = bedingung[1]
-        if (vergleichsoperator not in ['>', '>=', '==', '<=', '<']):
-            print('MPO: Vergleichsoperator der Bedingung muss einer der folgenden sein: ">", ">=", "==", "<=", oder "<"')
-            is_invalid = True
-            break
 
-        try:
-            first = eintraege[bezeichnungen.index(bedingung[0])]
-            second = eintraege[bezeichnungen.index(bedingung[2])]
-        except:
-            print('MPO: Bezeichner einer Bedingung müssen mit einem Eintrag aus "Bezeichnungen" übereinstimmen')
-            is_invalid = True
-            break
 
-        #print('Checking ' + ''.join(bedingung) + ' with content ' + str(first) + vergleichsoperator + str(second))
-        if ((vergleichsoperator == '>') and (first > second+epsilon)):
-            num_erfolg += 1
-        elif ((vergleichsoperator == '>=') and (first >= second)):
-            num_erfolg += 1
-        elif ((vergleichsoperator == '==') and (first == second)):
-            num_erfolg += 1
-        elif ((vergleichsoperator == '<=') and (first <= second)):
-            num_erfolg += 1
-        elif ((vergleichsoperator == '<') and (first < second-epsilon)):
-            num_erfolg += 1
-        #else:
-        #   print('Condition not fulfilled')
-
-    if (num_erfolg == len(bedingungen)):
-        return [is_invalid, True]
-    else:
-        return [is_invalid, False]
+# -------------------------------------------------------------------------------------------------
+def Gitterzeilen(einstellungen):
+    """Erzeuge alle Eintraege des vollstaendigen Gitters aus einstellungen['Optimierungsraum'],
+    welche die Bedingungen erfuellen (unabhaengig von max. Variationen). Gibt eine Liste mit allen
+    Eintraegen als Text zurueck oder None, falls die Bedingungen ungueltig sind.
+    """
+    bedingungen = Bedingungen_Kompilieren(einstellungen=einstellungen)
+    if (bedingungen is None):
+        return None
+
+    spaltenwerte, spaltentexte = _Spaltenwerte(einstellungen=einstellungen)
+    zeilen = []
+    for block in _Gitterzeilen_Bloecke(spaltenwerte=spaltenwerte, spaltentexte=spaltentexte,
+        bedingungen=bedingungen, blockgroesse=65536):
+        zeilen += block
+
+    return zeilen
 
 
 
 # -------------------------------------------------------------------------------------------------
-def _Versuchsliste_Parameter(ausgabedatei, einstellungen, anzahl_untersuchungen):
+def _Versuchsliste_Parameter(ausgabedatei, einstellungen, anzahl_untersuchungen, abbruch=None):
     """Schreibe anzahl_untersuchungen Parameter-Eintraege in die ausgabedatei. Die Parameter werden
     anhand der einstellungen variiert und die fertigen Eintraege koennen als Eingangsdaten fuer
-    anschliessende Fortran-Untersuchungen genutzt werden.
+    anschliessende Fortran-Untersuchungen genutzt werden. Die Eintraege werden blockweise erzeugt,
+    geprueft und mit jeweils einem Schreibvorgang gespeichert (falls verfuegbar mit numpy). Beim
+    vollstaendigen Auswahlverfahren werden nur Eintraege erzeugt, welche die Bedingungen erfuellen.
+    Bei allen anderen Auswahlverfahren wird solange ausgewaehlt, bis anzahl_untersuchungen
+    verschiedene Eintraege die Bedingungen erfuellen oder keine neuen Eintraege mehr gefunden werden.
+    Ist abbruch (threading.Event) gesetzt, wird das Schreiben nach dem aktuellen Block beendet.
     """
-    from .dateneinlesen import Existenz_Datei
+    import os
 
-    min_eintraege = einstellungen['Optimierungsraum']['Werte (min)']
-    max_eintraege = einstellungen['Optimierungsraum']['Werte (max)']
-    variationen = einstellungen['Optimierungsraum']['Variationen']
+    blockgroesse = 65536
+    max_fehlversuche = 20
+    auswahlverfahren = einstellungen['Auswahlverfahren']
+    spaltenwerte, spaltentexte = _Spaltenwerte(einstellungen=einstellungen)
 
-    offsets = [max_eintraege[idx] - min_eintraege[idx] for idx in range(len(min_eintraege))]
-    gewichtung = [0.0 for x in range(len(min_eintraege))]
+    if (auswahlverfahren in ['differentielle_evolution', 'bayessche_optimierung']):
+        # Startpopulation bzw. Startpunkte der Optimierung
+        auswahlverfahren = 'latin_hypercube'
 
-    for idx_variation in range(anzahl_untersuchungen):
-        naechste_variation = _Naechsten_Eintrag_Ermitteln(auswahlverfahren=einstellungen['Auswahlverfahren'],
-            index=idx_variation, variationen=variationen)
-        for idx in range(len(variationen)):
-            if (variationen[idx] == 0):
-                continue
-            else:
-                gewichtung[idx] = float(naechste_variation[idx])/float(variationen[idx])
-
-        eintraege = [min_eintraege[idx] + offsets[idx]*gewichtung[idx] for idx in range(len(min_eintraege))]
-        is_invalid, erfuellt = _Bedingungen_Erfuellt(einstellungen=einstellungen, eintraege=eintraege)
-        if (is_invalid):
+    if (auswahlverfahren not in ['monte_carlo', 'latin_hypercube', 'halton', 'vollstaendig']):
+        print('# Abbruch: Auswahlverfahren unbekannt - nehme vollstaendig an')
+        auswahlverfahren = 'vollstaendig'
+
+    bedingungen = Bedingungen_Kompilieren(einstellungen=einstellungen)
+    if (bedingungen is None):
+        return False
+
+    if (auswahlverfahren != 'vollstaendig'):
+        zustand = _Stichprobe_Vorbereiten(einstellungen=einstellungen, auswahlverfahren=auswahlverfahren,
+            spaltenwerte=spaltenwerte, bedingungen=bedingungen)
+        if (zustand is None):
             return False
-        elif (erfuellt):
-            _Schreibe_Variation_In_Datei(ausgabedatei=ausgabedatei, eintraege=eintraege)
 
-    # Return false if nothing was written and the file does not exist
-    if (not Existenz_Datei(dateiname=ausgabedatei)):
+        anzahl_geschrieben = 0
+        vorhandene_zeilen = set()
+        fehlversuche = 0
+        with open(ausgabedatei, 'w', encoding='utf-8') as ausgabe:
+            while ((anzahl_geschrieben < anzahl_untersuchungen) and (fehlversuche < max_fehlversuche)):
+                if ((abbruch is not None) and abbruch.is_set()):
+                    break
+
+                anzahl = min(blockgroesse, anzahl_untersuchungen-anzahl_geschrieben)
+                zeilen = []
+                for zeile in _Stichprobenzeilen(zustand=zustand, anzahl=anzahl, spaltentexte=spaltentexte):
+                    if (zeile not in vorhandene_zeilen):
+                        vorhandene_zeilen.add(zeile)
+                        zeilen += [zeile]
+
+                if (not zeilen):
+                    fehlversuche += 1
+                    continue
+
+                fehlversuche = 0
+                ausgabe.write('\n'.join(zeilen) + '\n')
+                anzahl_geschrieben += len(zeilen)
+
+        if ((anzahl_geschrieben > 0) and (anzahl_geschrieben < anzahl_untersuchungen)):
+            print('# Warnung: Nur ' + str(anzahl_geschrieben) + ' verschiedene Variationen gefunden, ' \
+                + 'welche die Bedingungen erfuellen')
+    else:
+        anzahl_geschrieben = 0
+        with open(ausgabedatei, 'w', encoding='utf-8') as ausgabe:
+            for zeilen in _Gitterzeilen_Bloecke(spaltenwerte=spaltenwerte, spaltentexte=spaltentexte,
+                bedingungen=bedingungen, blockgroesse=blockgroesse):
+                if (anzahl_geschrieben >= anzahl_untersuchungen):
+                    break
+
+                if ((abbruch is not None) and abbruch.is_set()):
+                    break
+
+                zeilen = zeilen[:anzahl_untersuchungen-anzahl_geschrieben]
+                ausgabe.write('\n'.join(zeilen) + '\n')
+                anzahl_geschrieben += len(zeilen)
+
+    # Return false if nothing was written
+    if (anzahl_geschrieben == 0):
+        os.remove(ausgabedatei)
         return False
     else:
         return True
 
 
 
+# -------------------------------------------------------------------------------------------------
+def _Variationsdatei_Schreiben(ausgabedatei, einstellungen, anzahl_untersuchungen, abbruch):
+    """Schreibe die Variationsdatei beim Variationsstrom im Hintergrund (siehe
+    _Versuchsliste_Parameter) und merke einen dabei auftretenden Fehler fuer Variationsdatei_Abwarten.
+    """
+    try:
+        _Versuchsliste_Parameter(ausgabedatei=ausgabedatei, einstellungen=einstellungen,
+            anzahl_untersuchungen=anzahl_untersuchungen, abbruch=abbruch)
+    except Exception as fehler:
+        _variationsdatei_schreiber['fehler'] = fehler
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Variationsdatei_Abwarten(abbrechen=False):
+    """Warte, bis die beim Variationsstrom im Hintergrund geschriebene Variationsdatei (siehe
+    Versuchsliste_Erstellen_Und_Speichern) fertig ist. Mit abbrechen=True wird das Schreiben nach dem
+    aktuellen Block beendet. Ein Fehler beim Schreiben wird als Warnung ausgegeben, da die Datei nur
+    als Uebersicht dient. Ohne laufendes Schreiben passiert nichts.
+    """
+    schreiber = _variationsdatei_schreiber.get('thread', None)
+    if (schreiber is None):
+        return
+
+    if (abbrechen):
+        _variationsdatei_schreiber['abbruch'].set()
+
+    schreiber.join()
+    if (_variationsdatei_schreiber['fehler'] is not None):
+        print('# Warnung: Variationsdatei konnte nicht geschrieben werden (' \
+            + str(_variationsdatei_schreiber['fehler']) + ')')
+    elif (_variationsdatei_schreiber['abbruch'].is_set()):
+        print('# Warnung: Schreiben der Variationsdatei abgebrochen, die Datei ist unvollstaendig')
+
+    _variationsdatei_schreiber.clear()
+
+
+
 # -------------------------------------------------------------------------------------------------
 def Versuchsliste_Erstellen_Und_Speichern(einstellungen):
     """Erstelle eine Liste in der Datei einstellungen['Ausgabedatei_Variationen'], in der alle
     gewuenschten Parametervariationen gespeichert sind. Diese Datei kann anschliessend iterativ
-    abgearbeitet werden.
+    abgearbeitet werden. Beim Variationsstrom (siehe Variationsquelle_Erstellen) werden die
+    Variationen erst waehrend der Berechnung erzeugt und die Datei wird optional parallel dazu
+    geschrieben ('Variationsdatei schreiben').
     """
     import os
     from .dateneinlesen import Existenz_Datei
@@ -200,7 +708,149 @@ def Versuchsliste_Erstellen_Und_Speichern(einstellungen):
     if (anzahl_untersuchungen is None):
         return False
 
+    if (einstellungen.get('Variationsstrom', False) and (not _Variationsstrom_Aktiv(einstellungen=einstellungen))):
+        print('# Warnung: Variationsstrom nur mit vollstaendigem Auswahlverfahren und numpy moeglich, ' \
+            + 'erstelle Variationsdatei')
+    elif (_Variationsstrom_Aktiv(einstellungen=einstellungen)):
+        if (anzahl_untersuchungen == 0):
+            return False
+
+        # Die Variationsdatei wird nur noch als Uebersicht (parallel zur Berechnung) geschrieben
+        if (einstellungen.get('Variationsdatei schreiben', True)):
+            import threading
+
+            print('# Variationsdatei wird parallel zur Berechnung geschrieben')
+            Variationsdatei_Abwarten(abbrechen=True)
+            abbruch = threading.Event()
+            schreiber = threading.Thread(target=_Variationsdatei_Schreiben,
+                args=(os.path.abspath(ausgabedatei), einstellungen, anzahl_untersuchungen, abbruch), daemon=True)
+            _variationsdatei_schreiber.update([('thread', schreiber), ('abbruch', abbruch), ('fehler', None)])
+            schreiber.start()
+
+        return True
+
     return _Versuchsliste_Parameter(ausgabedatei=ausgabedatei, einstellungen=einstellungen,
         anzahl_untersuchungen=anzahl_untersuchungen)
 
 
+
+# -------------------------------------------------------------------------------------------------
+def _Variationsstrom_Aktiv(einstellungen):
+    """Gib zurueck, ob die Variationen laut einstellungen ('Variationsstrom') erst waehrend der
+    Berechnung aus ihrem Index erzeugt werden sollen. Das ist nur beim vollstaendigen
+    Auswahlverfahren und mit numpy moeglich.
+    """
+    if ((not einstellungen.get('Variationsstrom', False)) or (einstellungen['Auswahlverfahren'] != 'vollstaendig')):
+        return False
+
+    try:
+        import numpy
+    except ImportError:
+        return False
+
+    return True
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Gitterpunkt_Eintrag(gitter, gitterindex):
+    """Ermittle die Parameter (als Text wie in der Variationsdatei) des Gitterpunkts gitterindex im
+    vollstaendigen Gitter gitter (siehe Variationsquelle_Erstellen). Die Funktion benoetigt nur die
+    kleine Beschreibung des Gitters und kann daher auch in den Arbeiterprozessen genutzt werden.
+    """
+    eintrag = [None for x in gitter['stellen']]
+    for idx in range(len(gitter['stellen'])-1, -1, -1):
+        gitterindex, idx_wert = divmod(gitterindex, gitter['stellen'][idx])
+        eintrag[idx] = gitter['spaltentexte'][idx][idx_wert]
+
+    return eintrag
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Variationsquelle_Erstellen(einstellungen, dateiname):
+    """Stelle die Quelle aller Variationen zusammen. Standardmaessig werden die Variationen aus der
+    Variationsdatei dateiname geladen. Ist der Variationsstrom aktiv (siehe _Variationsstrom_Aktiv),
+    wird nur das Gitter beschrieben und jede Variation bei Bedarf aus ihrem Index erzeugt. Mit
+    Bedingungen werden dazu die zulaessigen Variationen als Bereiche aufeinanderfolgender
+    Gitterindizes bestimmt. Da nur die Parameter bis zum letzten mit einer Bedingung aufgezaehlt
+    werden, umfasst jeder Bereich mindestens alle Kombinationen der uebrigen Parameter. Gibt ein dict
+    mit der Anzahl und den Informationen zum Erzeugen der Variationen zurueck.
+    """
+    from .dateneinlesen import Variationsdatei_Laden
+
+    if (not _Variationsstrom_Aktiv(einstellungen=einstellungen)):
+        eintraege = Variationsdatei_Laden(dateiname=dateiname)
+        return dict([('anzahl', len(eintraege)), ('eintraege', eintraege), ('gitter', None),
+            ('bereiche', None)])
+
+    import numpy
+    from .hilfen import prod
+
+    spaltenwerte, spaltentexte = _Spaltenwerte(einstellungen=einstellungen)
+    stellen = [len(werte) for werte in spaltenwerte]
+    gitter = dict([('stellen', stellen), ('spaltentexte', spaltentexte)])
+
+    bedingungen = Bedingungen_Kompilieren(einstellungen=einstellungen)
+    if (not bedingungen):
+        return dict([('anzahl', prod(stellen)), ('eintraege', None), ('gitter', gitter), ('bereiche', None)])
+
+    # Alle Parameter nach dem letzten mit einer Bedingung sind frei und bilden einen zusammenhaengenden
+    # Bereich von bereichsgroesse Gitterpunkten je zulaessiger Kombination der vorderen Parameter
+    num_spalten = max([max(x[0], x[2]) for x in bedingungen]) + 1
+    bereichsgroesse = prod(stellen[num_spalten:])
+    stellenwerte = numpy.array([prod(stellen[idx+1:]) for idx in range(num_spalten)], dtype=numpy.int64)
+    bedingungen_je_spalte = _Bedingungen_Je_Spalte(bedingungen=bedingungen, spalten=list(range(num_spalten)))
+    bereichsanfaenge = []
+    bereichslaengen = []
+    for block in _Zulaessige_Bloecke(spaltenwerte=[numpy.array(werte)
+        for werte in spaltenwerte[:num_spalten]], bedingungen_je_spalte=bedingungen_je_spalte, blockgroesse=65536):
+        gitterindizes = block @ stellenwerte
+        luecken = numpy.flatnonzero(numpy.diff(gitterindizes) != bereichsgroesse)
+        anfaenge = numpy.concatenate([[0], luecken + 1])
+        bereichsanfaenge += [gitterindizes[anfaenge]]
+        bereichslaengen += [numpy.diff(numpy.append(anfaenge, len(gitterindizes)))*bereichsgroesse]
+
+    if (not bereichsanfaenge):
+        return dict([('anzahl', 0), ('eintraege', None), ('gitter', gitter), ('bereiche', None)])
+
+    # Je Bereich der Gitterindex des ersten Punktes und die Anzahl aller Variationen bis zum Bereichsende
+    bereichsenden = numpy.cumsum(numpy.concatenate(bereichslaengen))
+    return dict([('anzahl', int(bereichsenden[-1])), ('eintraege', None), ('gitter', gitter),
+        ('bereiche', [numpy.concatenate(bereichsanfaenge), bereichsenden])])
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Variation_Aufgabe(quelle, idx_variation):
+    """Gib den Eintrag der Variation idx_variation aus der quelle zurueck, der einem Arbeiter
+    uebergeben wird. Beim Variationsstrom ist das nur der Gitterindex (siehe Gitterpunkt_Eintrag),
+    sonst die Liste der Parameter.
+    """
+    if (quelle['gitter'] is None):
+        return quelle['eintraege'][idx_variation]
+
+    if (quelle['bereiche'] is None):
+        return idx_variation
+
+    import numpy
+
+    bereichsanfaenge, bereichsenden = quelle['bereiche']
+    idx_bereich = int(numpy.searchsorted(bereichsenden, idx_variation, side='right'))
+    vorherige = 0
+    if (idx_bereich > 0):
+        vorherige = int(bereichsenden[idx_bereich-1])
+
+    return int(bereichsanfaenge[idx_bereich]) + idx_variation - vorherige
+
+
+
+# -------------------------------------------------------------------------------------------------
+def Variation_Ermitteln(quelle, idx_variation):
+    """Gib die Parameter (als Text) der Variation idx_variation aus der quelle zurueck.
+    """
+    if (quelle['gitter'] is None):
+        return quelle['eintraege'][idx_variation]
+
+    return Gitterpunkt_Eintrag(gitter=quelle['gitter'], gitterindex=Variation_Aufgabe(quelle=quelle,
+        idx_variation=idx_variation))
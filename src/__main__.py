@@ -34,11 +34,15 @@ def main(argumente):
     import os
     import time
     from .optionsverarbeitung import Optionen_verarbeiten
-    from .dateneinlesen import JSONDateiEinlesen
+    from .dateneinlesen import JSONDateiEinlesen, Referenzcache_Oeffnen, Referenzcache_Schliessen
     from .versuchsliste import Versuchsliste_Erstellen_Und_Speichern
     from .abweichung import Bodendaten_Und_Vergleichsdaten, Bewerte_Ergebnisse
-    from .programmsteuerung import Berechne_Variationen
+    from .programmsteuerung import Berechne_Versuchsablauf, Berechne_Versuchsablauf_Gestuft, \
+        Kurven_Nachberechnen, Entfernte_Arbeit_Starten, Arbeiterpool_Aus_Einstellungen, Verbindungsschluessel
+    from .arbeitsverteilung import Adresse_Einlesen, Arbeiterpool_Beenden
     from .plotausgabe import Plots_Erstellen
+    from .optimierung import Verfeinerung_Vorbereiten, Verfeinerung_Durchfuehren, Evolution_Durchfuehren, \
+        Bayes_Optimierung_Durchfuehren, Sensitivitaet_Ermitteln
 
     print('Starte MPO minimal v0.4      (Startzeit ' + time.strftime('%Y-%m-%d %H:%M') + ')')
 
@@ -50,10 +54,46 @@ def main(argumente):
     if (einstellungen is None):
         return
 
+    adresse = None
+    if (optionen['adresse'] is not None):
+        adresse = Adresse_Einlesen(adresse=optionen['adresse'])
+        if (adresse is None):
+            print('# Abbruch: Ungueltige Adresse ' + optionen['adresse'] + ' (erwartet host:port)')
+            return
+
+        # Ohne geheimen Schluessel koennte jeder, der die Adresse erreicht, Code ausfuehren lassen
+        if (Verbindungsschluessel(einstellungen=einstellungen) is None):
+            return
+
+    anzahl_gleichzeitig = None
+    if (optionen['jobs'] is not None):
+        try:
+            anzahl_gleichzeitig = int(optionen['jobs'])
+        except ValueError:
+            anzahl_gleichzeitig = 0
+
+        if (anzahl_gleichzeitig < 1):
+            print('# Abbruch: Ungueltige Anzahl -jobs=' + optionen['jobs'] + ' (erwartet ganze Zahl > 0)')
+            return
+
+    if (optionen['cmd'] == 'arbeiter'):
+        if (adresse is None):
+            print('# Abbruch: Fuer -cmd=arbeiter muss -adresse=host:port angegeben werden')
+            return
+
+        Entfernte_Arbeit_Starten(einstellungen=einstellungen, adresse=adresse,
+            anzahl_gleichzeitig=anzahl_gleichzeitig)
+        return
+
     if (not os.path.isdir(einstellungen['Arbeitsverzeichnis'])):
         os.makedirs(einstellungen['Arbeitsverzeichnis'])
 
-    if (optionen['cmd'] != 'nutze_liste'):
+    if ((optionen['cmd'] == 'verfeinern') and (not Verfeinerung_Vorbereiten(einstellungen=einstellungen))):
+        return
+
+    fortsetzen = (optionen['cmd'] == 'fortsetzen')
+    # Die Sensitivitaet erstellt eine eigene Variationsdatei
+    if (optionen['cmd'] not in ['nutze_liste', 'fortsetzen', 'sensitivitaet']):
         if (not Versuchsliste_Erstellen_Und_Speichern(einstellungen=einstellungen)):
             return
 
@@ -65,24 +105,55 @@ def main(argumente):
 
     startzeit = time.time()
 
+    # Die Vergleichsdaten aller Versuche werden vorab bestimmt, damit alle Variationen aller Versuche
+    # in einem gemeinsamen Durchlauf berechnet werden koennen
+    gesamtvergleichsdaten = dict()
+    referenzcache = Referenzcache_Oeffnen(dateiname=einstellungen.get('Referenzcache', None))
     schluessel = sorted(list(einstellungen['Versuchsablauf'].keys()))
     num_durchlaeufe = len(schluessel)
     for idx_durchlauf in range(num_durchlaeufe):
         print('\n# ----------------------------------------')
-        print('# --- Lauf ' +  str(idx_durchlauf+1) + '/' + str(num_durchlaeufe) + '\n')
+        print('# --- Versuch ' +  str(idx_durchlauf+1) + '/' + str(num_durchlaeufe) + ': ' \
+            + schluessel[idx_durchlauf])
 
         str_durchlauf = schluessel[idx_durchlauf]
 
         bodendaten, vergleichsdaten = Bodendaten_Und_Vergleichsdaten(einstellungen=einstellungen,
-            str_versuch=str_durchlauf)
+            str_versuch=str_durchlauf, referenzcache=referenzcache)
         if (vergleichsdaten is None):
             print('Vergleichsdaten leer')
             return
 
         gesamtbodendaten += [bodendaten]
+        gesamtvergleichsdaten[str_durchlauf] = vergleichsdaten
+
+    Referenzcache_Schliessen(referenzcache=referenzcache)
 
-        Berechne_Variationen(einstellungen=einstellungen, vergleichsdaten=vergleichsdaten,
-            str_versuch=str_durchlauf)
+    print('\n# ----------------------------------------')
+    # Mit einer Adresse nimmt der Pool zusaetzlich entfernte Arbeiter (-cmd=arbeiter) auf
+    pool = Arbeiterpool_Aus_Einstellungen(einstellungen=einstellungen, anzahl_gleichzeitig=anzahl_gleichzeitig,
+        adresse=adresse)
+    try:
+        if (optionen['cmd'] == 'verfeinern'):
+            Verfeinerung_Durchfuehren(einstellungen=einstellungen, gesamtvergleichsdaten=gesamtvergleichsdaten,
+                pool=pool)
+        elif (optionen['cmd'] == 'sensitivitaet'):
+            Sensitivitaet_Ermitteln(einstellungen=einstellungen, gesamtvergleichsdaten=gesamtvergleichsdaten,
+                pool=pool)
+        elif (einstellungen['Auswahlverfahren'] == 'differentielle_evolution'):
+            Evolution_Durchfuehren(einstellungen=einstellungen, gesamtvergleichsdaten=gesamtvergleichsdaten,
+                pool=pool, fortsetzen=fortsetzen)
+        elif (einstellungen['Auswahlverfahren'] == 'bayessche_optimierung'):
+            Bayes_Optimierung_Durchfuehren(einstellungen=einstellungen,
+                gesamtvergleichsdaten=gesamtvergleichsdaten, pool=pool, fortsetzen=fortsetzen)
+        elif ('Gestufte Auswertung' in einstellungen):
+            Berechne_Versuchsablauf_Gestuft(einstellungen=einstellungen,
+                gesamtvergleichsdaten=gesamtvergleichsdaten, pool=pool, fortsetzen=fortsetzen)
+        else:
+            Berechne_Versuchsablauf(einstellungen=einstellungen, gesamtvergleichsdaten=gesamtvergleichsdaten,
+                pool=pool, fortsetzen=fortsetzen)
+    finally:
+        Arbeiterpool_Beenden(pool=pool)
 
     print('\n# ----------------------------------------')
     indizes = Bewerte_Ergebnisse(einstellungen=einstellungen)
@@ -90,6 +161,7 @@ def main(argumente):
     if (indizes == []):
         print('# Keine brauchbaren Ergebnisse zum Plotten')
     else:
+        Kurven_Nachberechnen(einstellungen=einstellungen, indizes=indizes[:einstellungen['Plot Kurven'][1]])
         Plots_Erstellen(einstellungen=einstellungen, gesamtbodendaten=gesamtbodendaten, indizes=indizes)
 
     print('Beende MPO nach ' + str(time.time()-startzeit) + 's')